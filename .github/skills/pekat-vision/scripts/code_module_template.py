@@ -1,11 +1,19 @@
 """Version-aware PEKAT Code module template with Form Editor values.
 
-The template intentionally does not persist process-global state or mutate result.
+The template never mutates result. The only process-global state is the opt-in
+``crop_mode="reuse"`` buffer, kept per thread, shape, and dtype.
 """
 from __future__ import annotations
 
+import threading
+from collections import OrderedDict
 from typing import Any
 
+CROP_MODES = ("copy", "view", "reuse")
+_REUSE_LIMIT = 8
+_reuse_lock = threading.Lock()
+_reuse_buffers: OrderedDict[tuple[Any, ...], Any] = OrderedDict()
+
 
 def _first_rectangle(context: dict[str, Any], target_label: str | None) -> dict[str, Any] | None:
     rectangles = context.get("detectedRectangles", [])
@@ -24,8 +32,8 @@ def _first_rectangle(context: dict[str, Any], target_label: str | None) -> dict[
     return None
 
 
-def _crop(image: Any, rectangle: dict[str, Any]) -> Any | None:
-    """Crop an array-like image while preserving its dtype through slicing/copy."""
+def _roi(image: Any, rectangle: dict[str, Any]) -> Any | None:
+    """Return the clipped ROI slice of an array-like image (a view for NumPy arrays)."""
     shape = getattr(image, "shape", None)
     if not shape or len(shape) < 2:
         return None
@@ -41,24 +49,97 @@ def _crop(image: Any, rectangle: dict[str, Any]) -> Any | None:
     x2, y2 = max(0, min(width, x + rect_width)), max(0, min(height, y + rect_height))
     if x2 <= x1 or y2 <= y1:
         return None
-    cropped = image[y1:y2, x1:x2]
+    return image[y1:y2, x1:x2]
+
+
+def _read_only(array: Any) -> None:
+    flags = getattr(array, "flags", None)
+    if flags is not None:
+        flags.writeable = False
+
+
+def _reuse(cropped: Any) -> Any | None:
+    """Copy ``cropped`` into this thread's buffer for its shape and dtype; None without NumPy."""
+    try:
+        import numpy as np
+    except ImportError:
+        return None
+    if not isinstance(cropped, np.ndarray):
+        return None
+    key = (threading.get_ident(), cropped.shape, cropped.dtype.str)
+    with _reuse_lock:
+        buffer = _reuse_buffers.pop(key, None)
+        if buffer is None:
+            buffer = np.empty(cropped.shape, dtype=cropped.dtype)
+        _reuse_buffers[key] = buffer
+        while len(_reuse_buffers) > _REUSE_LIMIT:
+            _reuse_buffers.popitem(last=False)
+    buffer.flags.writeable = True
+    np.copyto(buffer, cropped)
+    _read_only(buffer)
+    return buffer
+
+
+def _materialize(cropped: Any, mode: str, read_only_downstream: bool) -> tuple[Any, str, str | None]:
+    """Return ``(image, mode_used, fallback_reason)`` for the requested crop mode.
+
+    ``view`` and ``reuse`` are honoured only when the form confirms that later
+    modules neither modify the image nor keep it past the evaluation; the result
+    is then marked read-only so a violating in-place write raises instead of
+    silently changing the source frame or the next frame's crop.
+    """
+    if mode not in CROP_MODES:
+        return _copy(cropped), "copy", "unknown_mode"
+    if mode != "copy" and not read_only_downstream:
+        return _copy(cropped), "copy", "downstream_not_confirmed_read_only"
+    if mode == "view":
+        _read_only(cropped)
+        return cropped, "view", None
+    if mode == "reuse":
+        reused = _reuse(cropped)
+        if reused is None:
+            return _copy(cropped), "copy", "reuse_needs_numpy_array"
+        return reused, "reuse", None
+    return _copy(cropped), "copy", None
+
+
+def _copy(cropped: Any) -> Any:
     return cropped.copy() if hasattr(cropped, "copy") else cropped
 
 
+def _diagnostics(image: Any, requested: str, used: str, fallback: str | None) -> dict[str, Any]:
+    flags = getattr(image, "flags", None)
+    dtype = getattr(image, "dtype", None)
+    shape = getattr(image, "shape", None)
+    return {
+        "requested_mode": requested,
+        "mode": used,
+        "fallback": fallback,
+        "dtype": None if dtype is None else str(dtype),
+        "shape": None if shape is None else [int(size) for size in shape],
+        "c_contiguous": None if flags is None else bool(flags.c_contiguous),
+        "writeable": None if flags is None else bool(flags.writeable),
+    }
+
+
 def main(context: dict[str, Any], form: dict[str, Any] | None = None) -> None:
     """Optionally crop the image and write diagnostics without changing result."""
     values = form or {}
     target_label = values.get("target_label")
     crop_enabled = bool(values.get("crop_enabled", False))
+    crop_mode = str(values.get("crop_mode") or "copy")
+    read_only_downstream = bool(values.get("image_read_only_downstream", False))
 
     rectangle = _first_rectangle(context, None if target_label is None else str(target_label))
     context["code_template_status"] = "rectangle_not_found" if rectangle is None else "rectangle_found"
     if not crop_enabled or rectangle is None:
         return
 
-    cropped = _crop(context.get("image"), rectangle)
+    cropped = _roi(context.get("image"), rectangle)
     if cropped is None:
         context["code_template_status"] = "invalid_image_or_roi"
         return
+    cropped, used, fallback = _materialize(cropped, crop_mode, read_only_downstream)
     context["image"] = cropped
+    context["code_template_crop"] = _diagnostics(cropped, crop_mode, used, fallback)
     context["code_template_status"] = "cropped"
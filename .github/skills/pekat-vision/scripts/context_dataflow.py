@@ -0,0 +1,345 @@
+"""Static Context dataflow for Code module sources and ordered flows.
+
+Extracts literal ``context[...]`` reads, writes, and in-place mutations,
+``result`` changes, and imports. For an ordered flow it reports reads no earlier
+module or the runtime provides, writes overwritten before anything reads them,
+keys changed in place (check these before trusting a zero-copy ``image`` view),
+and heavy imports executed on the per-frame path. Dynamic keys are flagged, not
+resolved; nothing is executed.
+"""
+from __future__ import annotations
+
+import argparse
+import ast
+import json
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from generate_code_module import ENTRYPOINT_CACHE
+
+# Standard keys PEKAT puts into Context before Code modules run (see references/version-context.md).
+RUNTIME_KEYS = frozenset(
+    {
+        "image", "detectedRectangles", "result", "heatmaps",
+        "production_mode", "operatorInput", "data",
+    }
+)
+HEAVY_IMPORTS = frozenset(
+    {
+        "cv2", "numpy", "scipy", "skimage", "sklearn", "pandas", "PIL",
+        "torch", "tensorflow", "onnxruntime", "pyzbar", "zxingcpp", "matplotlib",
+    }
+)
+_READ_METHODS = {"get", "setdefault", "pop"}
+_WRITE_METHODS = {"setdefault", "pop"}
+_MUTATING_METHODS = {
+    "append", "extend", "insert", "pop", "remove", "clear",
+    "update", "sort", "reverse", "setdefault", "add", "discard",
+}
+
+
+@dataclass(slots=True)
+class ModuleFlow:
+    """Context usage of one module.
+
+    ``reads`` only lists keys read before the module writes them; ``optional_reads``
+    is the subset only read via ``get``/``setdefault``/``pop``/``in``, which
+    tolerate a missing key.
+    """
+
+    name: str
+    reads: set[str] = field(default_factory=set)
+    optional_reads: set[str] = field(default_factory=set)
+    writes: set[str] = field(default_factory=set)
+    mutates: set[str] = field(default_factory=set)
+    imports: set[str] = field(default_factory=set)
+    per_frame_imports: set[str] = field(default_factory=set)
+    dynamic_access: bool = False
+    error: str | None = None
+
+    @property
+    def mutates_result(self) -> bool:
+        return "result" in self.writes or "result" in self.mutates
+
+    @property
+    def heavy_per_frame_imports(self) -> list[str]:
+        heavy = (name for name in self.per_frame_imports if name.split(".")[0] in HEAVY_IMPORTS)
+        return sorted(heavy)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "reads": sorted(self.reads),
+            "optional_reads": sorted(self.optional_reads),
+            "writes": sorted(self.writes),
+            "mutates": sorted(self.mutates),
+            "mutates_result": self.mutates_result,
+            "imports": sorted(self.imports),
+            "per_frame_imports": sorted(self.per_frame_imports),
+            "heavy_per_frame_imports": self.heavy_per_frame_imports,
+            "dynamic_access": self.dynamic_access,
+            "error": self.error,
+        }
+
+
+def _literal(node: ast.AST) -> str | None:
+    return node.value if isinstance(node, ast.Constant) and isinstance(node.value, str) else None
+
+
+class _Collector(ast.NodeVisitor):
+    def __init__(self, names: set[str]) -> None:
+        self.names = names
+        self.first_read: dict[str, int] = {}
+        self.required: set[str] = set()
+        self.first_write: dict[str, int] = {}
+        self.mutates: set[str] = set()
+        self.imports: set[str] = set()
+        self.per_frame: set[str] = set()
+        self.dynamic = False
+        self._depth = 0
+
+    def _is_context(self, node: ast.AST) -> bool:
+        return isinstance(node, ast.Name) and node.id in self.names
+
+    def _key(self, node: ast.AST) -> str | None:
+        key = _literal(node)
+        if key is None:
+            self.dynamic = True
+        return key
+
+    def _read(self, key: str | None, line: int, *, optional: bool = False) -> None:
+        if key is not None:
+            self.first_read.setdefault(key, line)
+            if not optional:
+                self.required.add(key)
+
+    def _write(self, key: str | None, line: int) -> None:
+        if key is not None:
+            self.first_write.setdefault(key, line)
+
+    def _import(self, names: list[str]) -> None:
+        self.imports.update(names)
+        if self._depth:
+            self.per_frame.update(names)
+
+    def visit_Import(self, node: ast.Import) -> None:
+        self._import([alias.name for alias in node.names])
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        if node.module and not node.level:
+            self._import([node.module])
+
+    def _function(self, node: ast.FunctionDef | ast.AsyncFunctionDef | ast.Lambda) -> None:
+        self._depth += 1
+        self.generic_visit(node)
+        self._depth -= 1
+
+    visit_FunctionDef = visit_AsyncFunctionDef = visit_Lambda = _function
+
+    def visit_Subscript(self, node: ast.Subscript) -> None:
+        if self._is_context(node.value):
+            key = self._key(node.slice)
+            (self._read if isinstance(node.ctx, ast.Load) else self._write)(key, node.lineno)
+        elif (
+            isinstance(node.value, ast.Subscript)
+            and self._is_context(node.value.value)
+            and not isinstance(node.ctx, ast.Load)
+        ):
+            # context["key"][index] = value changes the stored object in place.
+            key = self._key(node.value.slice)
+            if key is not None:
+                self.mutates.add(key)
+        self.generic_visit(node)
+
+    def visit_Call(self, node: ast.Call) -> None:
+        func = node.func
+        if isinstance(func, ast.Attribute):
+            target = func.value
+            if self._is_context(target):
+                if func.attr == "update":
+                    self._update(node)
+                elif func.attr in _READ_METHODS | _WRITE_METHODS:
+                    key = self._key(node.args[0]) if node.args else None
+                    if func.attr in _READ_METHODS:
+                        self._read(key, node.lineno, optional=True)
+                    if func.attr in _WRITE_METHODS:
+                        self._write(key, node.lineno)
+            elif (
+                isinstance(target, ast.Subscript)
+                and self._is_context(target.value)
+                and func.attr in _MUTATING_METHODS
+            ):
+                key = _literal(target.slice)
+                if key is not None:
+                    self.mutates.add(key)
+        self.generic_visit(node)
+
+    def _update(self, node: ast.Call) -> None:
+        for keyword in node.keywords:
+            if keyword.arg is None:
+                self.dynamic = True
+            else:
+                self._write(keyword.arg, node.lineno)
+        for argument in node.args:
+            literal_keys = isinstance(argument, ast.Dict) and all(
+                _literal(key) is not None for key in argument.keys if key
+            )
+            if literal_keys:
+                for key in argument.keys:
+                    self._write(_literal(key) if key else None, node.lineno)
+            else:
+                self.dynamic = True
+
+    def visit_Compare(self, node: ast.Compare) -> None:
+        membership = len(node.ops) == 1 and isinstance(node.ops[0], (ast.In, ast.NotIn))
+        if membership and self._is_context(node.comparators[0]):
+            self._read(self._key(node.left), node.lineno, optional=True)
+        self.generic_visit(node)
+
+
+def analyze_source(
+    source: str, name: str = "<source>", tree: ast.Module | None = None
+) -> ModuleFlow:
+    """Analyze one ``source_code`` body; a syntax error is returned in ``error``."""
+    flow = ModuleFlow(name)
+    if tree is None:
+        try:
+            tree = ast.parse(source)
+        except SyntaxError as exc:
+            flow.error = f"syntax error at line {exc.lineno}: {exc.msg}"
+            return flow
+        except ValueError as exc:  # older 3.11 releases raise ValueError for null bytes
+            flow.error = f"invalid source: {exc}"
+            return flow
+    info = ENTRYPOINT_CACHE.analyze(source, tree)
+    names = {"context", *info.args[:1]}
+    collector = _Collector(names)
+    lines = source.splitlines()
+    for statement in tree.body:
+        # Vendored helpers are most of a large module; skip top-level statements whose
+        # text mentions neither a Context name nor ``import`` instead of visiting them.
+        segment = "\n".join(lines[statement.lineno - 1 : statement.end_lineno])
+        if "import" in segment or any(name in segment for name in names):
+            collector.visit(statement)
+    flow.writes = set(collector.first_write)
+    # A key read on or before the line of its first write is expected from upstream.
+    first_write = collector.first_write
+    flow.reads = {
+        key for key, line in collector.first_read.items() if line <= first_write.get(key, line)
+    }
+    flow.mutates = collector.mutates
+    flow.reads |= collector.mutates - flow.writes
+    flow.optional_reads = flow.reads - collector.required - collector.mutates
+    flow.imports = collector.imports
+    flow.per_frame_imports = collector.per_frame
+    flow.dynamic_access = collector.dynamic
+    return flow
+
+
+def analyze_flow(
+    modules: list[ModuleFlow], provided: set[str] | frozenset[str] = RUNTIME_KEYS
+) -> dict[str, Any]:
+    """Check an ordered flow for unsatisfied reads and unread overwrites.
+
+    Also lists in-place mutations and heavy imports on the per-frame path.
+    """
+    available = set(provided)
+    pending: dict[str, int] = {}
+    unsatisfied, redundant, mutations, heavy = [], [], [], []
+    for index, module in enumerate(modules):
+        for key in sorted(module.reads):
+            pending.pop(key, None)
+            if key not in available and key not in module.optional_reads:
+                unsatisfied.append({"index": index, "module": module.name, "key": key})
+        for key in sorted(module.mutates):
+            pending.pop(key, None)
+            mutations.append({"index": index, "module": module.name, "key": key})
+        for key in sorted(module.writes):
+            if key in pending:
+                earlier = pending[key]
+                redundant.append(
+                    {
+                        "key": key,
+                        "index": earlier,
+                        "module": modules[earlier].name,
+                        "overwritten_at": index,
+                        "overwritten_by": module.name,
+                    }
+                )
+            pending[key] = index
+        available |= module.writes
+        heavy += [
+            {"index": index, "module": module.name, "import": name}
+            for name in module.heavy_per_frame_imports
+        ]
+    return {
+        "provided": sorted(provided),
+        "unsatisfied_reads": unsatisfied,
+        "redundant_writes": redundant,
+        "in_place_mutations": mutations,
+        "heavy_per_frame_imports": heavy,
+        "dynamic_modules": [module.name for module in modules if module.dynamic_access],
+        "errors": [
+            {"module": module.name, "error": module.error} for module in modules if module.error
+        ],
+    }
+
+
+def load_source(path: Path) -> tuple[str, str]:
+    """Return ``(name, source)`` from a ModuleSpec ``.json``, an export, or a plain ``.py`` file."""
+    text = path.read_text(encoding="utf-8-sig")
+    if path.suffix.lower() == ".py":
+        return path.stem, text
+    payload = json.loads(text)
+    if not isinstance(payload, dict):
+        raise ValueError(f"{path.name}: expected a JSON object")
+    module = payload.get("module")
+    if isinstance(module, dict):
+        source, label = module.get("sourceCode"), module.get("label")
+    else:
+        source, label = payload.get("source_code"), payload.get("label")
+    if not isinstance(source, str):
+        raise ValueError(f"{path.name}: no source code")
+    return (label if isinstance(label, str) and label else path.stem), source
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Report Context reads/writes for Code modules and ordered flows"
+    )
+    parser.add_argument(
+        "paths", nargs="+", type=Path, help="ModuleSpec .json, .pmodule/.ptool, or .py files"
+    )
+    parser.add_argument(
+        "--flow", action="store_true", help="Treat paths as one flow in the given order"
+    )
+    parser.add_argument(
+        "--provided",
+        nargs="*",
+        help="Keys available before the flow (default: PEKAT standard keys)",
+    )
+    args = parser.parse_args(argv)
+    modules = []
+    for path in args.paths:
+        try:
+            name, source = load_source(path)
+        except (OSError, ValueError) as exc:
+            modules.append(ModuleFlow(path.stem, error=str(exc)))
+            continue
+        modules.append(analyze_source(source, name))
+    report: dict[str, Any] = {"modules": [module.as_dict() for module in modules]}
+    if args.flow:
+        provided = RUNTIME_KEYS if args.provided is None else frozenset(args.provided)
+        report["flow"] = analyze_flow(modules, provided)
+    json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+    sys.stdout.write("\n")
+    failed = any(module.error for module in modules)
+    flow = report.get("flow") or {}
+    issues = args.flow and (flow["unsatisfied_reads"] or flow["redundant_writes"])
+    return 1 if failed or issues else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
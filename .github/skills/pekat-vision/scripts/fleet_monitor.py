@@ -0,0 +1,359 @@
+"""Read-only Projects Manager fleet monitor: status polling, change events, and Prometheus metrics.
+
+Polls ``status`` for every configured station/project at bounded concurrency,
+emits an event whenever a project's status or reachability changes, keeps a
+fixed-size NumPy ring buffer of samples, and renders Prometheus text
+exposition. It only ever sends ``status``; there is no mutating code path.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from projects_manager_tcp_demo import AsyncProjectsManagerClient
+
+HISTORY_DTYPE = np.dtype(
+    [("time", np.float64), ("target", np.uint16), ("status", np.uint16), ("up", np.bool_), ("latency_ms", np.float32)]
+)
+
+
+@dataclass(frozen=True, slots=True)
+class Station:
+    name: str
+    host: str
+    port: int = 7002
+    projects: tuple[str, ...] = ()
+
+
+@dataclass(slots=True)
+class StatusEvent:
+    station: str
+    project: str
+    previous: str | None
+    current: str | None
+    up: bool
+    timestamp: float
+    error: str | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "station": self.station,
+            "project": self.project,
+            "previous": self.previous,
+            "current": self.current,
+            "up": self.up,
+            "timestamp": self.timestamp,
+            "error": self.error,
+        }
+
+
+@dataclass(slots=True)
+class _Target:
+    index: int
+    station: Station
+    project: str
+    status: str | None = None
+    up: bool = False
+    seen: bool = False
+    latency_s: float = 0.0
+    last_change: float = 0.0
+    changes: int = 0
+    checked_at: float = 0.0
+
+
+class StatusHistory:
+    """Fixed-capacity ring of ``(time, target, status, up, latency_ms)`` rows; the oldest row is overwritten."""
+
+    def __init__(self, capacity: int = 4096) -> None:
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self._rows = np.zeros(capacity, dtype=HISTORY_DTYPE)
+        self._next = 0
+        self._count = 0
+
+    def append(self, timestamp: float, target: int, status: int, up: bool, latency_ms: float) -> None:
+        self._rows[self._next] = (timestamp, target, status, up, latency_ms)
+        self._next = (self._next + 1) % len(self._rows)
+        self._count = min(self._count + 1, len(self._rows))
+
+    def rows(self) -> np.ndarray:
+        """Return the stored rows oldest first (a copy)."""
+        if self._count < len(self._rows):
+            return self._rows[: self._count].copy()
+        return np.concatenate((self._rows[self._next :], self._rows[: self._next]))
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        return int(self._rows.nbytes)
+
+
+def load_fleet(path: Path) -> list[Station]:
+    """Read ``{"stations": [{"name", "host", "port", "projects": [...]}, ...]}``."""
+    payload = json.loads(Path(path).read_text(encoding="utf-8-sig"))
+    stations = payload.get("stations") if isinstance(payload, dict) else None
+    if not isinstance(stations, list) or not stations:
+        raise ValueError("fleet file needs a non-empty stations list")
+    result = []
+    for item in stations:
+        if not isinstance(item, dict) or not isinstance(item.get("name"), str) or not isinstance(item.get("host"), str):
+            raise ValueError("each station needs a name and host")
+        projects = item.get("projects")
+        if not isinstance(projects, list) or not projects or not all(isinstance(project, str) for project in projects):
+            raise ValueError(f"{item['name']}: projects must be a non-empty list of paths")
+        result.append(Station(item["name"], item["host"], int(item.get("port", 7002)), tuple(projects)))
+    if len({station.name for station in result}) != len(result):
+        raise ValueError("station names must be unique")
+    return result
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class FleetMonitor:
+    """Poll every station/project ``status`` with at most ``concurrency`` queries in flight.
+
+    Pass the Projects Manager reply ``terminator`` to keep station connections
+    alive between cycles; without it every query opens a new connection.
+    """
+
+    def __init__(
+        self,
+        stations: Iterable[Station],
+        *,
+        concurrency: int = 8,
+        timeout_s: float = 3.0,
+        history: int = 4096,
+        terminator: bytes | None = None,
+        client_factory: Callable[[Station], AsyncProjectsManagerClient] | None = None,
+    ) -> None:
+        if concurrency <= 0:
+            raise ValueError("concurrency must be positive")
+        self.stations = list(stations)
+        self.concurrency = concurrency
+        self._factory = client_factory or (
+            lambda station: AsyncProjectsManagerClient(
+                station.host,
+                station.port,
+                max_connections=min(concurrency, len(station.projects)),
+                timeout_s=timeout_s,
+                terminator=terminator,
+            )
+        )
+        self._clients: dict[str, AsyncProjectsManagerClient] = {}
+        self._targets = [
+            _Target(index, station, project)
+            for index, (station, project) in enumerate(
+                (station, project) for station in self.stations for project in dict.fromkeys(station.projects)
+            )
+        ]
+        if len(self._targets) > np.iinfo(np.uint16).max:
+            raise ValueError("too many monitored projects")
+        self._status_codes: dict[str, int] = {}
+        self.statuses: list[str | None] = [None]
+        self.history = StatusHistory(history)
+        self.cycles = 0
+
+    def _client(self, station: Station) -> AsyncProjectsManagerClient:
+        client = self._clients.get(station.name)
+        if client is None:
+            client = self._clients[station.name] = self._factory(station)
+        return client
+
+    def _code(self, status: str | None) -> int:
+        if status is None:
+            return 0
+        code = self._status_codes.get(status)
+        if code is None:
+            code = self._status_codes[status] = len(self.statuses)
+            self.statuses.append(status)
+        return code
+
+    async def _check(self, target: _Target, semaphore: asyncio.Semaphore) -> StatusEvent | None:
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                status, error = await self._client(target.station).status(target.project, max_age_s=0), None
+            except Exception as exc:  # noqa: BLE001 - an unreachable station is a monitoring result
+                status, error = None, f"{type(exc).__name__}: {exc}"
+            latency = time.perf_counter() - started
+        now = time.time()
+        up = error is None
+        self.history.append(now, target.index, self._code(status), up, latency * 1000)
+        event = None
+        if not target.seen or status != target.status or up != target.up:
+            event = StatusEvent(target.station.name, target.project, target.status, status, up, now, error)
+            target.last_change = now
+            target.changes += target.seen
+        target.status, target.up, target.seen = status, up, True
+        target.latency_s, target.checked_at = latency, now
+        return event
+
+    async def poll_once(self) -> list[StatusEvent]:
+        """Run one status cycle and return the change events (first sightings included)."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = await asyncio.gather(*(self._check(target, semaphore) for target in self._targets))
+        self.cycles += 1
+        return [event for event in results if event is not None]
+
+    async def run(
+        self,
+        interval_s: float,
+        *,
+        cycles: int | None = None,
+        on_cycle: Callable[[list[StatusEvent]], Any] | None = None,
+    ) -> None:
+        """Poll every ``interval_s`` seconds (start to start) until cancelled or ``cycles`` completed."""
+        if interval_s <= 0:
+            raise ValueError("interval_s must be positive")
+        loop = asyncio.get_running_loop()
+        completed = 0
+        while cycles is None or completed < cycles:
+            started = loop.time()
+            events = await self.poll_once()
+            completed += 1
+            if on_cycle is not None:
+                on_cycle(events)
+            if cycles is not None and completed >= cycles:
+                break
+            await asyncio.sleep(max(0.0, started + interval_s - loop.time()))
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "station": target.station.name,
+                "project": target.project,
+                "status": target.status,
+                "up": target.up,
+                "latency_ms": target.latency_s * 1000,
+                "last_change": target.last_change,
+                "changes": target.changes,
+                "checked_at": target.checked_at,
+            }
+            for target in self._targets
+            if target.seen
+        ]
+
+    def history_rows(self) -> list[dict[str, Any]]:
+        """Decode the ring buffer into dicts, oldest first."""
+        return [
+            {
+                "time": float(row["time"]),
+                "station": self._targets[row["target"]].station.name,
+                "project": self._targets[row["target"]].project,
+                "status": self.statuses[row["status"]],
+                "up": bool(row["up"]),
+                "latency_ms": float(row["latency_ms"]),
+            }
+            for row in self.history.rows()
+        ]
+
+    def metrics(self) -> str:
+        """Prometheus text exposition of the latest cycle."""
+        lines = []
+        families = (
+            ("pekat_project_up", "gauge", "1 when the Projects Manager answered the status query."),
+            ("pekat_project_status", "gauge", "1 for the last reported status string."),
+            ("pekat_status_latency_seconds", "gauge", "Duration of the last status query."),
+            ("pekat_status_last_change_timestamp_seconds", "gauge", "Unix time of the last status or reachability change."),
+            ("pekat_status_changes_total", "counter", "Status or reachability changes since the monitor started."),
+        )
+        seen = [target for target in self._targets if target.seen]
+        for name, kind, help_text in families:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            for target in seen:
+                labels = f'station="{_label(target.station.name)}",project="{_label(target.project)}"'
+                if name == "pekat_project_up":
+                    value: float = int(target.up)
+                elif name == "pekat_project_status":
+                    if target.status is None:
+                        continue
+                    labels += f',status="{_label(target.status)}"'
+                    value = 1
+                elif name == "pekat_status_latency_seconds":
+                    value = round(target.latency_s, 6)
+                elif name == "pekat_status_last_change_timestamp_seconds":
+                    value = round(target.last_change, 3)
+                else:
+                    value = target.changes
+                lines.append(f"{name}{{{labels}}} {value}")
+        lines += ["# HELP pekat_fleet_cycles_total Completed polling cycles.", "# TYPE pekat_fleet_cycles_total counter"]
+        lines.append(f"pekat_fleet_cycles_total {self.cycles}")
+        return "\n".join(lines) + "\n"
+
+    async def close(self) -> None:
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.close()
+
+    async def __aenter__(self) -> "FleetMonitor":
+        return self
+
+    async def __aexit__(self, *_exc: Any) -> None:
+        await self.close()
+
+
+def _write_text_atomic(path: Path, text: str) -> None:
+    temporary = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    temporary.write_text(text, encoding="utf-8", newline="\n")
+    os.replace(temporary, path)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Read-only Projects Manager status monitor")
+    parser.add_argument("fleet", type=Path, help="JSON file with stations, hosts, ports, and project paths")
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds between polling cycles")
+    parser.add_argument("--cycles", type=int, help="Stop after this many cycles (default: run until interrupted)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=3.0)
+    parser.add_argument("--history", type=int, default=4096, help="Ring buffer capacity in samples")
+    parser.add_argument("--metrics-file", type=Path, help="Rewrite Prometheus text here after every cycle")
+    parser.add_argument(
+        "--terminator",
+        help=r"Reply terminator, e.g. '\n'; enables keep-alive (default: one connection per query)",
+    )
+    args = parser.parse_args(argv)
+    terminator = None
+    if args.terminator:
+        terminator = args.terminator.encode("utf-8").decode("unicode_escape").encode("latin-1")
+    monitor = FleetMonitor(
+        load_fleet(args.fleet),
+        concurrency=args.concurrency,
+        timeout_s=args.timeout,
+        history=args.history,
+        terminator=terminator,
+    )
+
+    def report(events: list[StatusEvent]) -> None:
+        for event in events:
+            sys.stdout.write(json.dumps(event.as_dict(), ensure_ascii=False) + "\n")
+        sys.stdout.flush()
+        if args.metrics_file is not None:
+            _write_text_atomic(args.metrics_file, monitor.metrics())
+
+    async def run() -> None:
+        async with monitor:
+            await monitor.run(args.interval, cycles=args.cycles, on_cycle=report)
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
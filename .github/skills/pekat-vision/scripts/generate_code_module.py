@@ -6,32 +6,171 @@ from __future__ import annotations
 
 import argparse
 import ast
+import glob
+import hashlib
 import json
+import os
+import sys
 import threading
 import time
+from collections import OrderedDict
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
+from json.encoder import encode_basestring
 from pathlib import Path
-from typing import Any
+from typing import Any, Protocol
+
+from id_allocator import FileIdAllocator, ProcessIdAllocator, SeededIdAllocator
 
 SUPPORTED_VERSIONS = {"3.19.3": ".pmodule", "4.0.1": ".ptool"}
 FORM_TYPES = {"text", "number", "checkbox", "select"}
-_id_lock = threading.Lock()
-_last_id = 0
+MANIFEST_NAME = ".pekat-build-manifest.json"
+STREAM_STRING_CHUNK = 1 << 16
+_COMPACT_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
 
 
 class ModuleSpecError(ValueError):
     """Raised when a ModuleSpec violates the verified export contract."""
 
 
+class IdAllocator(Protocol):
+    def reserve(self, count: int = 1) -> int: ...
+
+
+DEFAULT_ID_ALLOCATOR: IdAllocator = ProcessIdAllocator()
+
+
 def unique_epoch_ms() -> int:
     """Return a process-local monotonically unique epoch-millisecond integer."""
-    global _last_id
-    with _id_lock:
-        value = int(time.time() * 1000)
-        if value <= _last_id:
-            value = _last_id + 1
-        _last_id = value
-        return value
+    return DEFAULT_ID_ALLOCATOR.reserve(1)
+
+
+@dataclass(frozen=True, slots=True)
+class EntrypointInfo:
+    """What ``validate`` needs from ``source_code``: top-level ``main`` count and arguments."""
+
+    main_count: int = 0
+    args: tuple[str, ...] = ()
+    error_line: int | None = None
+    error_message: str | None = None
+
+    @classmethod
+    def analyze(cls, source: str) -> "EntrypointInfo":
+        try:
+            tree = ast.parse(source)
+        except SyntaxError as exc:
+            return cls(error_line=exc.lineno, error_message=exc.msg)
+        except ValueError as exc:  # older 3.11 releases raise ValueError for null bytes
+            return cls(error_line=1, error_message=str(exc))
+        return cls.from_tree(tree)
+
+    @classmethod
+    def from_tree(cls, tree: ast.Module) -> "EntrypointInfo":
+        mains = [node for node in tree.body if isinstance(node, ast.FunctionDef) and node.name == "main"]
+        args = tuple(arg.arg for arg in mains[0].args.args) if len(mains) == 1 else ()
+        return cls(main_count=len(mains), args=args)
+
+
+class EntrypointCache:
+    """Content-addressed LRU of :class:`EntrypointInfo`, optionally persisted to ``directory``.
+
+    Keys hash the source together with the interpreter's major/minor version,
+    because what ``ast.parse`` accepts depends on the grammar.
+    """
+
+    def __init__(self, max_entries: int = 1024, directory: Path | None = None) -> None:
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.max_entries = max_entries
+        self.directory = directory
+        self._entries: OrderedDict[str, EntrypointInfo] = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+    @staticmethod
+    def key(source: str) -> str:
+        digest = hashlib.sha256(f"{sys.version_info[0]}.{sys.version_info[1]}\0".encode("ascii"))
+        digest.update(source.encode("utf-8", "surrogatepass"))
+        return digest.hexdigest()
+
+    def _remember(self, key: str, info: EntrypointInfo) -> None:
+        self._entries[key] = info
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def _read_disk(self, key: str) -> EntrypointInfo | None:
+        if self.directory is None:
+            return None
+        try:
+            data = json.loads((self.directory / f"{key}.json").read_text(encoding="utf-8"))
+            return EntrypointInfo(data["main_count"], tuple(data["args"]), data["error_line"], data["error_message"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _write_disk(self, key: str, info: EntrypointInfo) -> None:
+        if self.directory is None:
+            return
+        payload = {
+            "main_count": info.main_count,
+            "args": list(info.args),
+            "error_line": info.error_line,
+            "error_message": info.error_message,
+        }
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            temporary = self.directory / f"{key}.{os.getpid()}.{threading.get_ident()}.tmp"
+            temporary.write_text(json.dumps(payload), encoding="utf-8")
+            os.replace(temporary, self.directory / f"{key}.json")
+        except OSError:
+            return  # The disk store is an optimization; the in-memory result is still valid.
+
+    def analyze(self, source: str, tree: ast.Module | None = None) -> EntrypointInfo:
+        """Return the cached analysis; on a miss, reuse ``tree`` when the caller already parsed ``source``."""
+        key = self.key(source)
+        with self._lock:
+            info = self._entries.get(key)
+            if info is not None:
+                self._entries.move_to_end(key)
+                self.counters["hits"] += 1
+                return info
+        info = self._read_disk(key)
+        counter = "disk_hits"
+        if info is None:
+            info = EntrypointInfo.analyze(source) if tree is None else EntrypointInfo.from_tree(tree)
+            self._write_disk(key, info)
+            counter = "misses"
+        with self._lock:
+            self.counters[counter] += 1
+            self._remember(key, info)
+        return info
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {**self.counters, "entries": len(self._entries)}
+
+
+ENTRYPOINT_CACHE = EntrypointCache()
+_DIRECTORY_CACHES: dict[str, EntrypointCache] = {}
+_DIRECTORY_CACHES_LOCK = threading.Lock()
+
+
+def entrypoint_cache_for(directory: Path | str | None) -> EntrypointCache:
+    """Return the process-wide cache persisted to ``directory`` (``None``: :data:`ENTRYPOINT_CACHE`)."""
+    if directory is None:
+        return ENTRYPOINT_CACHE
+    key = str(Path(directory))
+    with _DIRECTORY_CACHES_LOCK:
+        cache = _DIRECTORY_CACHES.get(key)
+        if cache is None:
+            cache = _DIRECTORY_CACHES[key] = EntrypointCache(directory=Path(directory))
+        return cache
 
 
 def _string(value: Any, name: str, *, allow_empty: bool = True) -> str:
@@ -166,7 +305,7 @@ class ModuleSpec:
     module_id: int | None = None
 
     @classmethod
-    def from_mapping(cls, value: dict[str, Any]) -> "ModuleSpec":
+    def from_mapping(cls, value: dict[str, Any], *, entrypoint_cache: EntrypointCache | None = None) -> "ModuleSpec":
         if not isinstance(value, dict):
             raise ModuleSpecError("ModuleSpec must be an object")
         raw_form = value.get("form", [])
@@ -186,10 +325,30 @@ class ModuleSpec:
             is_active=_boolean(value.get("is_active", True), "is_active"),
             module_id=value.get("module_id"),
         )
-        spec.validate()
+        spec.validate(entrypoint_cache=entrypoint_cache)
         return spec
 
-    def validate(self) -> None:
+    @classmethod
+    def from_export(cls, payload: dict[str, Any]) -> "ModuleSpec":
+        """Rebuild a validated spec from an exported envelope, keeping module and form IDs."""
+        module = payload.get("module") if isinstance(payload, dict) else None
+        if not isinstance(module, dict) or payload.get("type") != "CODE":
+            raise ModuleSpecError("export must be a CODE envelope with a module object")
+        return cls.from_mapping(
+            {
+                "target_version": payload.get("version"),
+                "label": module.get("label"),
+                "source_code": module.get("sourceCode"),
+                "note": module.get("note", ""),
+                "form": module.get("form", []),
+                "form_values": module.get("formValues", {}),
+                "show_image_preview": module.get("showImagePreview", True),
+                "is_active": module.get("isActive", True),
+                "module_id": module.get("id"),
+            }
+        )
+
+    def validate(self, *, entrypoint_cache: EntrypointCache | None = None) -> None:
         if self.target_version not in SUPPORTED_VERSIONS:
             raise ModuleSpecError(f"unsupported PEKAT version: {self.target_version}")
         if self.module_id is not None and (not isinstance(self.module_id, int) or isinstance(self.module_id, bool)):
@@ -200,14 +359,12 @@ class ModuleSpec:
         unknown = sorted(set(self.form_values) - set(keys))
         if unknown:
             raise ModuleSpecError(f"form_values contains unknown keys: {unknown}")
-        try:
-            tree = ast.parse(self.source_code)
-        except SyntaxError as exc:
-            raise ModuleSpecError(f"source_code syntax error at line {exc.lineno}: {exc.msg}") from exc
-        mains = [node for node in tree.body if isinstance(node, ast.FunctionDef) and node.name == "main"]
-        if len(mains) != 1:
+        info = (entrypoint_cache or ENTRYPOINT_CACHE).analyze(self.source_code)
+        if info.error_message is not None:
+            raise ModuleSpecError(f"source_code syntax error at line {info.error_line}: {info.error_message}")
+        if info.main_count != 1:
             raise ModuleSpecError("source_code must define exactly one top-level main function")
-        args = [arg.arg for arg in mains[0].args.args]
+        args = info.args
         if not args or args[0] != "context":
             raise ModuleSpecError("main first argument must be context")
         if self.form and (len(args) < 2 or args[1] != "form"):
@@ -217,8 +374,14 @@ class ModuleSpec:
     def extension(self) -> str:
         return SUPPORTED_VERSIONS[self.target_version]
 
-    def build_payload(self, *, epoch_ms: int | None = None) -> dict[str, Any]:
-        base_id = unique_epoch_ms() if epoch_ms is None else epoch_ms
+    @property
+    def id_count(self) -> int:
+        """IDs consumed by :meth:`build_payload`: the module plus one per form item."""
+        return len(self.form) + 1
+
+    def build_payload(self, *, epoch_ms: int | None = None, allocator: IdAllocator | None = None) -> dict[str, Any]:
+        """Build the export envelope; IDs come from ``epoch_ms`` or a block reserved from ``allocator``."""
+        base_id = (allocator or DEFAULT_ID_ALLOCATOR).reserve(self.id_count) if epoch_ms is None else epoch_ms
         if not isinstance(base_id, int) or isinstance(base_id, bool):
             raise ModuleSpecError("epoch_ms must be an integer")
         exported_form = [item.export(base_id + index + 1) for index, item in enumerate(self.form)]
@@ -243,24 +406,263 @@ class ModuleSpec:
             "version": self.target_version,
         }
 
-    def write(self, destination: Path, *, epoch_ms: int | None = None) -> Path:
+    def write(self, destination: Path, *, epoch_ms: int | None = None, allocator: IdAllocator | None = None) -> Path:
         destination = destination.with_suffix(self.extension)
         destination.parent.mkdir(parents=True, exist_ok=True)
-        destination.write_text(
-            json.dumps(self.build_payload(epoch_ms=epoch_ms), ensure_ascii=False, separators=(",", ":")),
-            encoding="utf-8",
-            newline="\n",
-        )
+        write_json_atomic(destination, self.build_payload(epoch_ms=epoch_ms, allocator=allocator))
         return destination
 
 
-def main() -> int:
-    parser = argparse.ArgumentParser(description="Generate a validated PEKAT Code module")
-    parser.add_argument("spec", type=Path, help="UTF-8 JSON ModuleSpec")
-    parser.add_argument("--output", type=Path, required=True, help="Output path; extension is derived from version")
-    args = parser.parse_args()
+def iter_compact_json(value: Any) -> Iterator[str]:
+    """Yield ``json.dumps(value, ensure_ascii=False, separators=(",", ":"))`` piece by piece.
+
+    Strings longer than ``STREAM_STRING_CHUNK`` are escaped slice by slice, so a
+    large ``sourceCode`` is never duplicated as one escaped copy.
+    """
+    if isinstance(value, str):
+        if len(value) <= STREAM_STRING_CHUNK:
+            yield encode_basestring(value)
+            return
+        yield '"'
+        for start in range(0, len(value), STREAM_STRING_CHUNK):
+            yield encode_basestring(value[start : start + STREAM_STRING_CHUNK])[1:-1]
+        yield '"'
+    elif isinstance(value, dict) and all(isinstance(key, str) for key in value):
+        yield "{"
+        for index, (key, item) in enumerate(value.items()):
+            yield ("," if index else "") + encode_basestring(key) + ":"
+            yield from iter_compact_json(item)
+        yield "}"
+    elif isinstance(value, (list, tuple)):
+        yield "["
+        for index, item in enumerate(value):
+            if index:
+                yield ","
+            yield from iter_compact_json(item)
+        yield "]"
+    else:
+        yield _COMPACT_ENCODER.encode(value)
+
+
+def write_json_atomic(destination: Path, payload: Any) -> None:
+    """Stream compact UTF-8 JSON to a sibling temp file, fsync it, and rename it over ``destination``."""
+    temporary = destination.with_name(f".{destination.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(temporary, "w", encoding="utf-8", newline="\n") as handle:
+            for chunk in iter_compact_json(payload):
+                handle.write(chunk)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temporary, destination)
+    except BaseException:
+        temporary.unlink(missing_ok=True)
+        raise
+
+
+def load_export(path: Path) -> ModuleSpec:
+    """Read a ``.pmodule``/``.ptool`` file back into a ModuleSpec; the extension must match the version."""
+    spec = ModuleSpec.from_export(json.loads(Path(path).read_text(encoding="utf-8-sig")))
+    if Path(path).suffix.lower() != spec.extension:
+        raise ModuleSpecError(f"{Path(path).name}: {spec.target_version} exports use {spec.extension}")
+    return spec
+
+
+def expand_spec_paths(patterns: list[str]) -> list[Path]:
+    """Expand directories (``*.json`` inside) and glob patterns into sorted unique spec paths."""
+    paths: set[Path] = set()
+    for pattern in patterns:
+        if Path(pattern).is_dir():
+            paths.update(Path(pattern).glob("*.json"))
+        else:
+            paths.update(Path(match) for match in glob.glob(pattern, recursive=True))
+    return sorted(path for path in paths if path.is_file())
+
+
+def _load_manifest(path: Path) -> dict[str, dict[str, Any]]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    entries = data.get("entries") if isinstance(data, dict) else None
+    return entries if isinstance(entries, dict) else {}
+
+
+def _save_manifest(path: Path, entries: dict[str, dict[str, Any]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(path.name + ".tmp")
+    temporary.write_text(json.dumps({"entries": entries}, indent=1, sort_keys=True), encoding="utf-8", newline="\n")
+    os.replace(temporary, path)
+
+
+def _build_one(
+    spec_path: str, version: str, output: str, epoch_ms: int, ast_cache_dir: str | None = None
+) -> dict[str, Any]:
+    """Process-pool worker: validate one spec for one version and write it.
+
+    Any exception becomes this job's ``error`` so one bad spec never aborts the batch.
+    """
+    started = time.perf_counter()
+    cache = entrypoint_cache_for(ast_cache_dir)
+    before = cache.stats()
+    try:
+        mapping = json.loads(Path(spec_path).read_text(encoding="utf-8-sig"))
+        if isinstance(mapping, dict):
+            mapping = {**mapping, "target_version": version}
+        spec = ModuleSpec.from_mapping(mapping, entrypoint_cache=cache)
+        written, error = str(spec.write(Path(output), epoch_ms=epoch_ms)), None
+    except Exception as exc:  # noqa: BLE001 - reported per spec, the batch continues
+        written, error = None, f"{type(exc).__name__}: {exc}"
+    after = cache.stats()
+    counts = {name: after[name] - before[name] for name in ("hits", "disk_hits", "misses")}
+    return {"output": written, "error": error, "seconds": time.perf_counter() - started, "ast_cache": counts}
+
+
+def build_batch(
+    spec_paths: list[Path],
+    output_dir: Path,
+    *,
+    versions: list[str] | None = None,
+    workers: int = 1,
+    manifest_path: Path | None = None,
+    force: bool = False,
+    ast_cache_dir: Path | None = None,
+    allocator: IdAllocator | None = None,
+) -> dict[str, Any]:
+    """Build many specs, skipping unchanged ones recorded in the build manifest.
+
+    Each spec is built for ``versions`` (default: its own ``target_version``) into
+    ``output_dir/<stem><extension>``. A failing spec, including one whose stem
+    collides with an earlier spec, is reported and left out of the manifest; the
+    rest of the batch still runs. Entries for specs outside this run are kept
+    while their output exists, so a partial batch never invalidates the others.
+    ``ast_cache_dir`` lets worker processes share entrypoint analysis of
+    identical ``source_code`` bodies.
+
+    ID blocks are reserved in this process before dispatch, so workers never
+    allocate. With a :class:`SeededIdAllocator` every job reserves in spec order,
+    skipped or not, and the reserved base is part of the manifest hash; a build
+    is then byte-identical to a clean build with the same seed.
+    """
+    if workers <= 0:
+        raise ValueError("workers must be positive")
+    unknown = sorted(set(versions or []) - set(SUPPORTED_VERSIONS))
+    if unknown:
+        raise ModuleSpecError(f"unsupported PEKAT version: {unknown}")
+    allocator = allocator or DEFAULT_ID_ALLOCATOR
+    seeded = isinstance(allocator, SeededIdAllocator)
+    manifest_path = manifest_path or output_dir / MANIFEST_NAME
+    entries = _load_manifest(manifest_path)
+    previous = {} if force else dict(entries)
+    results: list[dict[str, Any]] = []
+    jobs: list[tuple[dict[str, Any], tuple[str, str, str, int, str | None]]] = []
+    stems: dict[str, Path] = {}
+    cache_dir = str(ast_cache_dir) if ast_cache_dir is not None else None
+    started = time.perf_counter()
+
+    for spec_path in spec_paths:
+        if stems.setdefault(spec_path.stem, spec_path) != spec_path:
+            error = f"ModuleSpecError: specs {stems[spec_path.stem]} and {spec_path} write the same output name"
+            results.append({"spec": str(spec_path), "version": None, "status": "failed", "error": error, "seconds": 0.0})
+            continue
+        try:
+            raw = spec_path.read_bytes()
+            mapping = json.loads(raw.decode("utf-8-sig"))
+            form = mapping.get("form", []) if isinstance(mapping, dict) else []
+            targets = versions or [mapping.get("target_version") if isinstance(mapping, dict) else None]
+        except Exception as exc:  # noqa: BLE001 - reported per spec, the batch continues
+            error = f"{type(exc).__name__}: {exc}"
+            results.append({"spec": str(spec_path), "version": None, "status": "failed", "error": error, "seconds": 0.0})
+            continue
+        count = len(form) + 1 if isinstance(form, list) else 1
+        for version in targets:
+            key = f"{spec_path.as_posix()}|{version}"
+            base_id = allocator.reserve(count) if seeded else None
+            digest = hashlib.sha256(raw + b"\0" + f"{version}\0{base_id}".encode("utf-8")).hexdigest()
+            extension = SUPPORTED_VERSIONS.get(version, ".json") if isinstance(version, str) else ".json"
+            output = output_dir / (spec_path.stem + extension)
+            record = {"spec": str(spec_path), "version": version, "output": str(output)}
+            cached = previous.get(key)
+            if cached and cached.get("hash") == digest and output.is_file():
+                results.append({**record, "status": "skipped", "error": None, "seconds": 0.0})
+                continue
+            if base_id is None:
+                base_id = allocator.reserve(count)
+            jobs.append(({**record, "hash": digest, "key": key}, (str(spec_path), version, str(output), base_id, cache_dir)))
+
+    if workers == 1 or len(jobs) <= 1:
+        outcomes = [_build_one(*arguments) for _, arguments in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            outcomes = list(pool.map(_build_one, *zip(*(arguments for _, arguments in jobs))))
+    for (record, _), outcome in zip(jobs, outcomes):
+        key, digest = record.pop("key"), record.pop("hash")
+        status = "failed" if outcome["error"] else "built"
+        results.append({**record, "status": status, "error": outcome["error"], "seconds": outcome["seconds"]})
+        if status == "built":
+            entries[key] = {"hash": digest, "output": record["output"]}
+        else:
+            entries.pop(key, None)
+
+    # Keep entries this run did not touch; forget only outputs that no longer exist.
+    entries = {
+        key: entry
+        for key, entry in entries.items()
+        if isinstance(entry, dict) and isinstance(entry.get("output"), str) and Path(entry["output"]).is_file()
+    }
+    _save_manifest(manifest_path, entries)
+    failures = [item for item in results if item["status"] == "failed"]
+    return {
+        "built": sum(item["status"] == "built" for item in results),
+        "skipped": sum(item["status"] == "skipped" for item in results),
+        "failed": len(failures),
+        "seconds": time.perf_counter() - started,
+        "ast_cache": {
+            name: sum(outcome["ast_cache"][name] for outcome in outcomes) for name in ("hits", "disk_hits", "misses")
+        },
+        "results": results,
+        "failures": [{"spec": item["spec"], "version": item["version"], "error": item["error"]} for item in failures],
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate validated PEKAT Code modules")
+    parser.add_argument("spec", nargs="?", type=Path, help="UTF-8 JSON ModuleSpec")
+    parser.add_argument("--output", type=Path, help="Output path; extension is derived from version")
+    parser.add_argument("--batch", nargs="+", metavar="DIR_OR_GLOB", help="Build every matching spec")
+    parser.add_argument("--output-dir", type=Path, help="Batch output directory")
+    parser.add_argument("--versions", nargs="+", choices=sorted(SUPPORTED_VERSIONS), help="Override target versions")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--manifest", type=Path, help=f"Build manifest (default: OUTPUT_DIR/{MANIFEST_NAME})")
+    parser.add_argument("--force", action="store_true", help="Rebuild specs even if the manifest says unchanged")
+    parser.add_argument("--ast-cache", type=Path, help="Directory that persists source_code entrypoint analysis")
+    ids = parser.add_mutually_exclusive_group()
+    ids.add_argument("--id-seed", type=int, help="Deterministic IDs counted from this value (reproducible builds)")
+    ids.add_argument("--id-state", type=Path, help="Locked local file that keeps IDs unique across processes")
+    args = parser.parse_args(argv)
+    allocator: IdAllocator | None = None
+    if args.id_seed is not None:
+        allocator = SeededIdAllocator(args.id_seed)
+    elif args.id_state is not None:
+        allocator = FileIdAllocator(args.id_state)
+    if args.batch:
+        if args.spec or args.output or not args.output_dir:
+            parser.error("--batch requires --output-dir and no positional spec/--output")
+        report = build_batch(
+            expand_spec_paths(args.batch),
+            args.output_dir,
+            versions=args.versions,
+            workers=args.workers,
+            manifest_path=args.manifest,
+            force=args.force,
+            ast_cache_dir=args.ast_cache,
+            allocator=allocator,
+        )
+        print(json.dumps(report, indent=2))
+        return 1 if report["failed"] else 0
+    if not args.spec or not args.output:
+        parser.error("spec and --output are required outside --batch mode")
     spec = ModuleSpec.from_mapping(json.loads(args.spec.read_text(encoding="utf-8-sig")))
-    print(spec.write(args.output))
+    print(spec.write(args.output, allocator=allocator))
     return 0
 
 
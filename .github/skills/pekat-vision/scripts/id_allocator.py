@@ -0,0 +1,148 @@
+"""Collision-free integer IDs for generated PEKAT module and form items.
+
+PEKAT exports use epoch-millisecond integers for module ``id``, form item ``id``,
+and ``editDate``. An allocator hands out blocks of consecutive IDs so one module
+never shares an ID with another, even across generator processes.
+"""
+from __future__ import annotations
+
+import errno
+import os
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO
+
+
+def _epoch_ms() -> int:
+    return int(time.time() * 1000)
+
+
+class ProcessIdAllocator:
+    """Monotonic epoch-millisecond blocks, unique within one process."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._last = 0
+
+    def reserve(self, count: int = 1) -> int:
+        """Reserve ``count`` consecutive IDs and return the first."""
+        if count <= 0:
+            raise ValueError("count must be positive")
+        with self._lock:
+            first = max(_epoch_ms(), self._last + 1)
+            self._last = first + count - 1
+            return first
+
+
+class SeededIdAllocator:
+    """Deterministic blocks counted up from ``seed`` for byte-identical rebuilds.
+
+    IDs depend only on the seed and reservation order, so a build that reserves
+    in a stable order reproduces the same files. Do not import modules from two
+    different seeded builds into one project.
+    """
+
+    def __init__(self, seed: int) -> None:
+        if not isinstance(seed, int) or isinstance(seed, bool) or seed <= 0:
+            raise ValueError("seed must be a positive integer")
+        self._lock = threading.Lock()
+        self._next = seed
+
+    def reserve(self, count: int = 1) -> int:
+        if count <= 0:
+            raise ValueError("count must be positive")
+        with self._lock:
+            first = self._next
+            self._next += count
+            return first
+
+
+_WINDOWS = os.name == "nt"
+LOCK_POLL_S = 0.05
+
+
+def _lock_timed_out(deadline: float | None, path: str) -> None:
+    if deadline is not None and time.monotonic() >= deadline:
+        raise TimeoutError(f"timed out waiting for the ID allocator lock on {path}")
+    time.sleep(LOCK_POLL_S)
+
+
+@contextmanager
+def _exclusive(handle: BinaryIO, timeout_s: float | None = None) -> Iterator[None]:
+    """Hold an exclusive lock on ``handle``, waiting up to ``timeout_s`` (``None``: forever)."""
+    deadline = None if timeout_s is None else time.monotonic() + timeout_s
+    if _WINDOWS:
+        import msvcrt
+
+        # LK_LOCK gives up with OSError after about 10 s, so poll the non-blocking form instead.
+        while True:
+            handle.seek(0)
+            try:
+                msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+                break
+            except OSError as exc:
+                if exc.errno not in {errno.EACCES, errno.EDEADLK}:
+                    raise
+                _lock_timed_out(deadline, handle.name)
+        try:
+            yield
+        finally:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+
+        if deadline is None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        else:
+            while True:
+                try:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    _lock_timed_out(deadline, handle.name)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+class FileIdAllocator:
+    """Epoch-millisecond blocks shared by every process using the same local state file.
+
+    Each reservation locks ``path`` exclusively, reads the last issued ID, and
+    writes the new high-water mark before unlocking. Use a local disk; network
+    file systems may not honour the lock. A reservation waits for the lock as
+    long as another process holds it; with ``lock_timeout_s`` it raises
+    ``TimeoutError`` after that many seconds instead. The wait is the same on
+    Windows and POSIX.
+    """
+
+    def __init__(self, path: Path, *, lock_timeout_s: float | None = None) -> None:
+        if lock_timeout_s is not None and lock_timeout_s < 0:
+            raise ValueError("lock_timeout_s must be non-negative")
+        self.path = Path(path)
+        self.lock_timeout_s = lock_timeout_s
+        self._lock = threading.Lock()
+
+    def reserve(self, count: int = 1) -> int:
+        if count <= 0:
+            raise ValueError("count must be positive")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.path, "a+b") as handle, _exclusive(handle, self.lock_timeout_s):
+            handle.seek(0)
+            text = handle.read().decode("ascii", "replace").strip()
+            try:
+                last = int(text) if text else 0
+            except ValueError as exc:
+                raise ValueError(f"corrupt ID allocator state in {self.path}") from exc
+            first = max(_epoch_ms(), last + 1)
+            handle.seek(0)
+            handle.truncate()
+            handle.write(str(first + count - 1).encode("ascii"))
+            handle.flush()
+            os.fsync(handle.fileno())
+            return first
@@ -1,9 +1,17 @@
 """Pure helpers for mocked industrial I/O with fail-closed write gating."""
 from __future__ import annotations
 
-from collections.abc import Callable
+import json
+import threading
+import time
+import uuid
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from pathlib import Path
 from typing import Any
 
+FIELD_KINDS = ("uint", "int", "bool")
+
 
 def decode_u16_be(data: bytes, offset: int) -> int:
     if offset < 0 or offset + 2 > len(data):
@@ -17,6 +25,114 @@ def extract_bits(value: int, *, bit_offset: int, bit_length: int) -> int:
     return (value >> bit_offset) & ((1 << bit_length) - 1)
 
 
+@dataclass(frozen=True, slots=True)
+class BitField:
+    """One process-data item.
+
+    ``bit_offset`` counts from the least significant bit of the big-endian
+    buffer, as in IODD.
+    """
+
+    name: str
+    bit_offset: int
+    bit_length: int = 1
+    kind: str = "uint"
+
+
+def _field_dtype(field: BitField) -> str:
+    if field.kind == "bool":
+        return "?"
+    width = next(size for size in (1, 2, 4, 8) if field.bit_length <= size * 8)
+    return f"{'u' if field.kind == 'uint' else 'i'}{width}"
+
+
+class FieldMap:
+    """A fixed-length process-data layout compiled once into byte slices, shifts, and masks.
+
+    :meth:`decode` turns many buffers into one NumPy structured array and
+    :meth:`decode_one` returns a dict for a single buffer. Every buffer must be
+    exactly ``length`` bytes.
+    """
+
+    def __init__(self, fields: Iterable[BitField], length: int) -> None:
+        self.fields = tuple(fields)
+        self.length = length
+        if length <= 0 or not self.fields:
+            raise ValueError("field map needs a positive length and at least one field")
+        names = [field.name for field in self.fields]
+        if len(set(names)) != len(names) or not all(name.isidentifier() for name in names):
+            raise ValueError("field names must be unique identifiers")
+        self._plan = []
+        for field in self.fields:
+            if field.kind not in FIELD_KINDS:
+                raise ValueError(f"{field.name}: kind must be one of {', '.join(FIELD_KINDS)}")
+            if field.kind == "bool" and field.bit_length != 1:
+                raise ValueError(f"{field.name}: bool fields are one bit")
+            if field.bit_offset < 0 or not 0 < field.bit_length <= 64:
+                raise ValueError(f"{field.name}: bit range must be non-negative and at most 64 bits")
+            if field.bit_offset + field.bit_length > 8 * length:
+                raise ValueError(f"{field.name}: bit range exceeds the {length}-byte buffer")
+            shift = field.bit_offset % 8
+            stop = length - field.bit_offset // 8
+            start = length - (field.bit_offset + field.bit_length + 7) // 8
+            if stop - start > 8:
+                raise ValueError(f"{field.name}: unaligned field spans more than 8 bytes")
+            self._plan.append((field, start, stop, shift, (1 << field.bit_length) - 1))
+        self.dtype_spec = [(field.name, _field_dtype(field)) for field in self.fields]
+
+    def decode_one(self, data: bytes) -> dict[str, int | bool]:
+        if len(data) != self.length:
+            raise ValueError(f"device buffer has {len(data)} bytes, expected {self.length}")
+        whole = int.from_bytes(data, "big", signed=False)
+        values: dict[str, int | bool] = {}
+        for field, _, _, _, mask in self._plan:
+            value = (whole >> field.bit_offset) & mask
+            if field.kind == "int" and value >> (field.bit_length - 1):
+                value -= 1 << field.bit_length
+            values[field.name] = bool(value) if field.kind == "bool" else value
+        return values
+
+    def _rows(self, buffers: Any) -> Any:
+        import numpy as np
+
+        if isinstance(buffers, (bytes, bytearray, memoryview)):
+            raw = np.frombuffer(buffers, dtype=np.uint8)
+            if raw.size % self.length:
+                raise ValueError(f"device data has {raw.size} bytes, not a multiple of {self.length}")
+            return raw.reshape(-1, self.length)
+        if isinstance(buffers, np.ndarray):
+            if buffers.dtype != np.uint8 or buffers.ndim != 2 or buffers.shape[1] != self.length:
+                raise ValueError(f"device array must be uint8 with shape (n, {self.length})")
+            return buffers
+        items = list(buffers)
+        for index, item in enumerate(items):
+            if len(item) != self.length:
+                raise ValueError(f"device buffer {index} has {len(item)} bytes, expected {self.length}")
+        return np.frombuffer(b"".join(items), dtype=np.uint8).reshape(-1, self.length)
+
+    def decode(self, buffers: Any) -> Any:
+        """Decode concatenated bytes, a sequence of buffers, or a ``(n, length)`` uint8 array."""
+        import numpy as np
+
+        rows = self._rows(buffers)
+        out = np.empty(len(rows), dtype=self.dtype_spec)
+        for field, start, stop, shift, mask in self._plan:
+            span = stop - start
+            if shift == 0 and field.bit_length == 8 * span and span in (1, 2, 4, 8):
+                kind = "i" if field.kind == "int" else "u"
+                out[field.name] = np.ascontiguousarray(rows[:, start:stop]).view(f">{kind}{span}")[:, 0]
+                continue
+            value = np.zeros(len(rows), dtype=np.uint64)
+            for column in range(start, stop):
+                value = (value << np.uint64(8)) | rows[:, column]
+            value = (value >> np.uint64(shift)) & np.uint64(mask)
+            if field.kind == "int":
+                sign = np.int64(1 << (field.bit_length - 1))
+                value = (value.astype(np.int64) ^ sign) - sign
+            out[field.name] = value
+        return out
+
+
 def guarded_write(
     writer: Callable[..., Any],
     *args: Any,
@@ -30,3 +146,205 @@ def guarded_write(
     if not approved:
         raise PermissionError("industrial write requires explicit approval")
     return {"executed": True, "result": writer(*args, **kwargs)}
+
+
+@dataclass(frozen=True, slots=True)
+class PlannedWrite:
+    """One merged block write; ``mask`` marks the bits the batch sets (0xFF for whole bytes)."""
+
+    offset: int
+    data: bytes
+    mask: bytes
+
+    @property
+    def partial(self) -> bool:
+        return any(byte != 0xFF for byte in self.mask)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "offset": self.offset,
+            "length": len(self.data),
+            "data": self.data.hex(),
+            "mask": self.mask.hex(),
+        }
+
+
+class AuditLog:
+    """Append-only record of planned and executed write batches.
+
+    Entries are optionally mirrored to a JSON Lines file.
+    """
+
+    def __init__(self, path: Path | None = None) -> None:
+        self.path = None if path is None else Path(path)
+        self._records: list[dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def append(self, record: dict[str, Any]) -> None:
+        entry = {"time": time.time(), **record}
+        with self._lock:
+            self._records.append(entry)
+            if self.path is not None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with self.path.open("a", encoding="utf-8") as handle:
+                    line = json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+                    handle.write(line + "\n")
+
+    @property
+    def records(self) -> tuple[dict[str, Any], ...]:
+        with self._lock:
+            return tuple(dict(record) for record in self._records)
+
+
+class WriteBatch:
+    """Collect register and bit writes, merge them into block writes, and gate the whole batch.
+
+    ``writer(offset, data)`` writes a byte block. Bit writes that do not cover a
+    whole byte are applied read-modify-write through ``reader(offset, length)``,
+    which is only called when the batch executes. Later writes to the same bits
+    win. :meth:`commit` goes through ``guarded_write`` once for the whole batch.
+    """
+
+    def __init__(
+        self,
+        writer: Callable[[int, bytes], Any],
+        *,
+        reader: Callable[[int, int], bytes] | None = None,
+        max_gap: int = 0,
+        max_block: int = 256,
+        audit: AuditLog | None = None,
+    ) -> None:
+        if max_gap < 0 or max_block <= 0:
+            raise ValueError("max_gap must be non-negative and max_block positive")
+        if max_gap and reader is None:
+            raise ValueError("merging across gaps needs a reader to preserve the gap bytes")
+        self.writer = writer
+        self.reader = reader
+        self.max_gap = max_gap
+        self.max_block = max_block
+        self.audit = audit if audit is not None else AuditLog()
+        self._bytes: dict[int, tuple[int, int]] = {}
+        self._requests: list[dict[str, Any]] = []
+
+    def _set(self, offset: int, value: int, mask: int) -> None:
+        old_value, old_mask = self._bytes.get(offset, (0, 0))
+        self._bytes[offset] = ((old_value & ~mask) | (value & mask), old_mask | mask)
+
+    def write_bytes(self, offset: int, data: bytes) -> "WriteBatch":
+        if offset < 0 or not data:
+            raise ValueError("offset must be non-negative and data non-empty")
+        for index, byte in enumerate(bytes(data)):
+            self._set(offset + index, byte, 0xFF)
+        self._requests.append({"kind": "bytes", "offset": offset, "data": bytes(data).hex()})
+        return self
+
+    def write_u16_be(self, offset: int, value: int) -> "WriteBatch":
+        if not 0 <= value <= 0xFFFF:
+            raise ValueError("u16 value out of range")
+        self.write_bytes(offset, value.to_bytes(2, "big"))
+        self._requests[-1].update(kind="u16", value=value)
+        return self
+
+    def write_bit(self, offset: int, bit: int, value: bool) -> "WriteBatch":
+        if offset < 0 or not 0 <= bit <= 7 or not isinstance(value, bool):
+            raise ValueError("bit write needs offset >= 0, bit 0-7, and a bool value")
+        self._set(offset, int(value) << bit, 1 << bit)
+        self._requests.append({"kind": "bit", "offset": offset, "bit": bit, "value": value})
+        return self
+
+    def __len__(self) -> int:
+        return len(self._requests)
+
+    def plan(self) -> list[PlannedWrite]:
+        """Merge pending writes into ascending block writes; gap bytes get a zero mask."""
+        blocks: list[PlannedWrite] = []
+        start = end = -1
+        data, mask = bytearray(), bytearray()
+        for offset in sorted(self._bytes):
+            value, bits = self._bytes[offset]
+            if data and offset - end <= self.max_gap and offset + 1 - start <= self.max_block:
+                gap = offset - end
+                data += bytes(gap) + bytes([value])
+                mask += bytes(gap) + bytes([bits])
+            else:
+                if data:
+                    blocks.append(PlannedWrite(start, bytes(data), bytes(mask)))
+                start, data, mask = offset, bytearray([value]), bytearray([bits])
+            end = offset + 1
+        if data:
+            blocks.append(PlannedWrite(start, bytes(data), bytes(mask)))
+        if self.reader is None and any(block.partial for block in blocks):
+            raise ValueError("partial-byte bit writes need a reader for read-modify-write")
+        return blocks
+
+    def _execute(self, batch: str, plan: list[PlannedWrite]) -> list[dict[str, Any]]:
+        done: list[dict[str, Any]] = []
+        try:
+            for block in plan:
+                started = time.perf_counter()
+                data = block.data
+                if block.partial:
+                    current = bytes(self.reader(block.offset, len(data)))  # type: ignore[misc]
+                    if len(current) != len(data):
+                        raise ValueError(
+                            f"device buffer has {len(current)} bytes, expected {len(data)}"
+                        )
+                    merged = (
+                        (old & ~bits & 0xFF) | (new & bits)
+                        for old, new, bits in zip(current, data, block.mask)
+                    )
+                    data = bytes(merged)
+                self.writer(block.offset, data)
+                seconds = time.perf_counter() - started
+                done.append({"offset": block.offset, "data": data.hex(), "seconds": seconds})
+        except Exception as exc:
+            self.audit.append(
+                {
+                    "batch": batch,
+                    "event": "failed",
+                    "executed": done,
+                    "error": f"{type(exc).__name__}: {exc}",
+                }
+            )
+            raise
+        return done
+
+    def commit(self, *, dry_run: bool = True, approved: bool = False) -> dict[str, Any]:
+        """Plan, audit, and (only with ``dry_run=False`` and ``approved=True``) write the batch.
+
+        Pending writes are kept after a dry run, a rejection, or a failure, and
+        cleared only after a successful write.
+        """
+        plan = self.plan()
+        batch = uuid.uuid4().hex
+        requests = [dict(request) for request in self._requests]
+        self.audit.append(
+            {
+                "batch": batch,
+                "event": "planned",
+                "requests": requests,
+                "plan": [block.as_dict() for block in plan],
+            }
+        )
+        started = time.perf_counter()
+        try:
+            outcome = guarded_write(self._execute, batch, plan, dry_run=dry_run, approved=approved)
+        except PermissionError:
+            self.audit.append({"batch": batch, "event": "rejected"})
+            raise
+        if not outcome["executed"]:
+            self.audit.append({"batch": batch, "event": "dry_run"})
+        else:
+            seconds = time.perf_counter() - started
+            self.audit.append(
+                {
+                    "batch": batch,
+                    "event": "executed",
+                    "executed": outcome["result"],
+                    "seconds": seconds,
+                }
+            )
+            self._bytes.clear()
+            self._requests.clear()
+        planned = [block.as_dict() for block in plan]
+        return {**outcome, "batch": batch, "requests": len(requests), "plan": planned}
@@ -0,0 +1,240 @@
+"""Asyncio polling of read-only industrial I/O sources with coalesced block reads.
+
+Each device is an injected ``reader(offset, length) -> bytes`` callable (sync
+readers such as Snap7 ``db_read`` run in a worker thread; coroutine readers are
+awaited). Regions due in the same tick are merged into as few block reads as
+the gap and block limits allow, decoded with an optional :class:`FieldMap`, and
+published to bounded subscriber queues. Reads of one device never overlap: a
+slow device skips the ticks it missed instead of queueing them. The poller has
+no write path of its own; :meth:`IoPoller.write` goes through ``guarded_write``.
+"""
+from __future__ import annotations
+
+import asyncio
+import inspect
+import math
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from industrial_io_guard import FieldMap, guarded_write
+
+
+@dataclass(slots=True)
+class Region:
+    """A byte range of one device polled every ``period_s`` seconds."""
+
+    name: str
+    offset: int
+    length: int
+    period_s: float
+    field_map: FieldMap | None = None
+    next_due: float = 0.0
+
+
+@dataclass(slots=True)
+class Sample:
+    device: str
+    region: str
+    timestamp: float
+    data: bytes | None = None
+    values: dict[str, Any] | None = None
+    error: str | None = None
+
+
+@dataclass(slots=True)
+class _Device:
+    name: str
+    reader: Callable[[int, int], Any]
+    max_gap: int
+    max_block: int
+    timeout_s: float
+    regions: list[Region] = field(default_factory=list)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    counters: dict[str, int] = field(
+        default_factory=lambda: {"reads": 0, "region_reads": 0, "errors": 0, "overruns": 0, "timeouts": 0}
+    )
+    pending: asyncio.Future[Any] | None = None
+
+
+def coalesce(regions: list[Region], *, max_gap: int = 0, max_block: int = 256) -> list[tuple[int, int, list[Region]]]:
+    """Group regions into ``(offset, length, members)`` blocks.
+
+    Regions are merged while the hole between them is at most ``max_gap`` bytes
+    and the block stays within ``max_block`` bytes; overlapping regions share reads.
+    """
+    blocks: list[tuple[int, int, list[Region]]] = []
+    for region in sorted(regions, key=lambda item: (item.offset, item.length)):
+        if blocks:
+            start, length, members = blocks[-1]
+            end = max(start + length, region.offset + region.length)
+            if region.offset <= start + length + max_gap and end - start <= max_block:
+                blocks[-1] = (start, end - start, members + [region])
+                continue
+        blocks.append((region.offset, region.length, [region]))
+    return blocks
+
+
+class IoPoller:
+    """Poll registered device regions at their own rates and fan samples out to subscribers.
+
+    Use ``async with IoPoller() as poller`` after adding devices and regions, or
+    call :meth:`start` and :meth:`stop`. Subscriber queues drop their oldest
+    sample when full so a slow consumer never stalls polling.
+    """
+
+    def __init__(self) -> None:
+        self._devices: dict[str, _Device] = {}
+        self._queues: list[asyncio.Queue[Sample]] = []
+        self._tasks: list[asyncio.Task[None]] = []
+        self._running = False
+        self.dropped = 0
+
+    def add_device(
+        self,
+        name: str,
+        reader: Callable[[int, int], Any],
+        *,
+        max_gap: int = 0,
+        max_block: int = 256,
+        timeout_s: float = 1.0,
+    ) -> None:
+        if name in self._devices:
+            raise ValueError(f"device already registered: {name}")
+        if max_gap < 0 or max_block <= 0 or timeout_s <= 0:
+            raise ValueError("max_gap must be non-negative and max_block/timeout_s positive")
+        self._devices[name] = _Device(name, reader, max_gap, max_block, timeout_s)
+
+    def add_region(
+        self,
+        device: str,
+        name: str,
+        offset: int,
+        length: int,
+        period_s: float,
+        *,
+        field_map: FieldMap | None = None,
+    ) -> None:
+        target = self._devices.get(device)
+        if target is None:
+            raise KeyError(f"unknown device: {device}")
+        if any(region.name == name for region in target.regions):
+            raise ValueError(f"{device}: region already registered: {name}")
+        if offset < 0 or length <= 0 or length > target.max_block or period_s <= 0:
+            raise ValueError("region needs offset >= 0, 0 < length <= max_block, and a positive period")
+        if field_map is not None and field_map.length != length:
+            raise ValueError(f"{name}: field map expects {field_map.length} bytes, region has {length}")
+        target.regions.append(Region(name, offset, length, period_s, field_map))
+
+    def subscribe(self, maxsize: int = 1024) -> asyncio.Queue[Sample]:
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        queue: asyncio.Queue[Sample] = asyncio.Queue(maxsize)
+        self._queues.append(queue)
+        return queue
+
+    def _publish(self, sample: Sample) -> None:
+        for queue in self._queues:
+            if queue.full():
+                queue.get_nowait()
+                self.dropped += 1
+            queue.put_nowait(sample)
+
+    async def _read(self, device: _Device, offset: int, length: int) -> bytes:
+        if device.pending is not None and not device.pending.done():
+            # A timed-out threaded read may still be running; never start a second one.
+            await asyncio.wait_for(asyncio.shield(device.pending), device.timeout_s)
+        if inspect.iscoroutinefunction(device.reader):
+            device.pending = asyncio.ensure_future(device.reader(offset, length))
+        else:
+            device.pending = asyncio.ensure_future(asyncio.to_thread(device.reader, offset, length))
+        data = await asyncio.wait_for(asyncio.shield(device.pending), device.timeout_s)
+        data = bytes(data)
+        if len(data) != length:
+            raise ValueError(f"device buffer has {len(data)} bytes, expected {length}")
+        return data
+
+    async def _poll(self, device: _Device, due: list[Region], loop: asyncio.AbstractEventLoop) -> None:
+        async with device.lock:
+            for offset, length, members in coalesce(due, max_gap=device.max_gap, max_block=device.max_block):
+                device.counters["reads"] += 1
+                device.counters["region_reads"] += len(members)
+                try:
+                    block = await self._read(device, offset, length)
+                    error = None
+                except Exception as exc:  # noqa: BLE001 - reported to subscribers, polling continues
+                    device.counters["errors"] += 1
+                    device.counters["timeouts"] += isinstance(exc, asyncio.TimeoutError)
+                    block, error = None, f"{type(exc).__name__}: {exc}"
+                timestamp = loop.time()
+                for region in members:
+                    if block is None:
+                        self._publish(Sample(device.name, region.name, timestamp, error=error))
+                        continue
+                    data = block[region.offset - offset : region.offset - offset + region.length]
+                    values = region.field_map.decode_one(data) if region.field_map is not None else None
+                    self._publish(Sample(device.name, region.name, timestamp, data, values))
+
+    async def _run_device(self, device: _Device) -> None:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for region in device.regions:
+            region.next_due = started
+        while self._running:
+            now = loop.time()
+            due = [region for region in device.regions if region.next_due <= now]
+            if due:
+                await self._poll(device, due, loop)
+                now = loop.time()
+                for region in due:
+                    missed = max(0, math.floor((now - region.next_due) / region.period_s))
+                    device.counters["overruns"] += missed
+                    region.next_due += (missed + 1) * region.period_s
+            wake = min(region.next_due for region in device.regions)
+            await asyncio.sleep(max(0.0, wake - loop.time()))
+
+    def start(self) -> None:
+        if self._tasks:
+            raise RuntimeError("poller is already running")
+        self._running = True
+        self._tasks = [
+            asyncio.ensure_future(self._run_device(device)) for device in self._devices.values() if device.regions
+        ]
+
+    async def stop(self) -> None:
+        # wait_for may swallow a cancel that races a completed read, so loops also check the flag.
+        self._running = False
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def __aenter__(self) -> "IoPoller":
+        self.start()
+        return self
+
+    async def __aexit__(self, *_exc: Any) -> None:
+        await self.stop()
+
+    async def write(
+        self,
+        device: str,
+        writer: Callable[..., Any],
+        *args: Any,
+        dry_run: bool = True,
+        approved: bool = False,
+        **kwargs: Any,
+    ) -> dict[str, Any]:
+        """Run ``guarded_write`` in a worker thread between this device's polls; dry-run by default."""
+        target = self._devices.get(device)
+        if target is None:
+            raise KeyError(f"unknown device: {device}")
+        async with target.lock:
+            return await asyncio.to_thread(guarded_write, writer, *args, dry_run=dry_run, approved=approved, **kwargs)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "devices": {name: dict(device.counters) for name, device in self._devices.items()},
+            "subscribers": len(self._queues),
+            "dropped": self.dropped,
+        }
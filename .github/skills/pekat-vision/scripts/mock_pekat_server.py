@@ -0,0 +1,264 @@
+"""Local stand-in PEKAT REST server for offline client, load, and latency tests.
+
+It binds to localhost only and never forwards requests to a real PEKAT instance.
+Responses follow the shapes parsed by ``rest_api_client_demo.parse_response``:
+a JSON context, or image bytes with a ``ContextBase64utf`` header, or image bytes
+followed by the JSON context with an ``ImageLen`` header (``context_in_body``).
+"""
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import random
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+ANALYZE_ENDPOINTS = {"/analyze_image", "/analyze_raw_image"}
+RESPONSE_TYPES = {"context", "image", "annotated_image", "heatmap"}
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+@dataclass(slots=True)
+class MockBehavior:
+    """Injected server behavior; attributes may be changed while the server runs."""
+
+    latency_s: float = 0.0
+    jitter_s: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 500
+    image_size: int = 1024
+    context_padding: int = 0
+    chunked: bool = False
+    chunk_size: int = 16384
+    complete_time: bool = False
+
+    def validate(self) -> None:
+        if self.latency_s < 0 or self.jitter_s < 0 or self.image_size < len(PNG_SIGNATURE):
+            raise ValueError("latency/jitter must be non-negative and image_size must fit a PNG signature")
+        if not 0.0 <= self.error_rate <= 1.0 or not 400 <= self.error_status <= 599:
+            raise ValueError("error_rate must be within [0, 1] and error_status an HTTP error")
+        if self.context_padding < 0 or self.chunk_size <= 0:
+            raise ValueError("context_padding must be non-negative and chunk_size positive")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: "_Server"
+
+    def setup(self) -> None:
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 - stdlib signature
+        return
+
+    def do_GET(self) -> None:
+        if urlsplit(self.path).path != "/ping":
+            self._send(404, b"{}")
+            return
+        with self.server.lock:
+            self.server.pings += 1
+        self._send(200, b"pong", content_type="text/plain")
+
+    def do_POST(self) -> None:
+        url = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length", "0"))
+        body = self.rfile.read(length)
+        if url.path not in ANALYZE_ENDPOINTS:
+            self._send(404, b"{}")
+            return
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        behavior = self.server.behavior
+        with self.server.lock:
+            self.server.requests += 1
+            delay = behavior.latency_s + self.server.random.uniform(-1.0, 1.0) * behavior.jitter_s
+            failed = self.server.random.random() < behavior.error_rate
+            if failed:
+                self.server.injected_errors += 1
+        if delay > 0:
+            time.sleep(delay)
+        if failed:
+            self._send(behavior.error_status, b'{"error": "injected"}')
+            return
+        response_type = query.get("response_type", "context")
+        if response_type not in RESPONSE_TYPES:
+            self._send(400, b'{"error": "unsupported response_type"}')
+            return
+        if url.path == "/analyze_raw_image" and not {"height", "width"} <= set(query):
+            self._send(400, b'{"error": "height and width are required"}')
+            return
+        context: dict[str, Any] = {
+            "result": True,
+            "endpoint": url.path.lstrip("/"),
+            "body_bytes": len(body),
+            "query": query,
+        }
+        if behavior.complete_time:
+            context["completeTime"] = max(delay, 0.0)
+        if behavior.context_padding:
+            context["padding"] = "x" * behavior.context_padding
+        encoded = json.dumps(context).encode("utf-8")
+        if response_type == "context":
+            self._send(200, encoded)
+            return
+        image = PNG_SIGNATURE + bytes(behavior.image_size - len(PNG_SIGNATURE))
+        if query.get("context_in_body") == "true":
+            headers = {"ImageLen": str(len(image))}
+            self._send(200, image + encoded, content_type="application/octet-stream", headers=headers)
+            return
+        headers = {"ContextBase64utf": base64.b64encode(encoded).decode("ascii")}
+        self._send(200, image, content_type="image/png", headers=headers)
+
+    def _send(
+        self,
+        status: int,
+        body: bytes,
+        *,
+        content_type: str = "application/json",
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        chunked = self.server.behavior.chunked
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+        else:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not chunked:
+            self.wfile.write(body)
+            return
+        view = memoryview(body)
+        step = self.server.behavior.chunk_size
+        for start in range(0, len(view), step):
+            part = view[start : start + step]
+            self.wfile.write(f"{len(part):x}\r\n".encode("ascii"))
+            self.wfile.write(part)
+            self.wfile.write(b"\r\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], behavior: MockBehavior, seed: int | None) -> None:
+        super().__init__(address, _Handler)
+        self.behavior = behavior
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+        self.pings = 0
+        self.injected_errors = 0
+
+    def handle_error(self, request: Any, client_address: Any) -> None:
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class MockPekatServer:
+    """Serve PEKAT-shaped responses on localhost from a background thread.
+
+    Keyword arguments populate :class:`MockBehavior`; ``seed`` makes injected
+    jitter and errors reproducible.
+    """
+
+    def __init__(self, port: int = 0, *, seed: int | None = None, **behavior: Any) -> None:
+        config = MockBehavior(**behavior)
+        config.validate()
+        self._server = _Server(("127.0.0.1", port), config, seed)
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+
+    @property
+    def host(self) -> str:
+        return "127.0.0.1"
+
+    @property
+    def port(self) -> int:
+        return int(self._server.server_address[1])
+
+    @property
+    def behavior(self) -> MockBehavior:
+        return self._server.behavior
+
+    @property
+    def connections(self) -> int:
+        return self._server.connections
+
+    @property
+    def requests(self) -> int:
+        return self._server.requests
+
+    def stats(self) -> dict[str, Any]:
+        with self._server.lock:
+            return {
+                "connections": self._server.connections,
+                "requests": self._server.requests,
+                "pings": self._server.pings,
+                "injected_errors": self._server.injected_errors,
+                "behavior": asdict(self._server.behavior),
+            }
+
+    def start(self) -> "MockPekatServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join(timeout=5.0)
+
+    def __enter__(self) -> "MockPekatServer":
+        return self.start()
+
+    def __exit__(self, *_exc: Any) -> None:
+        self.stop()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve a localhost-only mock PEKAT REST API")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--image-size", type=int, default=1024, help="Response image bytes for image response types")
+    parser.add_argument("--context-padding", type=int, default=0, help="Extra bytes added to every context")
+    parser.add_argument("--chunked", action="store_true", help="Send Transfer-Encoding: chunked bodies")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+    server = MockPekatServer(
+        args.port,
+        seed=args.seed,
+        latency_s=args.latency_ms / 1000.0,
+        jitter_s=args.jitter_ms / 1000.0,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        image_size=args.image_size,
+        context_padding=args.context_padding,
+        chunked=args.chunked,
+    )
+    print(f"mock PEKAT listening on http://{server.host}:{server.port}", flush=True)
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,236 @@
+"""Index an archive of exported .pmodule/.ptool files for fast lookup.
+
+The SQLite index stores label, version, form keys, imported modules, and the
+upstream reads and the writes that :func:`context_dataflow.analyze_source`
+finds in ``sourceCode``. Re-indexing only re-reads files whose mtime or size
+changed. Exports are opened read-only.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from context_dataflow import ModuleFlow, analyze_source
+from generate_code_module import ModuleSpec, ModuleSpecError
+
+EXPORT_SUFFIXES = {".pmodule", ".ptool"}
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS modules (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    label TEXT,
+    version TEXT,
+    module_id INTEGER,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS form_keys (
+    module INTEGER NOT NULL REFERENCES modules(id) ON DELETE CASCADE,
+    form_key TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS imports (
+    module INTEGER NOT NULL REFERENCES modules(id) ON DELETE CASCADE,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS context_keys (
+    module INTEGER NOT NULL REFERENCES modules(id) ON DELETE CASCADE,
+    key TEXT NOT NULL,
+    access TEXT NOT NULL CHECK (access IN ('read', 'write'))
+);
+CREATE INDEX IF NOT EXISTS form_keys_key ON form_keys(form_key, module);
+CREATE INDEX IF NOT EXISTS imports_name ON imports(name, module);
+CREATE INDEX IF NOT EXISTS context_keys_key ON context_keys(key, access, module);
+CREATE INDEX IF NOT EXISTS modules_label ON modules(label);
+"""
+
+
+def _describe(path: Path | str) -> dict[str, Any]:
+    """Extract indexable fields; malformed exports are kept with an ``error`` message."""
+    row: dict[str, Any] = {"label": None, "version": None, "module_id": None, "error": None}
+    row.update(form_keys=set(), facts=ModuleFlow(str(path)))
+    try:
+        payload = json.loads(Path(path).read_text(encoding="utf-8-sig"))
+    except (OSError, ValueError) as exc:
+        row["error"] = f"{type(exc).__name__}: {exc}"
+        return row
+    module = payload.get("module") if isinstance(payload, dict) else None
+    if not isinstance(module, dict):
+        row["error"] = "export has no module object"
+        return row
+    row["label"] = module.get("label") if isinstance(module.get("label"), str) else None
+    row["version"] = payload.get("version") if isinstance(payload.get("version"), str) else None
+    module_id = module.get("id")
+    row["module_id"] = module_id if isinstance(module_id, int) and not isinstance(module_id, bool) else None
+    form = module.get("form") if isinstance(module.get("form"), list) else []
+    row["form_keys"] = {item["formKey"] for item in form if isinstance(item, dict) and isinstance(item.get("formKey"), str)}
+    source = module.get("sourceCode")
+    if isinstance(source, str):
+        # analyze_source seeds the entrypoint cache, so validation below skips a second parse.
+        row["facts"] = analyze_source(source, str(path))
+    try:
+        ModuleSpec.from_export(payload)
+    except ModuleSpecError as exc:
+        row["error"] = str(exc)
+    return row
+
+
+class ModuleIndex:
+    """SQLite index over exported Code modules; use as a context manager or call :meth:`close`."""
+
+    def __init__(self, database: Path | str) -> None:
+        self._db = sqlite3.connect(str(database))
+        self._db.execute("PRAGMA foreign_keys = ON")
+        self._db.executescript(_SCHEMA)
+
+    def update(self, roots: list[Path], *, workers: int = 1) -> dict[str, Any]:
+        """Index every export under ``roots``; drop rows for files that disappeared from them.
+
+        Changed files are parsed in a process pool when ``workers`` > 1.
+        """
+        if workers <= 0:
+            raise ValueError("workers must be positive")
+        started = time.perf_counter()
+        counts = {"indexed": 0, "unchanged": 0, "removed": 0, "invalid": 0}
+        seen: set[str] = set()
+        changed: list[tuple[str, int, int]] = []
+        with self._db:
+            known = {path: (mtime, size) for path, mtime, size in self._db.execute("SELECT path, mtime_ns, size FROM modules")}
+            for root in roots:
+                root = Path(root).resolve()
+                candidates = [root] if root.is_file() else root.rglob("*")
+                for path in candidates:
+                    if path.suffix.lower() not in EXPORT_SUFFIXES or not path.is_file():
+                        continue
+                    key = path.as_posix()
+                    seen.add(key)
+                    stat = path.stat()
+                    if known.get(key) == (stat.st_mtime_ns, stat.st_size):
+                        counts["unchanged"] += 1
+                        continue
+                    changed.append((key, stat.st_mtime_ns, stat.st_size))
+                prefix = root.as_posix().rstrip("/") + "/"
+                for key in known:
+                    if (key == root.as_posix() or key.startswith(prefix)) and key not in seen:
+                        self._db.execute("DELETE FROM modules WHERE path = ?", (key,))
+                        counts["removed"] += 1
+            paths = [key for key, _, _ in changed]
+            if workers == 1 or len(changed) < 2 * workers:
+                rows = map(_describe, paths)
+                pool = None
+            else:
+                pool = ProcessPoolExecutor(max_workers=workers)
+                rows = pool.map(_describe, paths, chunksize=max(1, len(paths) // (workers * 4)))
+            try:
+                for (key, mtime_ns, size), row in zip(changed, rows):
+                    self._store(key, mtime_ns, size, row)
+                    counts["indexed"] += 1
+                    counts["invalid"] += row["error"] is not None
+            finally:
+                if pool is not None:
+                    pool.shutdown()
+        return {**counts, "seconds": time.perf_counter() - started}
+
+    def _store(self, path: str, mtime_ns: int, size: int, row: dict[str, Any]) -> dict[str, Any]:
+        self._db.execute("DELETE FROM modules WHERE path = ?", (path,))
+        cursor = self._db.execute(
+            "INSERT INTO modules (path, mtime_ns, size, label, version, module_id, error) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (path, mtime_ns, size, row["label"], row["version"], row["module_id"], row["error"]),
+        )
+        rowid = cursor.lastrowid
+        facts: ModuleFlow = row["facts"]
+        self._db.executemany("INSERT INTO form_keys VALUES (?, ?)", [(rowid, key) for key in sorted(row["form_keys"])])
+        self._db.executemany("INSERT INTO imports VALUES (?, ?)", [(rowid, name) for name in sorted(facts.imports)])
+        writes = facts.writes | facts.mutates
+        keys = [(rowid, key, "read") for key in sorted(facts.reads)] + [(rowid, key, "write") for key in sorted(writes)]
+        self._db.executemany("INSERT INTO context_keys VALUES (?, ?, ?)", keys)
+        return row
+
+    def query(
+        self,
+        *,
+        form_key: str | None = None,
+        imports: str | None = None,
+        reads: str | None = None,
+        writes: str | None = None,
+        label: str | None = None,
+        version: str | None = None,
+    ) -> list[dict[str, Any]]:
+        """Return modules matching every given filter.
+
+        ``imports`` also matches submodules (``numpy`` finds ``numpy.linalg``);
+        ``label`` is a case-insensitive substring.
+        """
+        clauses, params = [], []
+        if form_key is not None:
+            clauses.append("EXISTS (SELECT 1 FROM form_keys f WHERE f.module = m.id AND f.form_key = ?)")
+            params.append(form_key)
+        if imports is not None:
+            clauses.append("EXISTS (SELECT 1 FROM imports i WHERE i.module = m.id AND (i.name = ? OR i.name GLOB ?))")
+            params += [imports, imports.replace("[", "[[]").replace("*", "[*]").replace("?", "[?]") + ".*"]
+        for access, key in (("read", reads), ("write", writes)):
+            if key is not None:
+                clauses.append("EXISTS (SELECT 1 FROM context_keys c WHERE c.module = m.id AND c.key = ? AND c.access = ?)")
+                params += [key, access]
+        if label is not None:
+            clauses.append("instr(lower(m.label), lower(?)) > 0")
+            params.append(label)
+        if version is not None:
+            clauses.append("m.version = ?")
+            params.append(version)
+        where = " AND ".join(clauses) or "1"
+        rows = self._db.execute(
+            f"SELECT m.path, m.label, m.version, m.module_id, m.error FROM modules m WHERE {where} ORDER BY m.path",
+            params,
+        )
+        return [dict(zip(("path", "label", "version", "module_id", "error"), row)) for row in rows]
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "ModuleIndex":
+        return self
+
+    def __exit__(self, *_exc: Any) -> None:
+        self.close()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Index and search exported PEKAT Code modules")
+    parser.add_argument("database", type=Path, help="SQLite index file")
+    commands = parser.add_subparsers(dest="command", required=True)
+    index = commands.add_parser("index", help="Add or refresh exports under the given paths")
+    index.add_argument("roots", nargs="+", type=Path)
+    index.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    query = commands.add_parser("query", help="List modules matching all filters")
+    query.add_argument("--form-key")
+    query.add_argument("--imports")
+    query.add_argument("--reads", help="Context key read by sourceCode")
+    query.add_argument("--writes", help="Context key written by sourceCode")
+    query.add_argument("--label")
+    query.add_argument("--version")
+    args = parser.parse_args(argv)
+    with ModuleIndex(args.database) as module_index:
+        if args.command == "index":
+            result: Any = module_index.update(args.roots, workers=args.workers)
+        else:
+            result = module_index.query(
+                form_key=args.form_key,
+                imports=args.imports,
+                reads=args.reads,
+                writes=args.writes,
+                label=args.label,
+                version=args.version,
+            )
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
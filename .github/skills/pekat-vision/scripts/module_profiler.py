@@ -0,0 +1,349 @@
+"""Profile a Code module's ``main`` on synthetic frames before importing it into PEKAT.
+
+Loads ``source_code`` from a ModuleSpec ``.json``, a ``.pmodule``/``.ptool``
+export, or a ``.py`` file and calls ``main(context, form)`` with generated
+``image`` and ``detectedRectangles``. Reports the latency distribution,
+per-call allocation peaks and retained growth (tracemalloc), and the cProfile
+hotspots, and fails when a budget is exceeded. The module code runs in this
+process: only profile sources you would run locally.
+"""
+from __future__ import annotations
+
+import argparse
+import cProfile
+import json
+import linecache
+import math
+import pstats
+import time
+import tracemalloc
+import types
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from generate_code_module import ENTRYPOINT_CACHE, ModuleSpec, ModuleSpecError, load_export
+
+
+@dataclass(slots=True)
+class FrameProfile:
+    """Synthetic Context shape: image size/dtype and a per-frame rectangle count range."""
+
+    height: int = 2048
+    width: int = 2448
+    channels: int = 3
+    dtype: str = "uint8"
+    min_rectangles: int = 0
+    max_rectangles: int = 10
+    labels: tuple[str, ...] = ("part",)
+
+    def validate(self) -> None:
+        if self.height <= 0 or self.width <= 0 or self.channels < 0:
+            raise ValueError("height and width must be positive and channels non-negative")
+        if not 0 <= self.min_rectangles <= self.max_rectangles:
+            raise ValueError("rectangle counts must satisfy 0 <= min <= max")
+        if not self.labels:
+            raise ValueError("at least one label is required")
+        np.dtype(self.dtype)
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        return (self.height, self.width, *((self.channels,) if self.channels else ()))
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "shape": list(self.shape),
+            "dtype": self.dtype,
+            "rectangles": [self.min_rectangles, self.max_rectangles],
+            "labels": list(self.labels),
+        }
+
+
+def load_module(path: Path) -> tuple[str, str, dict[str, Any]]:
+    """Return ``(label, source_code, form)`` where ``form`` is form defaults overlaid with formValues."""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".py":
+        return path.stem, path.read_text(encoding="utf-8-sig"), {}
+    if suffix in {".pmodule", ".ptool"}:
+        spec = load_export(path)
+    else:
+        spec = ModuleSpec.from_mapping(json.loads(path.read_text(encoding="utf-8-sig")))
+    form = {item.formKey: item.defaultValue for item in spec.form}
+    form.update(spec.form_values)
+    return spec.label, spec.source_code, form
+
+
+def compile_entrypoint(source: str, name: str = "module") -> Callable[..., Any]:
+    """Execute ``source`` in a fresh namespace and return its top-level ``main``.
+
+    Source lines are registered with :mod:`linecache` so tracebacks and
+    profiles point into the module.
+    """
+    info = ENTRYPOINT_CACHE.analyze(source)
+    if info.error_line is not None:
+        raise ModuleSpecError(f"source_code syntax error at line {info.error_line}: {info.error_message}")
+    if info.main_count != 1:
+        raise ModuleSpecError("source_code must define exactly one top-level main function")
+    filename = f"<pekat-module {name}>"
+    linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+    namespace = types.ModuleType(f"pekat_module_{abs(hash(filename))}")
+    namespace.__file__ = filename
+    exec(compile(source, filename, "exec"), namespace.__dict__)
+    entrypoint = namespace.__dict__["main"]
+    if len(info.args) < 2:
+        return lambda context, form: entrypoint(context)
+    return entrypoint
+
+
+def synthetic_frames(profile: FrameProfile, count: int, seed: int = 0) -> list[dict[str, Any]]:
+    """Build ``count`` Context templates; :func:`profile_module` copies the image per call."""
+    profile.validate()
+    rng = np.random.default_rng(seed)
+    shape = profile.shape
+    dtype = np.dtype(profile.dtype)
+    high = 256 if dtype.kind in "ui" and dtype.itemsize == 1 else 4096 if dtype.kind in "ui" else 1
+    frames = []
+    for _ in range(count):
+        image = (rng.random(shape) * high).astype(dtype)
+        rectangles = []
+        for _ in range(int(rng.integers(profile.min_rectangles, profile.max_rectangles + 1))):
+            width = int(rng.integers(8, max(9, profile.width // 4)))
+            height = int(rng.integers(8, max(9, profile.height // 4)))
+            label = profile.labels[int(rng.integers(len(profile.labels)))]
+            confidence = round(float(rng.uniform(0.3, 1.0)), 3)
+            rectangles.append(
+                {
+                    "x": int(rng.integers(0, max(1, profile.width - width))),
+                    "y": int(rng.integers(0, max(1, profile.height - height))),
+                    "width": width,
+                    "height": height,
+                    "classNames": [{"label": label, "confidence": confidence}],
+                }
+            )
+        frames.append({"image": image, "detectedRectangles": rectangles, "result": True})
+    return frames
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+
+def _fresh(frame: dict[str, Any]) -> dict[str, Any]:
+    context = dict(frame)
+    context["image"] = frame["image"].copy()
+    context["detectedRectangles"] = [dict(item) for item in frame["detectedRectangles"]]
+    return context
+
+
+def _site(filename: str, line: int) -> str:
+    return f"{Path(filename).name if not filename.startswith('<') else filename}:{line}"
+
+
+def _hotspots(profiler: cProfile.Profile, top: int, calls: int) -> list[dict[str, Any]]:
+    stats = pstats.Stats(profiler)
+    rows = []
+    for (filename, line, function), (_, ncalls, tottime, cumtime, _) in stats.stats.items():  # type: ignore[attr-defined]
+        rows.append(
+            {
+                "function": function,
+                "location": _site(filename, line),
+                "calls_per_frame": ncalls / calls,
+                "self_ms_per_frame": tottime * 1000 / calls,
+                "cumulative_ms_per_frame": cumtime * 1000 / calls,
+            }
+        )
+    rows.sort(key=lambda row: row["self_ms_per_frame"], reverse=True)
+    return rows[:top]
+
+
+def profile_module(
+    entrypoint: Callable[..., Any],
+    frames: list[dict[str, Any]],
+    *,
+    form: dict[str, Any] | None = None,
+    iterations: int = 100,
+    warmup: int = 5,
+    alloc_iterations: int = 20,
+    profile_iterations: int = 20,
+    top: int = 15,
+) -> dict[str, Any]:
+    """Time, trace, and profile ``entrypoint`` in three separate passes over ``frames``.
+
+    Only the ``main`` call is measured; building each fresh Context is not.
+    Exceptions in measured calls are counted by type and the remaining calls continue.
+    """
+    if not frames or iterations <= 0 or warmup < 0 or alloc_iterations < 0 or profile_iterations < 0:
+        raise ValueError("frames and iterations must be positive and warmup/pass sizes non-negative")
+    values = dict(form or {})
+    errors: Counter[str] = Counter()
+    first_error: list[str] = []
+
+    def call(index: int) -> float:
+        context = _fresh(frames[index % len(frames)])
+        started = time.perf_counter()
+        try:
+            entrypoint(context, dict(values))
+        except Exception as exc:  # noqa: BLE001 - a failing module is a profiling result
+            errors[type(exc).__name__] += 1
+            if not first_error:
+                first_error.append(f"{type(exc).__name__}: {exc}")
+        return time.perf_counter() - started
+
+    for index in range(warmup):
+        call(index)
+    errors.clear()
+    first_error.clear()
+    latencies = sorted(call(index) * 1000 for index in range(iterations))
+
+    peaks: list[int] = []
+    retained_sites: list[dict[str, Any]] = []
+    retained = 0
+    if alloc_iterations:
+        tracemalloc.start()
+        try:
+            harness = (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__))
+            before = tracemalloc.take_snapshot().filter_traces(harness)
+            for index in range(alloc_iterations):
+                context = _fresh(frames[index % len(frames)])
+                current = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                try:
+                    entrypoint(context, dict(values))
+                except Exception:  # noqa: BLE001 - already counted in the timing pass
+                    pass
+                peaks.append(tracemalloc.get_traced_memory()[1] - current)
+                del context
+            growth = tracemalloc.take_snapshot().filter_traces(harness).compare_to(before, "lineno")
+            retained = sum(stat.size_diff for stat in growth)
+            retained_sites = [
+                {"location": _site(stat.traceback[0].filename, stat.traceback[0].lineno), "bytes": stat.size_diff}
+                for stat in growth[:top]
+                if stat.size_diff > 0
+            ]
+        finally:
+            tracemalloc.stop()
+
+    hotspots: list[dict[str, Any]] = []
+    if profile_iterations:
+        profiler = cProfile.Profile()
+        for index in range(profile_iterations):
+            context = _fresh(frames[index % len(frames)])
+            profiler.enable()
+            try:
+                entrypoint(context, dict(values))
+            except Exception:  # noqa: BLE001 - already counted in the timing pass
+                pass
+            finally:
+                profiler.disable()
+        hotspots = _hotspots(profiler, top, profile_iterations)
+
+    return {
+        "iterations": iterations,
+        "warmup": warmup,
+        "errors": dict(sorted(errors.items())),
+        "first_error": first_error[0] if first_error else None,
+        "latency_ms": {
+            "p50": percentile(latencies, 0.50),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+            "max": latencies[-1],
+            "mean": sum(latencies) / len(latencies),
+        },
+        "allocations": {
+            "iterations": alloc_iterations,
+            "peak_bytes_per_call": max(peaks, default=0),
+            "mean_peak_bytes": sum(peaks) / len(peaks) if peaks else 0.0,
+            "retained_bytes": retained,
+            "retained_sites": retained_sites,
+        },
+        "hotspots": hotspots,
+    }
+
+
+def check_budget(
+    report: dict[str, Any],
+    *,
+    p95_ms: float | None = None,
+    p99_ms: float | None = None,
+    peak_mb: float | None = None,
+    retained_kb: float | None = None,
+) -> list[str]:
+    """Return human-readable budget violations; errors raised by ``main`` always count."""
+    violations = []
+    latency, allocations = report["latency_ms"], report["allocations"]
+    if report["errors"]:
+        violations.append(f"main raised {sum(report['errors'].values())} time(s): {report['first_error']}")
+    if p95_ms is not None and latency["p95"] > p95_ms:
+        violations.append(f"p95 {latency['p95']:.3f} ms > {p95_ms} ms")
+    if p99_ms is not None and latency["p99"] > p99_ms:
+        violations.append(f"p99 {latency['p99']:.3f} ms > {p99_ms} ms")
+    if peak_mb is not None and allocations["peak_bytes_per_call"] > peak_mb * (1 << 20):
+        violations.append(f"peak allocation {allocations['peak_bytes_per_call'] / (1 << 20):.2f} MB > {peak_mb} MB")
+    if retained_kb is not None and allocations["retained_bytes"] > retained_kb * 1024:
+        violations.append(f"retained {allocations['retained_bytes'] / 1024:.1f} KB > {retained_kb} KB")
+    return violations
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Profile a Code module main() on synthetic frames")
+    parser.add_argument("module", type=Path, help="ModuleSpec .json, .pmodule/.ptool export, or .py file")
+    parser.add_argument("--height", type=int, default=2048)
+    parser.add_argument("--width", type=int, default=2448)
+    parser.add_argument("--channels", type=int, default=3, help="0 for a 2-D mono image")
+    parser.add_argument("--dtype", default="uint8")
+    parser.add_argument("--rectangles", type=int, nargs=2, default=(0, 10), metavar=("MIN", "MAX"))
+    parser.add_argument("--labels", nargs="+", default=["part"])
+    parser.add_argument("--frames", type=int, default=4, help="Distinct synthetic frames to cycle through")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--form", type=json.loads, default={}, help="JSON object overriding form values")
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--alloc-iterations", type=int, default=20)
+    parser.add_argument("--profile-iterations", type=int, default=20)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-p95-ms", type=float)
+    parser.add_argument("--budget-p99-ms", type=float)
+    parser.add_argument("--budget-peak-mb", type=float)
+    parser.add_argument("--budget-retained-kb", type=float)
+    args = parser.parse_args(argv)
+    if not isinstance(args.form, dict):
+        parser.error("--form must be a JSON object")
+
+    name, source, form = load_module(args.module)
+    form.update(args.form)
+    frame_profile = FrameProfile(
+        args.height, args.width, args.channels, args.dtype, args.rectangles[0], args.rectangles[1], tuple(args.labels)
+    )
+    report = profile_module(
+        compile_entrypoint(source, name),
+        synthetic_frames(frame_profile, args.frames, args.seed),
+        form=form,
+        iterations=args.iterations,
+        warmup=args.warmup,
+        alloc_iterations=args.alloc_iterations,
+        profile_iterations=args.profile_iterations,
+        top=args.top,
+    )
+    violations = check_budget(
+        report,
+        p95_ms=args.budget_p95_ms,
+        p99_ms=args.budget_p99_ms,
+        peak_mb=args.budget_peak_mb,
+        retained_kb=args.budget_retained_kb,
+    )
+    report = {"module": name, "frame": frame_profile.as_dict(), "form": form, **report}
+    report["budget_violations"] = violations
+    print(json.dumps(report, indent=2, ensure_ascii=False, default=str))
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,7 +1,11 @@
 """Projects Manager Simple TCP helper with read-only defaults."""
 from __future__ import annotations
 
+import asyncio
 import socket
+import time
+from collections.abc import Callable, Iterable
+from typing import Any
 
 READ_ONLY_COMMANDS = {"status"}
 MUTATING_COMMANDS = {"start", "stop", "switch"}
@@ -16,6 +20,13 @@ def build_command(action: str, project_path: str) -> str:
     return f"{action}:{project_path}"
 
 
+def _check_mutation(action: str, allow_mutation: bool) -> str:
+    action = action.strip().lower()
+    if action in MUTATING_COMMANDS and not allow_mutation:
+        raise PermissionError(f"{action} requires allow_mutation=True and explicit operator approval")
+    return action
+
+
 def send_command(
     host: str,
     port: int,
@@ -26,9 +37,7 @@ def send_command(
     timeout_s: float = 3.0,
     recv_bytes: int = 256,
 ) -> str:
-    action = action.strip().lower()
-    if action in MUTATING_COMMANDS and not allow_mutation:
-        raise PermissionError(f"{action} requires allow_mutation=True and explicit operator approval")
+    action = _check_mutation(action, allow_mutation)
     command = build_command(action, project_path)
     with socket.create_connection((host, int(port)), timeout=timeout_s) as sock:
         sock.settimeout(timeout_s)
@@ -37,3 +46,197 @@ def send_command(
     if not response:
         raise RuntimeError("Projects Manager returned an empty response")
     return response.decode("utf-8", errors="strict").strip()
+
+
+class AsyncProjectsManagerClient:
+    """Asyncio Projects Manager client with concurrent, cached ``status`` queries.
+
+    Each connection carries one command at a time; ``status_many`` runs up to
+    ``max_connections`` queries in parallel on separate connections (the
+    protocol has no request IDs, so commands are never pipelined on one
+    stream). Concurrent ``status`` calls for the same project share one query.
+
+    Connections are kept alive only when ``terminator`` is set. It must be the
+    byte sequence your Projects Manager ends every reply with; the protocol
+    documents none. Without it there is no keep-alive: every query opens a new
+    connection, and the reply ends when the server closes the connection or
+    sends nothing for ``idle_s`` after the first byte, which adds up to
+    ``idle_s`` of latency. Replies larger than ``max_response`` bytes are
+    rejected instead of truncated. A ``status`` sent on a reused connection the
+    server has since closed is retried once on a new one.
+
+    ``start``/``stop``/``switch`` still require ``allow_mutation=True``, always
+    use a new connection, are never retried, and drop the cached status of that
+    project. ``clock`` only ages the status cache; network deadlines use the
+    event loop clock.
+    """
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 7002,
+        *,
+        max_connections: int = 4,
+        timeout_s: float = 3.0,
+        terminator: bytes | None = None,
+        idle_s: float = 0.05,
+        max_response: int = 64 << 10,
+        status_ttl_s: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_connections <= 0 or timeout_s <= 0 or idle_s <= 0 or max_response <= 0 or status_ttl_s < 0:
+            raise ValueError("limits and timeouts must be positive and status_ttl_s non-negative")
+        self.host = host
+        self.port = int(port)
+        self.timeout_s = timeout_s
+        self.terminator = terminator or None
+        self.idle_s = idle_s
+        self.max_response = max_response
+        self.status_ttl_s = status_ttl_s
+        self._clock = clock
+        self._semaphore = asyncio.Semaphore(max_connections)
+        self._idle: list[tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._cache: dict[str, tuple[float, str]] = {}
+        self._inflight: dict[str, asyncio.Future[str]] = {}
+        self.counters = {
+            "connections_opened": 0,
+            "reused": 0,
+            "commands": 0,
+            "cache_hits": 0,
+            "cache_misses": 0,
+            "coalesced": 0,
+        }
+
+    async def _connect(self, *, fresh: bool = False) -> tuple[asyncio.StreamReader, asyncio.StreamWriter, bool]:
+        while self._idle and not fresh:
+            reader, writer = self._idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                self.counters["reused"] += 1
+                return reader, writer, True
+            writer.close()
+        connection = asyncio.open_connection(self.host, self.port)
+        reader, writer = await asyncio.wait_for(connection, self.timeout_s)
+        self.counters["connections_opened"] += 1
+        return reader, writer, False
+
+    async def _read_reply(self, reader: asyncio.StreamReader) -> tuple[bytes, bool]:
+        """Return ``(reply, reusable)``; raises ``TimeoutError`` when no complete reply arrives in time."""
+        loop = asyncio.get_running_loop()
+        buffer = bytearray()
+        deadline = loop.time() + self.timeout_s
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise TimeoutError("Projects Manager reply timed out")
+            wait = min(remaining, self.idle_s) if buffer and self.terminator is None else remaining
+            try:
+                chunk = await asyncio.wait_for(reader.read(4096), wait)
+            except asyncio.TimeoutError:
+                if buffer and self.terminator is None:
+                    # Without a terminator a late tail is indistinguishable from the next reply.
+                    return bytes(buffer), False
+                continue
+            if not chunk:
+                return bytes(buffer), False
+            buffer += chunk
+            if len(buffer) > self.max_response:
+                raise RuntimeError(f"Projects Manager reply exceeds {self.max_response} bytes")
+            if self.terminator is not None and self.terminator in buffer:
+                reply, _, rest = bytes(buffer).partition(self.terminator)
+                # Bytes after the terminator mean the stream is out of step; do not reuse it.
+                return reply, not rest
+
+    async def _exchange(self, command: str, *, mutating: bool = False) -> str:
+        async with self._semaphore:
+            # A mutating command may already have run when a reply goes missing, so it
+            # gets a new connection and a single attempt; only status retries stale reuse.
+            for _attempt in range(1 if mutating else 2):
+                reader, writer, reused = await self._connect(fresh=mutating)
+                reusable = False
+                try:
+                    writer.write(command.encode("utf-8"))
+                    await writer.drain()
+                    reply, reusable = await self._read_reply(reader)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    if reused:
+                        continue
+                    raise
+                finally:
+                    if reusable and not mutating:
+                        self._idle.append((reader, writer))
+                    else:
+                        writer.close()
+                if not reply:
+                    if reused:
+                        continue  # the server closed an idle keep-alive connection
+                    raise RuntimeError("Projects Manager returned an empty response")
+                self.counters["commands"] += 1
+                return reply.decode("utf-8", errors="strict").strip()
+        raise ConnectionError("Projects Manager closed the connection")
+
+    async def status(self, project_path: str, *, max_age_s: float | None = None) -> str:
+        """Return the project status, from cache when younger than ``max_age_s`` (default ``status_ttl_s``)."""
+        command = build_command("status", project_path)
+        max_age = self.status_ttl_s if max_age_s is None else max_age_s
+        cached = self._cache.get(project_path)
+        if cached is not None and self._clock() - cached[0] < max_age:
+            self.counters["cache_hits"] += 1
+            return cached[1]
+        pending = self._inflight.get(project_path)
+        if pending is not None:
+            self.counters["coalesced"] += 1
+            return await asyncio.shield(pending)
+        self.counters["cache_misses"] += 1
+        task = asyncio.ensure_future(self._fetch_status(project_path, command))
+        self._inflight[project_path] = task
+        task.add_done_callback(lambda done: self._finish_status(project_path, done))
+        return await asyncio.shield(task)
+
+    async def _fetch_status(self, project_path: str, command: str) -> str:
+        status = await self._exchange(command)
+        if self._inflight.get(project_path) is asyncio.current_task():
+            self._cache[project_path] = (self._clock(), status)
+        return status
+
+    def _finish_status(self, project_path: str, task: asyncio.Future[str]) -> None:
+        if self._inflight.get(project_path) is task:
+            del self._inflight[project_path]
+        if not task.cancelled():
+            task.exception()  # retrieved here so an unawaited shared failure is not logged
+
+    async def status_many(self, project_paths: Iterable[str], *, max_age_s: float | None = None) -> dict[str, Any]:
+        """Query every distinct path concurrently; failed queries map to their exception."""
+        paths = list(dict.fromkeys(project_paths))
+        results = await asyncio.gather(*(self.status(path, max_age_s=max_age_s) for path in paths), return_exceptions=True)
+        return dict(zip(paths, results))
+
+    async def command(self, action: str, project_path: str, *, allow_mutation: bool = False) -> str:
+        action = _check_mutation(action, allow_mutation)
+        if action == "status":
+            return await self.status(project_path, max_age_s=0)
+        command = build_command(action, project_path)
+        self._cache.pop(project_path, None)
+        self._inflight.pop(project_path, None)  # a status sent before this command must not be shared after it
+        try:
+            return await self._exchange(command, mutating=True)
+        finally:
+            self._cache.pop(project_path, None)
+
+    def stats(self) -> dict[str, Any]:
+        return {**self.counters, "idle_connections": len(self._idle), "cached_statuses": len(self._cache)}
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for _reader, writer in idle:
+            writer.close()
+        for _reader, writer in idle:
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    async def __aenter__(self) -> "AsyncProjectsManagerClient":
+        return self
+
+    async def __aexit__(self, *_exc: Any) -> None:
+        await self.close()
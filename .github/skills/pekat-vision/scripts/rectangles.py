@@ -0,0 +1,183 @@
+"""Vectorized ``detectedRectangles`` helpers for PEKAT Code modules.
+
+Convert the rectangle dicts once per frame into a NumPy structured array, then
+filter, clip, and crop without per-rectangle Python work. Nothing here writes to
+Context; callers decide what to store and never need to touch ``result``.
+"""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from itertools import chain
+from operator import itemgetter
+from typing import Any
+
+import numpy as np
+
+RECT_DTYPE = np.dtype(
+    [
+        ("index", np.int32),
+        ("label", np.int32),
+        ("x", np.int32),
+        ("y", np.int32),
+        ("width", np.int32),
+        ("height", np.int32),
+        ("confidence", np.float32),
+    ]
+)
+
+
+_GEOMETRY = itemgetter("x", "y", "width", "height")
+_INT32 = np.iinfo(np.int32)
+
+
+def _numeric(values: tuple[Any, ...]) -> bool:
+    try:
+        [float(value) for value in values]
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def to_array(rectangles: Any, labels: list[str] | None = None) -> tuple[np.ndarray, list[str]]:
+    """Return ``(array, labels)`` for a ``detectedRectangles`` list.
+
+    ``array["label"]`` indexes ``labels`` (-1 when unlabelled), ``array["index"]``
+    is the position in the original list, and missing confidence is NaN.
+    Non-dict or non-numeric entries, and entries whose geometry is NaN, infinite,
+    or outside the int32 range, are skipped. Pass ``labels`` to keep ids
+    stable across frames; new names are appended.
+
+    The dicts are read once in Python; do every filter, clip, and crop of the
+    frame on the returned array.
+    """
+    names = [] if labels is None else labels
+    ids = {name: position for position, name in enumerate(names)}
+    source = rectangles if isinstance(rectangles, list) else []
+    positions = [position for position, item in enumerate(source) if isinstance(item, dict)]
+    items = [source[position] for position in positions] if len(positions) != len(source) else source
+    try:
+        geometry = list(map(_GEOMETRY, items))
+    except KeyError:
+        geometry = [(item.get("x", 0), item.get("y", 0), item.get("width", 0), item.get("height", 0)) for item in items]
+    label_column, confidences = [], []
+    nan = float("nan")
+    for item in items:
+        classes = item.get("classNames")
+        first = classes[0] if type(classes) is list and classes and type(classes[0]) is dict else None
+        label = (first and first.get("label")) or item.get("label") or item.get("className")
+        confidence = item.get("confidence", first.get("confidence") if first else None)
+        if label:
+            label = str(label)
+            if label not in ids:
+                ids[label] = len(names)
+                names.append(label)
+            label_column.append(ids[label])
+        else:
+            label_column.append(-1)
+        confidences.append(nan if confidence is None else confidence)
+    try:
+        numbers = np.fromiter(chain.from_iterable(geometry), dtype=np.float64, count=4 * len(geometry))
+        confidence_column = np.array(confidences, dtype=np.float64)
+    except (TypeError, ValueError):
+        # Only a malformed frame pays for per-row validation.
+        keep = [index for index, row in enumerate(geometry) if _numeric((*row, confidences[index]))]
+        positions = [positions[index] for index in keep]
+        label_column = [label_column[index] for index in keep]
+        numbers = np.array([geometry[index] for index in keep], dtype=np.float64).reshape(-1)
+        confidence_column = np.array([confidences[index] for index in keep], dtype=np.float64)
+    numbers = np.trunc(numbers.reshape(-1, 4))
+    valid = (np.isfinite(numbers) & (numbers >= _INT32.min) & (numbers <= _INT32.max)).all(axis=1)
+    if not valid.all():
+        keep = np.flatnonzero(valid).tolist()
+        positions = [positions[index] for index in keep]
+        label_column = [label_column[index] for index in keep]
+        numbers = numbers[valid]
+        confidence_column = confidence_column[valid]
+    result = np.empty(len(positions), dtype=RECT_DTYPE)
+    result["index"] = positions
+    result["label"] = label_column
+    result["x"], result["y"], result["width"], result["height"] = numbers.T
+    result["confidence"] = confidence_column
+    return result, names
+
+
+def label_ids(labels: list[str], wanted: Iterable[str]) -> list[int]:
+    """Map label names to ids from :func:`to_array`; unknown names are ignored."""
+    ids = {name: position for position, name in enumerate(labels)}
+    return [ids[name] for name in wanted if name in ids]
+
+
+def select(
+    rects: np.ndarray,
+    *,
+    labels: Iterable[int] | None = None,
+    min_confidence: float | None = None,
+    min_area: int | None = None,
+    max_area: int | None = None,
+) -> np.ndarray:
+    """Return the rectangles matching every given filter (a new array, in input order)."""
+    mask = np.ones(len(rects), dtype=bool)
+    if labels is not None:
+        mask &= np.isin(rects["label"], np.fromiter(labels, dtype=np.int32))
+    if min_confidence is not None:
+        mask &= rects["confidence"] >= min_confidence  # NaN confidence never passes
+    if min_area is not None or max_area is not None:
+        area = rects["width"].astype(np.int64) * rects["height"]
+        if min_area is not None:
+            mask &= area >= min_area
+        if max_area is not None:
+            mask &= area <= max_area
+    return rects[mask]
+
+
+def clip(rects: np.ndarray, height: int, width: int, *, drop_empty: bool = True) -> np.ndarray:
+    """Clip rectangles to a ``height`` x ``width`` image; by default drop those left empty."""
+    x1 = np.clip(rects["x"], 0, width)
+    y1 = np.clip(rects["y"], 0, height)
+    x2 = np.clip(rects["x"].astype(np.int64) + rects["width"], 0, width)
+    y2 = np.clip(rects["y"].astype(np.int64) + rects["height"], 0, height)
+    clipped = rects.copy()
+    clipped["x"], clipped["y"] = x1, y1
+    clipped["width"], clipped["height"] = np.maximum(x2 - x1, 0), np.maximum(y2 - y1, 0)
+    if drop_empty:
+        clipped = clipped[(clipped["width"] > 0) & (clipped["height"] > 0)]
+    return clipped
+
+
+def crop_views(image: np.ndarray, rects: np.ndarray) -> list[np.ndarray]:
+    """Return one zero-copy view per rectangle after clipping to the image.
+
+    Views share memory with ``image``; copy them before anything modifies the
+    image, or before storing them past the current evaluation.
+    """
+    clipped = clip(rects, image.shape[0], image.shape[1])
+    return [image[y : y + h, x : x + w] for x, y, w, h in zip(clipped["x"], clipped["y"], clipped["width"], clipped["height"])]
+
+
+def crop_stack(
+    image: np.ndarray,
+    rects: np.ndarray,
+    size: tuple[int, int] | None = None,
+    *,
+    out: np.ndarray | None = None,
+    fill: int | float = 0,
+) -> np.ndarray:
+    """Copy every clipped ROI top-left aligned into one ``(n, H, W[, C])`` array.
+
+    ``size`` defaults to the largest clipped ROI; larger ROIs are truncated and
+    the remainder is ``fill``. With a fixed ``size``, pass a previous result as
+    ``out`` to reuse its buffer when it is large enough; the result is ``out[:n]``.
+    """
+    clipped = clip(rects, image.shape[0], image.shape[1])
+    if size is None:
+        size = (int(clipped["height"].max(initial=0)), int(clipped["width"].max(initial=0)))
+    shape = (len(clipped), *size, *image.shape[2:])
+    if out is not None and out.dtype == image.dtype and out.shape[1:] == shape[1:] and len(out) >= len(clipped):
+        stack = out[: len(clipped)]
+    else:
+        stack = np.empty(shape, dtype=image.dtype)
+    stack[...] = fill
+    for slot, (x, y, w, h) in enumerate(zip(clipped["x"], clipped["y"], clipped["width"], clipped["height"])):
+        h, w = min(int(h), size[0]), min(int(w), size[1])
+        stack[slot, :h, :w] = image[y : y + h, x : x + w]
+    return stack
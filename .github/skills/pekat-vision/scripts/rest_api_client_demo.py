@@ -1,24 +1,60 @@
 """Safe, testable PEKAT REST helpers for PNG and raw image analysis."""
 from __future__ import annotations
 
+import asyncio
 import base64
+import codecs
+import copy
+import hashlib
 import json
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any
-from urllib.parse import urlencode
+from functools import lru_cache
+from typing import Any, BinaryIO
+from urllib.parse import urlencode, urlsplit
 
 import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
 
 ALLOWED_RESPONSE_TYPES = {"context", "image", "annotated_image", "heatmap"}
+STREAM_CHUNK_BYTES = 1 << 16
+PNG_FILTERS = {"none": 0, "sub": 1, "up": 2}
+ARRAY_MODES = {"png", "raw", "auto"}
+MAX_STREAMED_CONTEXT_BYTES = 16 << 20
 
 
 class PekatRestError(RuntimeError):
-    """Normalized REST transport or payload error."""
+    """Normalized REST transport or payload error.
+
+    ``cause`` is ``timeout``, ``http``, ``unavailable``, or ``payload`` (and
+    ``circuit_open`` from ``rest_resilience``); ``status`` carries the HTTP status
+    code for ``http`` errors.
+    """
+
+    def __init__(self, message: str, *, cause: str = "payload", status: int | None = None) -> None:
+        super().__init__(message)
+        self.cause = cause
+        self.status = status
+
+    @property
+    def transport(self) -> bool:
+        """True for failures that reflect server health rather than the payload."""
+        if self.cause in {"timeout", "unavailable"}:
+            return True
+        return self.cause == "http" and (self.status is None or self.status >= 500 or self.status == 429)
 
 
 @dataclass(slots=True)
 class Result:
-    image_bytes: bytes | None
+    image_bytes: bytes | bytearray | None
     context: dict[str, Any]
 
 
@@ -54,55 +90,258 @@ def _dict_json(response: Any) -> dict[str, Any]:
     return payload
 
 
+def _image_length(response: Any) -> int | None:
+    raw_length = response.headers.get("ImageLen")
+    if raw_length is None:
+        return None
+    try:
+        image_length = int(raw_length)
+    except (TypeError, ValueError) as exc:
+        raise PekatRestError("invalid ImageLen response header") from exc
+    if image_length < 0:
+        raise PekatRestError("ImageLen exceeds response body")
+    return image_length
+
+
+def _body_context(text: str) -> dict[str, Any]:
+    try:
+        context = json.loads(text)
+    except json.JSONDecodeError as exc:
+        raise PekatRestError("invalid context in response body") from exc
+    if not isinstance(context, dict):
+        raise PekatRestError("unexpected context shape")
+    return context
+
+
+def _header_context(encoded: str) -> dict[str, Any]:
+    try:
+        context = json.loads(base64.b64decode(encoded, validate=True).decode("utf-8"))
+    except (ValueError, UnicodeDecodeError, json.JSONDecodeError) as exc:
+        raise PekatRestError("invalid ContextBase64utf response header") from exc
+    if not isinstance(context, dict):
+        raise PekatRestError("unexpected context shape")
+    return context
+
+
 def parse_response(response: Any, response_type: str, context_in_body: bool) -> Result:
     if response_type == "context":
         return Result(None, _dict_json(response))
     if context_in_body:
-        raw_length = response.headers.get("ImageLen")
-        if raw_length is None:
+        image_length = _image_length(response)
+        if image_length is None:
             return Result(None, _dict_json(response))
-        try:
-            image_length = int(raw_length)
-        except (TypeError, ValueError) as exc:
-            raise PekatRestError("invalid ImageLen response header") from exc
-        if image_length < 0 or image_length > len(response.content):
+        content = response.content
+        if image_length > len(content):
             raise PekatRestError("ImageLen exceeds response body")
         try:
-            context = json.loads(response.content[image_length:].decode("utf-8"))
-        except (UnicodeDecodeError, json.JSONDecodeError) as exc:
+            text = str(memoryview(content)[image_length:], "utf-8")
+        except UnicodeDecodeError as exc:
             raise PekatRestError("invalid context in response body") from exc
-        if not isinstance(context, dict):
-            raise PekatRestError("unexpected context shape")
-        return Result(response.content[:image_length], context)
+        return Result(content[:image_length], _body_context(text))
     encoded = response.headers.get("ContextBase64utf")
     if encoded is None:
         return Result(None, _dict_json(response))
+    return Result(response.content, _header_context(encoded))
+
+
+def parse_response_stream(
+    response: Any,
+    response_type: str,
+    context_in_body: bool,
+    *,
+    image_sink: BinaryIO | None = None,
+    chunk_size: int = STREAM_CHUNK_BYTES,
+    max_context_bytes: int = MAX_STREAMED_CONTEXT_BYTES,
+) -> Result:
+    """Parse a ``stream=True`` response with memory bounded by the image size.
+
+    The image is read chunk by chunk into one preallocated ``bytearray`` or, when
+    ``image_sink`` is given, written straight to it and returned as ``None``. A
+    trailing ``context_in_body`` JSON context is decoded incrementally and may not
+    exceed ``max_context_bytes``.
+    """
+    if response_type == "context":
+        return Result(None, _dict_json(response))
+    if context_in_body:
+        image_length = _image_length(response)
+        if image_length is None:
+            return Result(None, _dict_json(response))
+    else:
+        encoded = response.headers.get("ContextBase64utf")
+        if encoded is None:
+            return Result(None, _dict_json(response))
+        context = _header_context(encoded)
+        declared = response.headers.get("Content-Length")
+        image_length = int(declared) if declared and declared.isdigit() else None
+
+    buffer = None if image_sink is not None else bytearray(image_length or 0)
+    target = memoryview(buffer) if buffer is not None and image_length is not None else None
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    context_parts: list[str] = []
+    received = context_bytes = 0
     try:
-        context = json.loads(base64.b64decode(encoded, validate=True).decode("utf-8"))
-    except (ValueError, UnicodeDecodeError, json.JSONDecodeError) as exc:
-        raise PekatRestError("invalid ContextBase64utf response header") from exc
-    if not isinstance(context, dict):
-        raise PekatRestError("unexpected context shape")
-    return Result(response.content, context)
+        for chunk in response.iter_content(chunk_size):
+            view = memoryview(chunk)
+            if context_in_body and image_length is not None and received + len(view) > image_length:
+                split = max(image_length - received, 0)
+                view, tail = view[:split], view[split:]
+                context_bytes += len(tail)
+                if context_bytes > max_context_bytes:
+                    raise PekatRestError("context in response body exceeds max_context_bytes")
+                context_parts.append(decoder.decode(tail))
+            if not view:
+                continue
+            if image_sink is not None:
+                image_sink.write(view)
+            elif target is not None:
+                if received + len(view) > len(target):
+                    raise PekatRestError("response body exceeds Content-Length")
+                target[received : received + len(view)] = view
+            else:
+                buffer.extend(view)
+            received += len(view)
+        if context_in_body:
+            context_parts.append(decoder.decode(b"", final=True))
+    except UnicodeDecodeError as exc:
+        raise PekatRestError("invalid context in response body") from exc
+    finally:
+        if target is not None:
+            target.release()
+    if image_length is not None and received < image_length:
+        raise PekatRestError("ImageLen exceeds response body" if context_in_body else "truncated image body")
+    if context_in_body:
+        context = _body_context("".join(context_parts))
+    return Result(buffer, context)
 
 
-def _post(url: str, body: bytes, response_type: str, context_in_body: bool, timeout: tuple[float, float], session: Any) -> Result:
+def _post(
+    url: str,
+    body: bytes | memoryview,
+    response_type: str,
+    context_in_body: bool,
+    timeout: tuple[float, float],
+    session: Any,
+    *,
+    stream: bool = False,
+    image_sink: BinaryIO | None = None,
+) -> Result:
+    stream = stream or image_sink is not None
     try:
         response = session.post(
             url,
             data=body,
             headers={"Content-Type": "application/octet-stream"},
             timeout=timeout,
+            stream=stream,
         )
-        response.raise_for_status()
-        return parse_response(response, response_type, context_in_body)
+        if not stream:
+            response.raise_for_status()
+            return parse_response(response, response_type, context_in_body)
+        try:
+            response.raise_for_status()
+            return parse_response_stream(response, response_type, context_in_body, image_sink=image_sink)
+        finally:
+            response.close()
     except requests.Timeout as exc:
-        raise PekatRestError("PEKAT request timed out") from exc
+        raise PekatRestError("PEKAT request timed out", cause="timeout") from exc
     except requests.HTTPError as exc:
-        status = exc.response.status_code if exc.response is not None else "unknown"
-        raise PekatRestError(f"PEKAT HTTP error: {status}") from exc
+        status = exc.response.status_code if exc.response is not None else None
+        raise PekatRestError(f"PEKAT HTTP error: {status or 'unknown'}", cause="http", status=status) from exc
     except requests.RequestException as exc:
-        raise PekatRestError("PEKAT is unavailable") from exc
+        raise PekatRestError("PEKAT is unavailable", cause="unavailable") from exc
+
+
+def png_body(png_bytes: bytes) -> bytes:
+    """Return ``png_bytes`` as the upload body; raise ``ValueError`` unless it is a binary PNG."""
+    if not isinstance(png_bytes, bytes) or not png_bytes.startswith(b"\x89PNG\r\n\x1a\n"):
+        raise ValueError("png_bytes must contain a binary PNG")
+    return png_bytes
+
+
+def raw_body(image: Any, height: int | None, width: int | None) -> tuple[Any, int, int]:
+    """Return a flat zero-copy body for a C-contiguous uint8 buffer plus its dimensions.
+
+    ``bytes`` are passed through unchanged. NumPy arrays, memoryviews, bytearrays,
+    and mmaps are exposed through ``memoryview`` so the frame is never duplicated.
+    """
+    try:
+        view = memoryview(image)
+    except TypeError as exc:
+        raise ValueError("raw image must be bytes or a buffer-protocol object") from exc
+    if view.format != "B":
+        raise ValueError(f"raw image must be uint8, got buffer format {view.format!r}")
+    if not view.c_contiguous:
+        raise ValueError("raw image buffer must be C-contiguous")
+    if view.ndim in {2, 3}:
+        for given, actual in ((height, view.shape[0]), (width, view.shape[1])):
+            if given is not None and given != actual:
+                raise ValueError("height/width do not match the raw image shape")
+        height, width = view.shape[0], view.shape[1]
+    elif view.ndim != 1:
+        raise ValueError("raw image must be a 1-D buffer or an HxW/HxWxC array")
+    if height is None or width is None or height <= 0 or width <= 0 or not view.nbytes:
+        raise ValueError("raw image dimensions and body must be non-empty")
+    if view.nbytes % (height * width):
+        raise ValueError("raw image size is not a multiple of height*width")
+    body = image if isinstance(image, bytes) else view.cast("B")
+    return body, int(height), int(width)
+
+
+def _raw_query(height: int, width: int, bayer: str | None) -> dict[str, Any]:
+    query: dict[str, Any] = {"height": height, "width": width}
+    if bayer:
+        query["bayer"] = bayer
+    return query
+
+
+def _png_chunk(tag: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(data, zlib.crc32(tag)))
+
+
+def encode_png(image: Any, *, level: int = 1, png_filter: str = "none") -> bytes:
+    """Encode a uint8/uint16 HxW or HxWxC (C=1..4) NumPy frame as PNG.
+
+    ``level`` is the zlib level (1 is fast, 9 is small). ``png_filter`` applies one
+    vectorized PNG filter to every row; ``none`` is fastest. Channels are written in
+    array order, so the caller decides BGR/RGB.
+    """
+    import numpy as np
+
+    if png_filter not in PNG_FILTERS:
+        raise ValueError(f"unsupported png_filter: {png_filter}")
+    if not 0 <= level <= 9:
+        raise ValueError("level must be within 0..9")
+    array = np.asarray(image)
+    if array.dtype not in (np.uint8, np.uint16) or array.ndim not in {2, 3} or array.size == 0:
+        raise ValueError("PNG frames must be non-empty uint8/uint16 HxW or HxWxC arrays")
+    height, width = array.shape[:2]
+    channels = 1 if array.ndim == 2 else array.shape[2]
+    if channels not in {1, 2, 3, 4}:
+        raise ValueError("PNG frames must have 1 to 4 channels")
+    color_type = {1: 0, 2: 4, 3: 2, 4: 6}[channels]
+    bit_depth = array.dtype.itemsize * 8
+    rows = array.astype(">u2", copy=False) if bit_depth == 16 else array
+    pixels = np.ascontiguousarray(rows).view(np.uint8).reshape(height, -1)
+    scanlines = np.empty((height, pixels.shape[1] + 1), dtype=np.uint8)
+    scanlines[:, 0] = PNG_FILTERS[png_filter]
+    if png_filter == "none":
+        scanlines[:, 1:] = pixels
+    elif png_filter == "sub":
+        step = channels * array.dtype.itemsize
+        scanlines[:, 1 : step + 1] = pixels[:, :step]
+        np.subtract(pixels[:, step:], pixels[:, :-step], out=scanlines[:, step + 1 :])
+    else:
+        scanlines[:1, 1:] = pixels[:1]
+        np.subtract(pixels[1:], pixels[:-1], out=scanlines[1:, 1:])
+    header = struct.pack(">IIBBBBB", width, height, bit_depth, color_type, 0, 0, 0)
+    return b"".join(
+        (
+            b"\x89PNG\r\n\x1a\n",
+            _png_chunk(b"IHDR", header),
+            _png_chunk(b"IDAT", zlib.compress(scanlines, level)),
+            _png_chunk(b"IEND", b""),
+        )
+    )
 
 
 def analyze_png(
@@ -115,29 +354,763 @@ def analyze_png(
     context_in_body: bool = False,
     timeout: tuple[float, float] = (3.0, 20.0),
     session: Any = requests,
+    stream: bool = False,
+    image_sink: BinaryIO | None = None,
 ) -> Result:
-    if not isinstance(png_bytes, bytes) or not png_bytes.startswith(b"\x89PNG\r\n\x1a\n"):
-        raise ValueError("png_bytes must contain a binary PNG")
+    body = png_body(png_bytes)
     url = _build_url(host, port, "analyze_image", response_type, data=data, context_in_body=context_in_body)
-    return _post(url, png_bytes, response_type, context_in_body, timeout, session)
+    return _post(url, body, response_type, context_in_body, timeout, session, stream=stream, image_sink=image_sink)
 
 
 def analyze_raw(
-    image_bytes: bytes,
+    image_bytes: Any,
     *,
-    height: int,
-    width: int,
+    height: int | None = None,
+    width: int | None = None,
     host: str = "localhost",
     port: int = 8080,
     response_type: str = "context",
     bayer: str | None = None,
     timeout: tuple[float, float] = (3.0, 20.0),
     session: Any = requests,
+    stream: bool = False,
+    image_sink: BinaryIO | None = None,
 ) -> Result:
-    if height <= 0 or width <= 0 or not image_bytes:
-        raise ValueError("raw image dimensions and body must be non-empty")
-    query: dict[str, Any] = {"height": height, "width": width}
-    if bayer:
-        query["bayer"] = bayer
-    url = _build_url(host, port, "analyze_raw_image", response_type, extra_query=query)
-    return _post(url, image_bytes, response_type, False, timeout, session)
+    """Post raw uint8 pixels; NumPy frames are streamed without ``tobytes()``.
+
+    ``height``/``width`` are inferred from 2-D/3-D arrays and required for flat buffers.
+    """
+    body, height, width = raw_body(image_bytes, height, width)
+    url = _build_url(host, port, "analyze_raw_image", response_type, extra_query=_raw_query(height, width, bayer))
+    return _post(url, body, response_type, False, timeout, session, stream=stream, image_sink=image_sink)
+
+
+def analyze_array(
+    image: Any,
+    *,
+    host: str = "localhost",
+    port: int = 8080,
+    response_type: str = "context",
+    data: str | None = None,
+    level: int = 1,
+    png_filter: str = "none",
+    timeout: tuple[float, float] = (3.0, 20.0),
+    session: Any = requests,
+) -> Result:
+    """Encode a NumPy frame with :func:`encode_png` and post it to ``analyze_image``."""
+    png_bytes = encode_png(image, level=level, png_filter=png_filter)
+    return analyze_png(
+        png_bytes,
+        host=host,
+        port=port,
+        response_type=response_type,
+        data=data,
+        timeout=timeout,
+        session=session,
+    )
+
+
+@lru_cache(maxsize=256)
+def _cached_url(
+    host: str,
+    port: int,
+    endpoint: str,
+    response_type: str,
+    data: str | None,
+    context_in_body: bool,
+    extra_query: tuple[tuple[str, Any], ...],
+) -> str:
+    return _build_url(
+        host,
+        port,
+        endpoint,
+        response_type,
+        data=data,
+        context_in_body=context_in_body,
+        extra_query=dict(extra_query),
+    )
+
+
+@dataclass(slots=True)
+class LatencyStats:
+    count: int = 0
+    errors: int = 0
+    total_s: float = 0.0
+    min_s: float = float("inf")
+    max_s: float = 0.0
+    last_s: float = 0.0
+
+    def add(self, seconds: float, *, failed: bool = False) -> None:
+        self.count += 1
+        self.errors += int(failed)
+        self.total_s += seconds
+        self.min_s = min(self.min_s, seconds)
+        self.max_s = max(self.max_s, seconds)
+        self.last_s = seconds
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean_s": self.total_s / self.count if self.count else 0.0,
+            "min_s": self.min_s if self.count else 0.0,
+            "max_s": self.max_s,
+            "last_s": self.last_s,
+        }
+
+
+@dataclass(slots=True)
+class FrameTiming:
+    """Per-frame cost split for :meth:`PekatClient.analyze_array`.
+
+    ``server_s`` is the Context ``completeTime`` when PEKAT reports it; otherwise
+    it and ``transfer_s`` are ``None`` and only ``round_trip_s`` is known.
+    """
+
+    mode: str
+    raw_bytes: int
+    payload_bytes: int
+    encode_s: float
+    round_trip_s: float
+    server_s: float | None
+    transfer_s: float | None
+
+
+class _LinkEstimator:
+    """EWMA of link throughput, encode speed, and PNG ratio for ``mode="auto"``."""
+
+    def __init__(self, alpha: float = 0.3) -> None:
+        self.alpha = alpha
+        self.bytes_per_s: float | None = None
+        self.encode_s_per_byte: float | None = None
+        self.png_ratio: float | None = None
+        self._lock = threading.Lock()
+
+    def _ewma(self, current: float | None, sample: float) -> float:
+        return sample if current is None else current + self.alpha * (sample - current)
+
+    def observe_encode(self, raw_bytes: int, png_bytes: int, seconds: float) -> None:
+        with self._lock:
+            self.encode_s_per_byte = self._ewma(self.encode_s_per_byte, seconds / raw_bytes)
+            self.png_ratio = self._ewma(self.png_ratio, png_bytes / raw_bytes)
+
+    def observe_transfer(self, payload_bytes: int, seconds: float) -> None:
+        if seconds > 0:
+            with self._lock:
+                self.bytes_per_s = self._ewma(self.bytes_per_s, payload_bytes / seconds)
+
+    def prefer_raw(self, raw_bytes: int) -> bool:
+        with self._lock:
+            if self.bytes_per_s is None or self.encode_s_per_byte is None or self.png_ratio is None:
+                return False
+            png_cost = raw_bytes * self.encode_s_per_byte + raw_bytes * self.png_ratio / self.bytes_per_s
+            return raw_bytes / self.bytes_per_s < png_cost
+
+
+class ResultCache:
+    """Opt-in LRU/TTL cache of analysis results keyed by image content.
+
+    Entries are bounded by count and by total cached image bytes; ``ttl_s=None``
+    keeps entries until evicted. A cache hit skips PEKAT entirely, so the flow
+    does not run again for that frame (no saving, counters, or device outputs).
+    Set ``enabled = False`` or pass ``use_cache=False`` per call to force a fresh
+    evaluation for production-critical decisions.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 256,
+        max_bytes: int = 64 << 20,
+        ttl_s: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_entries <= 0 or max_bytes < 0 or (ttl_s is not None and ttl_s <= 0):
+            raise ValueError("max_entries and ttl_s must be positive and max_bytes non-negative")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self.enabled = True
+        self._clock = clock
+        self._entries: OrderedDict[bytes, tuple[float, Result]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0, "bypassed": 0}
+
+    @staticmethod
+    def key(body: Any, endpoint: str, response_type: str, **params: Any) -> bytes:
+        """Hash the uploaded bytes together with everything else that changes the answer."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(body)
+        digest.update(repr((endpoint, response_type, sorted(params.items()))).encode("utf-8"))
+        return digest.digest()
+
+    @staticmethod
+    def _size(result: Result) -> int:
+        return len(result.image_bytes) if result.image_bytes is not None else 0
+
+    def _drop(self, key: bytes, counter: str) -> None:
+        _, result = self._entries.pop(key)
+        self._bytes -= self._size(result)
+        self.counters[counter] += 1
+
+    def get(self, key: bytes) -> Result | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_s is not None and self._clock() - entry[0] >= self.ttl_s:
+                self._drop(key, "expired")
+                entry = None
+            if entry is None:
+                self.counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.counters["hits"] += 1
+            result = entry[1]
+        # Callers may mutate the context; hand out a copy so the cached entry stays intact.
+        return Result(result.image_bytes, copy.deepcopy(result.context))
+
+    def put(self, key: bytes, result: Result) -> None:
+        image = bytes(result.image_bytes) if result.image_bytes is not None else None
+        stored = Result(image, copy.deepcopy(result.context))
+        size = self._size(stored)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= self._size(previous[1])
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (self._clock(), stored)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)), "evictions")
+
+    def bypass(self) -> None:
+        with self._lock:
+            self.counters["bypassed"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {**self.counters, "entries": len(self._entries), "bytes": self._bytes}
+
+
+class _CountingAdapter(HTTPAdapter):
+    """``HTTPAdapter`` whose connection pools count every TCP connection they open."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        self.connections_opened = 0
+        self._count_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def _counted(self) -> None:
+        with self._count_lock:
+            self.connections_opened += 1
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        adapter = self
+
+        class CountingHTTPPool(HTTPConnectionPool):
+            def _new_conn(self) -> Any:
+                adapter._counted()
+                return super()._new_conn()
+
+        class CountingHTTPSPool(HTTPSConnectionPool):
+            def _new_conn(self) -> Any:
+                adapter._counted()
+                return super()._new_conn()
+
+        self.poolmanager.pool_classes_by_scheme = {"http": CountingHTTPPool, "https": CountingHTTPSPool}
+
+
+class PekatClient:
+    """Keep-alive PEKAT REST client that owns a pooled ``requests.Session``.
+
+    One client targets one PEKAT host/port. ``pool_maxsize`` bounds the open
+    connections to that host; with ``pool_block=True`` extra concurrent callers
+    wait for a free connection instead of opening throwaway sockets. An optional
+    :class:`ResultCache` answers repeated byte-identical frames without a request.
+    """
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 8080,
+        *,
+        timeout: tuple[float, float] = (3.0, 20.0),
+        pool_connections: int = 1,
+        pool_maxsize: int = 4,
+        pool_block: bool = True,
+        session: Any = None,
+        cache: ResultCache | None = None,
+    ) -> None:
+        if pool_connections <= 0 or pool_maxsize <= 0:
+            raise ValueError("pool sizes must be positive")
+        self.host = host
+        self.port = int(port)
+        self.timeout = timeout
+        self._adapter: _CountingAdapter | None = None
+        if session is None:
+            session = requests.Session()
+            self._adapter = _CountingAdapter(
+                pool_connections=pool_connections,
+                pool_maxsize=pool_maxsize,
+                pool_block=pool_block,
+                max_retries=0,
+            )
+            session.mount("http://", self._adapter)
+            session.headers["Connection"] = "keep-alive"
+        self.session = session
+        self.cache = cache
+        self._latency = LatencyStats()
+        self._link = _LinkEstimator()
+        self._lock = threading.Lock()
+
+    def _url(
+        self,
+        endpoint: str,
+        response_type: str,
+        *,
+        data: str | None = None,
+        context_in_body: bool = False,
+        extra_query: dict[str, Any] | None = None,
+    ) -> str:
+        extra = tuple(sorted((extra_query or {}).items()))
+        return _cached_url(self.host, self.port, endpoint, response_type, data, context_in_body, extra)
+
+    def _timed_post(
+        self,
+        url: str,
+        body: bytes | memoryview,
+        response_type: str,
+        context_in_body: bool,
+        *,
+        stream: bool = False,
+        image_sink: BinaryIO | None = None,
+    ) -> Result:
+        started = time.perf_counter()
+        failed = True
+        try:
+            result = _post(
+                url,
+                body,
+                response_type,
+                context_in_body,
+                self.timeout,
+                self.session,
+                stream=stream,
+                image_sink=image_sink,
+            )
+            failed = False
+            return result
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._latency.add(elapsed, failed=failed)
+
+    def _cached_post(
+        self,
+        url: str,
+        body: bytes | memoryview,
+        response_type: str,
+        context_in_body: bool,
+        key: Callable[[], bytes],
+        *,
+        use_cache: bool,
+        stream: bool,
+        image_sink: BinaryIO | None,
+    ) -> Result:
+        cache = self.cache
+        if cache is None or image_sink is not None:
+            return self._timed_post(url, body, response_type, context_in_body, stream=stream, image_sink=image_sink)
+        if not (use_cache and cache.enabled):
+            cache.bypass()
+            return self._timed_post(url, body, response_type, context_in_body, stream=stream)
+        cache_key = key()
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+        result = self._timed_post(url, body, response_type, context_in_body, stream=stream)
+        cache.put(cache_key, result)
+        return result
+
+    def analyze_png(
+        self,
+        png_bytes: bytes,
+        *,
+        response_type: str = "context",
+        data: str | None = None,
+        context_in_body: bool = False,
+        stream: bool = False,
+        image_sink: BinaryIO | None = None,
+        use_cache: bool = True,
+    ) -> Result:
+        body = png_body(png_bytes)
+        url = self._url("analyze_image", response_type, data=data, context_in_body=context_in_body)
+        return self._cached_post(
+            url,
+            body,
+            response_type,
+            context_in_body,
+            lambda: ResultCache.key(body, "analyze_image", response_type, data=data),
+            use_cache=use_cache,
+            stream=stream,
+            image_sink=image_sink,
+        )
+
+    def analyze_raw(
+        self,
+        image_bytes: Any,
+        *,
+        height: int | None = None,
+        width: int | None = None,
+        response_type: str = "context",
+        bayer: str | None = None,
+        stream: bool = False,
+        image_sink: BinaryIO | None = None,
+        use_cache: bool = True,
+    ) -> Result:
+        body, height, width = raw_body(image_bytes, height, width)
+        query = _raw_query(height, width, bayer)
+        url = self._url("analyze_raw_image", response_type, extra_query=query)
+        return self._cached_post(
+            url,
+            body,
+            response_type,
+            False,
+            lambda: ResultCache.key(body, "analyze_raw_image", response_type, **query),
+            use_cache=use_cache,
+            stream=stream,
+            image_sink=image_sink,
+        )
+
+    def _encode(self, image: Any, mode: str, level: int, png_filter: str) -> tuple[str, Any, int, float]:
+        import numpy as np
+
+        array = np.asarray(image)
+        if mode == "auto":
+            mode = "raw" if array.dtype == np.uint8 and self._link.prefer_raw(array.nbytes) else "png"
+        if mode == "raw":
+            return "raw", np.ascontiguousarray(array), array.nbytes, 0.0
+        started = time.perf_counter()
+        png_bytes = encode_png(array, level=level, png_filter=png_filter)
+        elapsed = time.perf_counter() - started
+        self._link.observe_encode(array.nbytes, len(png_bytes), elapsed)
+        return "png", png_bytes, array.nbytes, elapsed
+
+    def _send_encoded(
+        self, encoded: tuple[str, Any, int, float], response_type: str, data: str | None
+    ) -> tuple[Result, FrameTiming]:
+        mode, payload, raw_bytes, encode_s = encoded
+        started = time.perf_counter()
+        if mode == "raw":
+            result = self.analyze_raw(payload, response_type=response_type)
+            payload_bytes = raw_bytes
+        else:
+            result = self.analyze_png(payload, response_type=response_type, data=data)
+            payload_bytes = len(payload)
+        round_trip = time.perf_counter() - started
+        complete = result.context.get("completeTime")
+        server_s = float(complete) if isinstance(complete, (int, float)) and not isinstance(complete, bool) else None
+        transfer_s = max(round_trip - server_s, 0.0) if server_s is not None else None
+        if transfer_s is not None:
+            # Without completeTime the round trip includes processing and would understate the link.
+            self._link.observe_transfer(payload_bytes, transfer_s)
+        timing = FrameTiming(mode, raw_bytes, payload_bytes, encode_s, round_trip, server_s, transfer_s)
+        return result, timing
+
+    def analyze_array(
+        self,
+        image: Any,
+        *,
+        mode: str = "png",
+        level: int = 1,
+        png_filter: str = "none",
+        response_type: str = "context",
+        data: str | None = None,
+    ) -> tuple[Result, FrameTiming]:
+        """Analyze one NumPy frame as PNG, raw pixels, or whichever ``auto`` estimates cheaper.
+
+        ``auto`` learns link throughput only from responses that report
+        ``completeTime`` and sends PNG until it has a measurement.
+        ``data`` only applies to PNG uploads; ``analyze_raw_image`` has no such field.
+        """
+        if mode not in ARRAY_MODES:
+            raise ValueError(f"unsupported mode: {mode}")
+        return self._send_encoded(self._encode(image, mode, level, png_filter), response_type, data)
+
+    def iter_analyze_arrays(
+        self,
+        frames: Iterable[Any],
+        *,
+        mode: str = "png",
+        level: int = 1,
+        png_filter: str = "none",
+        response_type: str = "context",
+        encode_workers: int = 2,
+    ) -> Iterator[tuple[Result, FrameTiming]]:
+        """Yield results in frame order while the next frames encode in a thread pool.
+
+        zlib releases the GIL, so encoding frame N+1 overlaps the network round trip
+        of frame N. At most ``encode_workers`` encoded frames are held ahead.
+        """
+        if mode not in ARRAY_MODES:
+            raise ValueError(f"unsupported mode: {mode}")
+        if encode_workers <= 0:
+            raise ValueError("encode_workers must be positive")
+        source = iter(frames)
+        pending: list[Future] = []
+        with ThreadPoolExecutor(max_workers=encode_workers, thread_name_prefix="pekat-png") as pool:
+            try:
+                for image in source:
+                    pending.append(pool.submit(self._encode, image, mode, level, png_filter))
+                    if len(pending) > encode_workers:
+                        yield self._send_encoded(pending.pop(0).result(), response_type, None)
+                while pending:
+                    yield self._send_encoded(pending.pop(0).result(), response_type, None)
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def ping(self) -> bool:
+        """Return True when ``GET /ping`` answers with HTTP 2xx within the timeout."""
+        try:
+            response = self.session.get(f"http://{self.host}:{self.port}/ping", timeout=self.timeout)
+        except requests.RequestException:
+            return False
+        return 200 <= response.status_code < 300
+
+    def connections_opened(self) -> int:
+        """Return how many TCP connections the client's own pool has opened.
+
+        Always 0 for an injected ``session``, whose pool the client does not own.
+        """
+        return self._adapter.connections_opened if self._adapter is not None else 0
+
+    def stats(self) -> dict[str, Any]:
+        """Return opened connections, latency, and cache counters.
+
+        ``latency`` aggregates every request this client sent, across all of its
+        pooled connections; it is not broken down per connection.
+        """
+        with self._lock:
+            latency = self._latency.as_dict()
+        return {
+            "endpoint": f"{self.host}:{self.port}",
+            "connections_opened": self.connections_opened(),
+            "latency": latency,
+            "cache": self.cache.stats() if self.cache is not None else None,
+        }
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> "PekatClient":
+        return self
+
+    def __exit__(self, *_exc: Any) -> None:
+        self.close()
+
+
+class _AsyncResponse:
+    """Minimal response object that satisfies ``parse_response``."""
+
+    __slots__ = ("status_code", "headers", "content")
+
+    def __init__(self, status_code: int, headers: CaseInsensitiveDict, content: bytes) -> None:
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+
+class _StaleConnection(Exception):
+    """A reused keep-alive connection was closed before any response byte."""
+
+
+async def _read_http_response(reader: asyncio.StreamReader, *, reused: bool) -> tuple[_AsyncResponse, bool]:
+    status_line = await reader.readline()
+    if not status_line:
+        if reused:
+            raise _StaleConnection
+        raise ConnectionError("connection closed before response")
+    parts = status_line.decode("latin-1").split(None, 2)
+    if len(parts) < 2 or not parts[0].startswith("HTTP/1.") or not parts[1].isdigit():
+        raise ConnectionError("malformed HTTP status line")
+    headers: CaseInsensitiveDict = CaseInsensitiveDict()
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError("connection closed inside headers")
+        if line in {b"\r\n", b"\n"}:
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip()] = value.strip()
+    keep_alive = headers.get("Connection", "").lower() != "close" and parts[0] != "HTTP/1.0"
+    if headers.get("Transfer-Encoding", "").lower() == "chunked":
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b";", 1)[0].strip(), 16)
+            if size == 0:
+                while (await reader.readline()) not in {b"\r\n", b"\n", b""}:
+                    pass
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+        content = b"".join(chunks)
+    elif "Content-Length" in headers:
+        content = await reader.readexactly(int(headers["Content-Length"]))
+    else:
+        content = await reader.read()
+        keep_alive = False
+    return _AsyncResponse(int(parts[1]), headers, content), keep_alive
+
+
+class AsyncPekatClient:
+    """Asyncio PEKAT REST client with bounded in-flight request pipelining.
+
+    Requests share a pool of keep-alive connections. ``max_in_flight`` caps the
+    concurrent requests (and therefore open connections) to the host, so many
+    camera coroutines can feed one PEKAT server without a thread per camera.
+    ``timeout`` keeps the ``(connect, read)`` meaning of the synchronous helpers:
+    the first value bounds connection setup, the second the request/response.
+    """
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 8080,
+        *,
+        timeout: tuple[float, float] = (3.0, 20.0),
+        max_in_flight: int = 8,
+    ) -> None:
+        if max_in_flight <= 0:
+            raise ValueError("max_in_flight must be positive")
+        self.host = host
+        self.port = int(port)
+        self.timeout = timeout
+        self.max_in_flight = max_in_flight
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._idle: list[tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._latency = LatencyStats()
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._connections_opened = 0
+
+    async def _connect(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter, bool]:
+        while self._idle:
+            reader, writer = self._idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer, True
+            writer.close()
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.timeout[0])
+        self._connections_opened += 1
+        return reader, writer, False
+
+    async def _exchange(self, url: str, body: bytes | memoryview) -> _AsyncResponse:
+        parts = urlsplit(url)
+        head = (
+            f"POST {parts.path}?{parts.query} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            "Content-Type: application/octet-stream\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: keep-alive\r\n\r\n"
+        ).encode("latin-1")
+        for _attempt in range(2):
+            reader, writer, reused = await self._connect()
+            keep_alive = False
+            try:
+                writer.write(head)
+                writer.write(body)
+                await writer.drain()
+                response, keep_alive = await _read_http_response(reader, reused=reused)
+                return response
+            except _StaleConnection:
+                continue
+            finally:
+                if keep_alive:
+                    self._idle.append((reader, writer))
+                else:
+                    writer.close()
+        raise ConnectionError("PEKAT closed the connection")
+
+    async def _post(self, url: str, body: bytes | memoryview, response_type: str, context_in_body: bool) -> Result:
+        async with self._semaphore:
+            self._in_flight += 1
+            self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+            started = time.perf_counter()
+            failed = True
+            try:
+                try:
+                    response = await asyncio.wait_for(self._exchange(url, body), sum(self.timeout))
+                except asyncio.TimeoutError as exc:
+                    raise PekatRestError("PEKAT request timed out", cause="timeout") from exc
+                except (OSError, ValueError, asyncio.IncompleteReadError) as exc:
+                    raise PekatRestError("PEKAT is unavailable", cause="unavailable") from exc
+                if response.status_code >= 400:
+                    status = response.status_code
+                    raise PekatRestError(f"PEKAT HTTP error: {status}", cause="http", status=status)
+                result = parse_response(response, response_type, context_in_body)
+                failed = False
+                return result
+            finally:
+                self._in_flight -= 1
+                self._latency.add(time.perf_counter() - started, failed=failed)
+
+    async def analyze_png(
+        self,
+        png_bytes: bytes,
+        *,
+        response_type: str = "context",
+        data: str | None = None,
+        context_in_body: bool = False,
+    ) -> Result:
+        body = png_body(png_bytes)
+        extra: tuple[tuple[str, Any], ...] = ()
+        url = _cached_url(self.host, self.port, "analyze_image", response_type, data, context_in_body, extra)
+        return await self._post(url, body, response_type, context_in_body)
+
+    async def analyze_raw(
+        self,
+        image_bytes: Any,
+        *,
+        height: int | None = None,
+        width: int | None = None,
+        response_type: str = "context",
+        bayer: str | None = None,
+    ) -> Result:
+        body, height, width = raw_body(image_bytes, height, width)
+        query = tuple(sorted(_raw_query(height, width, bayer).items()))
+        url = _cached_url(self.host, self.port, "analyze_raw_image", response_type, None, False, query)
+        return await self._post(url, body, response_type, False)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "endpoint": f"{self.host}:{self.port}",
+            "connections_opened": self._connections_opened,
+            "in_flight": self._in_flight,
+            "peak_in_flight": self._peak_in_flight,
+            "latency": self._latency.as_dict(),
+        }
+
+    async def aclose(self) -> None:
+        idle, self._idle = self._idle, []
+        for _reader, writer in idle:
+            writer.close()
+        for _reader, writer in idle:
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    async def __aenter__(self) -> "AsyncPekatClient":
+        return self
+
+    async def __aexit__(self, *_exc: Any) -> None:
+        await self.aclose()
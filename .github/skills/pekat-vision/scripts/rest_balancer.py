@@ -0,0 +1,224 @@
+"""Spread PEKAT REST analysis across several instances serving the same inspection.
+
+Every endpoint must run an equivalent project. The balancer only sends analysis
+requests and ``GET /ping`` health checks; it never starts or switches projects.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from rest_api_client_demo import PekatClient, PekatRestError, Result, png_body, raw_body
+
+POLICIES = {"least_outstanding", "ewma"}
+
+
+@dataclass(slots=True)
+class _Member:
+    client: PekatClient
+    outstanding: int = 0
+    ewma_s: float | None = None
+    healthy: bool = True
+    consecutive_failures: int = 0
+    ejected_at: float = 0.0
+    requests: int = 0
+    failures: int = 0
+    ejections: int = 0
+
+    @property
+    def name(self) -> str:
+        return f"{self.client.host}:{self.client.port}"
+
+
+class _Sequencer:
+    """FIFO ticket gate that lets one request per camera run at a time, in call order."""
+
+    def __init__(self) -> None:
+        self._condition = threading.Condition()
+        self._next_ticket = 0
+        self._serving = 0
+
+    def __enter__(self) -> None:
+        with self._condition:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            self._condition.wait_for(lambda: self._serving == ticket)
+
+    def __exit__(self, *_exc: Any) -> None:
+        with self._condition:
+            self._serving += 1
+            self._condition.notify_all()
+
+
+class PekatBalancer:
+    """Choose a healthy instance by least outstanding requests or EWMA latency.
+
+    An instance is ejected after ``eject_after`` consecutive transport failures
+    (or a failed ping) and re-admitted by :meth:`check_health` once it answers
+    ``/ping`` again and ``readmit_after_s`` has passed. Passing ``camera=`` to
+    ``analyze_*`` serializes that camera's requests in call order.
+    """
+
+    def __init__(
+        self,
+        clients: list[PekatClient],
+        *,
+        policy: str = "least_outstanding",
+        eject_after: int = 3,
+        readmit_after_s: float = 5.0,
+        ewma_alpha: float = 0.3,
+        failover: bool = False,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not clients:
+            raise ValueError("at least one PEKAT endpoint is required")
+        if policy not in POLICIES:
+            raise ValueError(f"unsupported policy: {policy}")
+        if eject_after <= 0 or readmit_after_s < 0 or not 0.0 < ewma_alpha <= 1.0:
+            raise ValueError("eject_after must be positive, readmit_after_s non-negative, ewma_alpha in (0, 1]")
+        self.policy = policy
+        self.eject_after = eject_after
+        self.readmit_after_s = readmit_after_s
+        self.ewma_alpha = ewma_alpha
+        self.failover = failover
+        self._clock = clock
+        self._members = [_Member(client) for client in clients]
+        self._lock = threading.Lock()
+        self._sequencers: dict[str, _Sequencer] = {}
+        self._rotation = 0
+        self._health_stop = threading.Event()
+        self._health_thread: threading.Thread | None = None
+
+    def _score(self, member: _Member) -> tuple[float, float]:
+        if self.policy == "ewma":
+            # Unmeasured members score zero so every instance gets sampled.
+            return ((member.ewma_s or 0.0) * (member.outstanding + 1), member.outstanding)
+        return (member.outstanding, member.ewma_s or 0.0)
+
+    def _acquire(self, exclude: set[int]) -> _Member:
+        with self._lock:
+            candidates = [m for index, m in enumerate(self._members) if m.healthy and index not in exclude]
+            if not candidates:
+                raise PekatRestError("no healthy PEKAT endpoint", cause="unavailable")
+            self._rotation = (self._rotation + 1) % len(candidates)
+            rotated = candidates[self._rotation :] + candidates[: self._rotation]
+            member = min(rotated, key=self._score)
+            member.outstanding += 1
+            member.requests += 1
+            return member
+
+    def _release(self, member: _Member, elapsed: float, error: BaseException | None) -> None:
+        with self._lock:
+            member.outstanding -= 1
+            if error is not None and not isinstance(error, PekatRestError):
+                return  # a local error (bad payload, interrupt) says nothing about this instance
+            if error is None or not error.transport:
+                member.consecutive_failures = 0
+                previous = member.ewma_s
+                member.ewma_s = elapsed if previous is None else previous + self.ewma_alpha * (elapsed - previous)
+                return
+            member.failures += 1
+            member.consecutive_failures += 1
+            if member.healthy and member.consecutive_failures >= self.eject_after:
+                self._eject(member)
+
+    def _eject(self, member: _Member) -> None:
+        member.healthy = False
+        member.ejected_at = self._clock()
+        member.ejections += 1
+
+    def _dispatch(self, call: Callable[[PekatClient], Result]) -> Result:
+        tried: set[int] = set()
+        while True:
+            member = self._acquire(tried)
+            tried.add(self._members.index(member))
+            started = time.perf_counter()
+            error: BaseException | None = None
+            try:
+                return call(member.client)
+            except BaseException as exc:
+                error = exc
+                transport = isinstance(exc, PekatRestError) and exc.transport
+                if not (self.failover and transport and len(tried) < len(self._members)):
+                    raise
+            finally:
+                self._release(member, time.perf_counter() - started, error)
+
+    def _call(self, call: Callable[[PekatClient], Result], camera: str | None) -> Result:
+        if camera is None:
+            return self._dispatch(call)
+        with self._lock:
+            sequencer = self._sequencers.setdefault(camera, _Sequencer())
+        with sequencer:
+            return self._dispatch(call)
+
+    def analyze_png(self, png_bytes: bytes, *, camera: str | None = None, **kwargs: Any) -> Result:
+        png_body(png_bytes)
+        return self._call(lambda client: client.analyze_png(png_bytes, **kwargs), camera)
+
+    def analyze_raw(self, image_bytes: Any, *, camera: str | None = None, **kwargs: Any) -> Result:
+        raw_body(image_bytes, kwargs.get("height"), kwargs.get("width"))
+        return self._call(lambda client: client.analyze_raw(image_bytes, **kwargs), camera)
+
+    def check_health(self) -> dict[str, bool]:
+        """Ping every instance once; eject failures and re-admit recovered instances."""
+        results = {}
+        for member in list(self._members):
+            alive = member.client.ping()
+            with self._lock:
+                if not alive and member.healthy:
+                    self._eject(member)
+                elif alive and not member.healthy and self._clock() - member.ejected_at >= self.readmit_after_s:
+                    member.healthy = True
+                    member.consecutive_failures = 0
+                results[member.name] = member.healthy
+        return results
+
+    def start_health_checks(self, interval_s: float = 1.0) -> None:
+        if interval_s <= 0:
+            raise ValueError("interval_s must be positive")
+        if self._health_thread is not None:
+            return
+        self._health_stop.clear()
+
+        def loop() -> None:
+            while not self._health_stop.wait(interval_s):
+                self.check_health()
+
+        self._health_thread = threading.Thread(target=loop, name="pekat-health", daemon=True)
+        self._health_thread.start()
+
+    def stop_health_checks(self) -> None:
+        self._health_stop.set()
+        if self._health_thread is not None:
+            self._health_thread.join(timeout=5.0)
+            self._health_thread = None
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return [
+                {
+                    "endpoint": member.name,
+                    "healthy": member.healthy,
+                    "outstanding": member.outstanding,
+                    "ewma_s": member.ewma_s,
+                    "requests": member.requests,
+                    "failures": member.failures,
+                    "ejections": member.ejections,
+                }
+                for member in self._members
+            ]
+
+    def close(self) -> None:
+        self.stop_health_checks()
+        for member in self._members:
+            member.client.close()
+
+    def __enter__(self) -> "PekatBalancer":
+        return self
+
+    def __exit__(self, *_exc: Any) -> None:
+        self.close()
@@ -0,0 +1,193 @@
+"""Replay a folder of PNG or raw ``.npy`` frames against a PEKAT endpoint and report throughput.
+
+Only analysis endpoints are called. Use ``--mock`` to benchmark the client offline
+against the bundled localhost server instead of a PEKAT project.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from mock_pekat_server import MockPekatServer
+from rest_api_client_demo import ALLOWED_RESPONSE_TYPES, PekatClient, PekatRestError
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+@dataclass(slots=True)
+class Frame:
+    name: str
+    payload: Any
+    raw: bool
+
+    @property
+    def size(self) -> int:
+        return len(self.payload) if isinstance(self.payload, bytes) else int(self.payload.nbytes)
+
+
+def load_frames(directory: Path) -> list[Frame]:
+    """Load ``*.png`` files as bytes and ``*.npy`` files as uint8 arrays, sorted by name."""
+    frames = []
+    for path in sorted(directory.iterdir()):
+        suffix = path.suffix.lower()
+        if suffix == ".png":
+            payload = path.read_bytes()
+            if not payload.startswith(PNG_SIGNATURE):
+                raise ValueError(f"not a binary PNG: {path.name}")
+            frames.append(Frame(path.name, payload, raw=False))
+        elif suffix == ".npy":
+            import numpy as np
+
+            array = np.load(path, allow_pickle=False)
+            if array.dtype != np.uint8 or array.ndim not in {2, 3} or not array.flags.c_contiguous:
+                raise ValueError(f"raw frame must be a C-contiguous uint8 HxW/HxWxC array: {path.name}")
+            frames.append(Frame(path.name, array, raw=True))
+    if not frames:
+        raise ValueError(f"no .png or .npy frames in {directory}")
+    return frames
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+
+def _summary(values: list[int]) -> dict[str, float]:
+    if not values:
+        return {"min": 0, "mean": 0.0, "max": 0, "total": 0}
+    return {"min": min(values), "mean": sum(values) / len(values), "max": max(values), "total": sum(values)}
+
+
+def replay(
+    client: PekatClient,
+    frames: list[Frame],
+    *,
+    requests: int,
+    workers: int = 1,
+    rate: float = 0.0,
+    warmup: int = 0,
+    response_type: str = "context",
+) -> dict[str, Any]:
+    """Send ``warmup`` unmeasured requests, then ``requests`` measured ones at up to ``rate``/s."""
+    if requests <= 0 or workers <= 0 or warmup < 0 or rate < 0:
+        raise ValueError("requests/workers must be positive and warmup/rate non-negative")
+
+    def send(index: int) -> tuple[float, int, int, str | None]:
+        frame = frames[index % len(frames)]
+        started = time.perf_counter()
+        try:
+            if frame.raw:
+                result = client.analyze_raw(frame.payload, response_type=response_type)
+            else:
+                result = client.analyze_png(frame.payload, response_type=response_type)
+        except PekatRestError as exc:
+            return time.perf_counter() - started, frame.size, 0, exc.cause
+        image = len(result.image_bytes) if result.image_bytes is not None else 0
+        return time.perf_counter() - started, frame.size, image, None
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(send, range(warmup)))
+        started = time.perf_counter()
+        lock = threading.Lock()
+        next_slot = [started]
+
+        def paced(index: int) -> tuple[float, int, int, str | None]:
+            if rate:
+                with lock:
+                    slot = next_slot[0]
+                    next_slot[0] = slot + 1.0 / rate
+                delay = slot - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            return send(warmup + index)
+
+        samples = list(pool.map(paced, range(requests)))
+        duration = time.perf_counter() - started
+
+    latencies = sorted(sample[0] * 1000.0 for sample in samples if sample[3] is None)
+    errors = Counter(sample[3] for sample in samples if sample[3] is not None)
+    return {
+        "endpoint": f"{client.host}:{client.port}",
+        "response_type": response_type,
+        "workers": workers,
+        "target_rate": rate or None,
+        "warmup": warmup,
+        "requests": requests,
+        "ok": len(latencies),
+        "errors": dict(sorted(errors.items())),
+        "duration_s": duration,
+        "throughput_rps": len(latencies) / duration if duration else 0.0,
+        "latency_ms": {
+            "p50": percentile(latencies, 0.50),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+            "max": latencies[-1] if latencies else 0.0,
+            "mean": sum(latencies) / len(latencies) if latencies else 0.0,
+        },
+        "payload_bytes": {
+            "request": _summary([sample[1] for sample in samples]),
+            "response_image": _summary([sample[2] for sample in samples if sample[3] is None]),
+        },
+        "connections_opened": client.connections_opened(),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay PNG/.npy frames against a PEKAT analysis endpoint")
+    parser.add_argument("frames", type=Path, help="Directory with *.png and/or *.npy frames")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--mock", action="store_true", help="Target the bundled localhost mock server")
+    parser.add_argument("--mock-latency-ms", type=float, default=0.0)
+    parser.add_argument("--mock-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--mock-error-rate", type=float, default=0.0)
+    parser.add_argument("--mock-image-size", type=int, default=1024)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--rate", type=float, default=0.0, help="Target requests/s; 0 sends as fast as possible")
+    parser.add_argument("--warmup", type=int, default=0)
+    parser.add_argument("--requests", type=int, default=0, help="Measured requests; default is one pass over frames")
+    parser.add_argument("--response-type", choices=sorted(ALLOWED_RESPONSE_TYPES), default="context")
+    parser.add_argument("--timeout", type=float, nargs=2, default=(3.0, 20.0), metavar=("CONNECT", "READ"))
+    args = parser.parse_args(argv)
+
+    frames = load_frames(args.frames)
+    server = None
+    if args.mock:
+        server = MockPekatServer(
+            latency_s=args.mock_latency_ms / 1000.0,
+            jitter_s=args.mock_jitter_ms / 1000.0,
+            error_rate=args.mock_error_rate,
+            image_size=args.mock_image_size,
+        ).start()
+    host, port = (server.host, server.port) if server else (args.host, args.port)
+    try:
+        with PekatClient(host, port, timeout=tuple(args.timeout), pool_maxsize=args.workers) as client:
+            report = replay(
+                client,
+                frames,
+                requests=args.requests or len(frames),
+                workers=args.workers,
+                rate=args.rate,
+                warmup=args.warmup,
+                response_type=args.response_type,
+            )
+    finally:
+        if server:
+            server.stop()
+    report["mock"] = bool(server)
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,298 @@
+"""Optional retry, circuit-breaker, and hedging layer for PEKAT REST analysis.
+
+Retries and hedges re-send an analysis request. Only enable them for projects
+where evaluating the same frame twice has no side effect (image saving,
+counters, or device outputs triggered by the flow).
+"""
+from __future__ import annotations
+
+import io
+import math
+import random
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+from rest_api_client_demo import PekatClient, PekatRestError, Result, png_body, raw_body
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+T = TypeVar("T")
+
+
+@dataclass(slots=True)
+class RetryPolicy:
+    """Bounded retry with full-jitter exponential backoff."""
+
+    attempts: int = 3
+    base_delay_s: float = 0.05
+    max_delay_s: float = 1.0
+
+    def __post_init__(self) -> None:
+        if self.attempts <= 0 or self.base_delay_s < 0 or self.max_delay_s < self.base_delay_s:
+            raise ValueError("attempts must be positive and 0 <= base_delay_s <= max_delay_s")
+
+    def delay(self, retry_index: int, rng: random.Random) -> float:
+        return rng.uniform(0.0, min(self.max_delay_s, self.base_delay_s * (2**retry_index)))
+
+
+class CircuitBreaker:
+    """Fail fast after consecutive transport failures; probe again after a cool-down."""
+
+    def __init__(
+        self,
+        *,
+        failure_threshold: int = 5,
+        reset_timeout_s: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if failure_threshold <= 0 or reset_timeout_s < 0:
+            raise ValueError("failure_threshold must be positive and reset_timeout_s non-negative")
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.transitions = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout_s:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+            self.transitions += 1
+        return self._state
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != CLOSED:
+                self.transitions += 1
+            self._state = CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self.transitions += 1
+                self._state = OPEN
+                self._opened_at = self._clock()
+                self._probe_in_flight = False
+
+    def release(self) -> None:
+        """End a call that proved nothing about the server (e.g. a local error) without changing state."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self._current_state(),
+                "consecutive_failures": self._failures,
+                "transitions": self.transitions,
+            }
+
+
+class ResilientPekatClient:
+    """Wrap a :class:`PekatClient` with optional retry, circuit breaker, and hedging.
+
+    With ``hedge`` set, a request still pending after the ``hedge_percentile`` of
+    recent primary latencies is also sent to the second PEKAT instance and the
+    first successful answer wins. Hedging starts after ``hedge_min_samples``.
+    The losing request is cancelled if it has not started; a running one cannot
+    be interrupted and holds one of ``hedge_workers`` threads until it finishes
+    or hits its read timeout.
+
+    With retry or hedging, an ``image_sink`` is not written by the attempts:
+    each attempt streams into its own in-memory buffer and only the winning
+    image is copied to the sink, so a failed or losing attempt never leaves
+    partial bytes in it.
+    """
+
+    def __init__(
+        self,
+        primary: PekatClient,
+        *,
+        retry: RetryPolicy | None = None,
+        breaker: CircuitBreaker | None = None,
+        hedge: PekatClient | None = None,
+        hedge_percentile: float = 0.95,
+        hedge_min_samples: int = 20,
+        latency_window: int = 256,
+        hedge_workers: int = 4,
+        seed: int | None = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if not 0.0 < hedge_percentile < 1.0 or hedge_min_samples <= 0 or latency_window <= 0:
+            raise ValueError("hedge_percentile must be in (0, 1) and sample sizes positive")
+        if hedge_workers < 2:
+            raise ValueError("hedge_workers must be at least 2 (primary plus hedge)")
+        self.primary = primary
+        self.retry = retry
+        self.breaker = breaker
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self._latencies: deque[float] = deque(maxlen=latency_window)
+        self._random = random.Random(seed)
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=hedge_workers, thread_name_prefix="pekat-hedge") if hedge else None
+        self.counters = {
+            "calls": 0,
+            "attempts": 0,
+            "retries": 0,
+            "successes": 0,
+            "failures": 0,
+            "short_circuited": 0,
+            "hedged": 0,
+            "hedge_wins": 0,
+            "hedge_cancelled": 0,
+        }
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    def hedge_delay_s(self) -> float | None:
+        with self._lock:
+            if self.hedge is None or len(self._latencies) < self.hedge_min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[max(0, math.ceil(self.hedge_percentile * len(ordered)) - 1)]
+
+    def _timed(self, call: Callable[[PekatClient], T], client: PekatClient) -> T:
+        started = time.perf_counter()
+        result = call(client)
+        if client is self.primary:
+            with self._lock:
+                self._latencies.append(time.perf_counter() - started)
+        return result
+
+    def _attempt(self, call: Callable[[PekatClient], T]) -> T:
+        delay = self.hedge_delay_s()
+        if delay is None or self._pool is None or self.hedge is None:
+            return self._timed(call, self.primary)
+        first = self._pool.submit(self._timed, call, self.primary)
+        done, _ = wait([first], timeout=delay)
+        if done:
+            return first.result()
+        self._count("hedged")
+        second = self._pool.submit(self._timed, call, self.hedge)
+        pending: set[Future] = {first, second}
+        error: PekatRestError | None = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except PekatRestError as exc:
+                    error = error or exc
+                    continue
+                if future is second:
+                    self._count("hedge_wins")
+                for loser in pending:
+                    if loser.cancel():
+                        self._count("hedge_cancelled")
+                return result
+        assert error is not None
+        raise error
+
+    def _call(self, call: Callable[[PekatClient], T]) -> T:
+        self._count("calls")
+        attempts = self.retry.attempts if self.retry else 1
+        attempt = 0
+        while True:
+            if self.breaker is not None and not self.breaker.allow():
+                self._count("short_circuited")
+                raise PekatRestError("PEKAT circuit breaker is open", cause="circuit_open")
+            self._count("attempts")
+            try:
+                result = self._attempt(call)
+            except PekatRestError as exc:
+                transport = exc.transport
+                if self.breaker is not None:
+                    if transport:
+                        self.breaker.record_failure()
+                    else:
+                        self.breaker.record_success()
+                attempt += 1
+                if not transport or attempt >= attempts or self.retry is None:
+                    self._count("failures")
+                    raise
+                self._count("retries")
+                self._sleep(self.retry.delay(attempt - 1, self._random))
+                continue
+            except Exception:
+                # Not a PEKAT outcome; free a half-open probe slot so the breaker can still recover.
+                if self.breaker is not None:
+                    self.breaker.release()
+                self._count("failures")
+                raise
+            if self.breaker is not None:
+                self.breaker.record_success()
+            self._count("successes")
+            return result
+
+    def _analyze(self, send: Callable[..., Result], kwargs: dict[str, Any]) -> Result:
+        sink = kwargs.get("image_sink")
+        if sink is None or (self.retry is None and self.hedge is None):
+            return self._call(lambda client: send(client, **kwargs))
+
+        def buffered(client: PekatClient) -> tuple[Result, io.BytesIO]:
+            buffer = io.BytesIO()
+            return send(client, **{**kwargs, "image_sink": buffer}), buffer
+
+        result, buffer = self._call(buffered)
+        sink.write(buffer.getbuffer())
+        return result
+
+    def analyze_png(self, png_bytes: bytes, **kwargs: Any) -> Result:
+        png_body(png_bytes)  # reject a bad payload before it can take the breaker's probe slot
+        return self._analyze(lambda client, **options: client.analyze_png(png_bytes, **options), kwargs)
+
+    def analyze_raw(self, image_bytes: Any, **kwargs: Any) -> Result:
+        raw_body(image_bytes, kwargs.get("height"), kwargs.get("width"))
+        return self._analyze(lambda client, **options: client.analyze_raw(image_bytes, **options), kwargs)
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return breaker state, counters, and the current hedge delay for monitoring."""
+        with self._lock:
+            counters = dict(self.counters)
+        return {
+            "breaker": self.breaker.snapshot() if self.breaker else None,
+            "counters": counters,
+            "hedge_delay_s": self.hedge_delay_s(),
+        }
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self) -> "ResilientPekatClient":
+        return self
+
+    def __exit__(self, *_exc: Any) -> None:
+        self.close()
@@ -0,0 +1,147 @@
+"""Per-process warm state for Code modules without ``__main__`` globals.
+
+Stage this file in a library directory (``add_libs_to_sys_path.py``). An imported
+module lives in ``sys.modules`` for the life of the PEKAT process, so
+:data:`STATE` survives evaluations while the Code module source stays stateless::
+
+    from state_cache import STATE
+
+    def main(context, form=None):
+        values = form or {}
+        lut = STATE.get("auto-hdr", lambda: build_lut(values), values, keys=("gamma",))
+        context["image"] = cv2.LUT(context["image"], lut)
+
+The cache never receives or writes Context; store only resources that are
+rebuilt from form values, never per-frame results or decisions.
+"""
+from __future__ import annotations
+
+import json
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterable
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+
+def estimate_size(value: Any) -> int:
+    """Best-effort byte size: ``nbytes`` for arrays, recursive for lists/tuples/dicts, else ``sys.getsizeof``."""
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value.values())
+    return sys.getsizeof(value)
+
+
+def form_fingerprint(form: dict[str, Any] | None, keys: Iterable[str] | None = None) -> str:
+    """Canonical JSON of the form values (only ``keys`` when given) that select a cached resource."""
+    values = dict(form or {})
+    if keys is not None:
+        values = {key: values.get(key) for key in keys}
+    return json.dumps(values, sort_keys=True, separators=(",", ":"), default=repr)
+
+
+class StateCache:
+    """Thread-safe LRU of lazily built resources keyed by module and form values.
+
+    Each module keeps at most ``variants_per_module`` form fingerprints; building
+    a new one drops the oldest, so changing a form value invalidates the previous
+    resource. Entries are also bounded by count and estimated bytes. Concurrent
+    callers for the same key wait for one ``factory`` call; a failing factory
+    caches nothing.
+    """
+
+    def __init__(self, *, max_entries: int = 32, max_bytes: int = 256 << 20, variants_per_module: int = 1) -> None:
+        if max_entries <= 0 or max_bytes < 0 or variants_per_module <= 0:
+            raise ValueError("max_entries and variants_per_module must be positive and max_bytes non-negative")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.variants_per_module = variants_per_module
+        self._entries: OrderedDict[tuple[Hashable, str], tuple[Any, int]] = OrderedDict()
+        self._building: dict[tuple[Hashable, str], threading.Lock] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "builds": 0, "failures": 0, "invalidations": 0, "evictions": 0}
+
+    def _drop(self, key: tuple[Hashable, str], counter: str) -> None:
+        _, size = self._entries.pop(key)
+        self._bytes -= size
+        self.counters[counter] += 1
+
+    def get(
+        self,
+        module: Hashable,
+        factory: Callable[[], T],
+        form: dict[str, Any] | None = None,
+        *,
+        keys: Iterable[str] | None = None,
+        size: int | None = None,
+    ) -> T:
+        """Return the resource for ``module`` and the relevant form values, building it once.
+
+        ``module`` is any stable identifier, typically the module label or export
+        id. ``keys`` limits which form values select the resource. ``size``
+        overrides :func:`estimate_size`; a resource larger than ``max_bytes`` is
+        returned but not kept.
+        """
+        key = (module, form_fingerprint(form, keys))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.counters["hits"] += 1
+                return entry[0]
+            self.counters["misses"] += 1
+            building = self._building.setdefault(key, threading.Lock())
+        with building:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    return entry[0]
+            try:
+                value = factory()
+            except BaseException:
+                with self._lock:
+                    self._building.pop(key, None)
+                    self.counters["failures"] += 1
+                raise
+            nbytes = estimate_size(value) if size is None else size
+            with self._lock:
+                self._building.pop(key, None)
+                self.counters["builds"] += 1
+                variants = [existing for existing in self._entries if existing[0] == module]
+                for stale in variants[: max(0, len(variants) - self.variants_per_module + 1)]:
+                    self._drop(stale, "invalidations")
+                if nbytes > self.max_bytes:
+                    return value
+                self._entries[key] = (value, nbytes)
+                self._bytes += nbytes
+                while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                    self._drop(next(iter(self._entries)), "evictions")
+            return value
+
+    def invalidate(self, module: Hashable) -> int:
+        """Drop every cached variant of ``module``; return how many were dropped."""
+        with self._lock:
+            stale = [key for key in self._entries if key[0] == module]
+            for key in stale:
+                self._drop(key, "invalidations")
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {**self.counters, "entries": len(self._entries), "bytes": self._bytes}
+
+
+STATE = StateCache()
@@ -0,0 +1,71 @@
+"""Compare per-frame time and allocations of the Code module template crop modes.
+
+Runs ``code_module_template.main`` on synthetic 2448x2048 frames with one ROI
+and reports the best and median per-frame time and the tracemalloc peak for
+``copy``, ``view``, and ``reuse`` (NumPy reports its buffers to tracemalloc).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / ".github" / "skills" / "pekat-vision" / "scripts"))
+
+from code_module_template import main as run_module  # noqa: E402
+
+
+def _measure(frame: np.ndarray, form: dict[str, Any], rectangle: dict[str, Any], iterations: int) -> dict[str, Any]:
+    def call() -> dict[str, Any]:
+        context = {"image": frame, "detectedRectangles": [rectangle], "result": True}
+        run_module(context, form)
+        return context
+
+    context = call()
+    seconds = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        call()
+        seconds.append(time.perf_counter() - started)
+    tracemalloc.start()
+    call()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "best_ms": min(seconds) * 1000,
+        "median_ms": statistics.median(seconds) * 1000,
+        "peak_bytes": peak,
+        "crop": context["code_template_crop"],
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--height", type=int, default=2048)
+    parser.add_argument("--width", type=int, default=2448)
+    parser.add_argument("--channels", type=int, default=3, help="0 for a 2-D mono frame")
+    parser.add_argument("--dtype", default="uint8")
+    parser.add_argument("--roi", type=float, default=0.75, help="ROI side as a fraction of the frame")
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+    shape = (args.height, args.width, *((args.channels,) if args.channels else ()))
+    frame = np.random.default_rng(0).integers(0, 255, size=shape).astype(args.dtype)
+    height, width = int(args.height * args.roi), int(args.width * args.roi)
+    rectangle = {"x": (args.width - width) // 2, "y": (args.height - height) // 2, "width": width, "height": height}
+    report: dict[str, Any] = {"frame": list(shape), "dtype": args.dtype, "roi": [height, width]}
+    for mode in ("copy", "view", "reuse"):
+        form = {"crop_enabled": True, "crop_mode": mode, "image_read_only_downstream": True}
+        report[mode] = _measure(frame, form, rectangle, args.iterations)
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,75 @@
+"""Compare peak memory and time of ModuleSpec export writers for a large ``sourceCode``.
+
+``dumps`` is the previous ``json.dumps`` + ``write_text`` path, ``stream`` is
+``ModuleSpec.write``, and ``orjson`` runs only when that package is installed.
+Each row also reports whether the bytes match the ``dumps`` output.
+"""
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / ".github" / "skills" / "pekat-vision" / "scripts"))
+
+from generate_code_module import ModuleSpec  # noqa: E402
+
+
+def _measure(call: Callable[[], None], iterations: int) -> dict[str, float]:
+    call()
+    peaks, seconds = [], []
+    for _ in range(iterations):
+        tracemalloc.start()
+        started = time.perf_counter()
+        call()
+        seconds.append(time.perf_counter() - started)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return {"peak_bytes": max(peaks), "best_s": min(seconds)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source-mb", type=float, default=32.0, help="Size of the embedded base64 table")
+    parser.add_argument("--iterations", type=int, default=3)
+    args = parser.parse_args()
+    blob = base64.b64encode(os.urandom(int(args.source_mb * (1 << 20) * 3 / 4))).decode("ascii")
+    source = f"WEIGHTS = {blob!r}\n\n\ndef main(context):\n    context['weights_len'] = len(WEIGHTS)\n"
+    spec = ModuleSpec.from_mapping({"target_version": "4.0.1", "label": "Large", "source_code": source})
+    writers: dict[str, Callable[[Path], None]] = {
+        "dumps": lambda path: path.write_text(
+            json.dumps(spec.build_payload(epoch_ms=1), ensure_ascii=False, separators=(",", ":")),
+            encoding="utf-8",
+            newline="\n",
+        ),
+        "stream": lambda path: spec.write(path, epoch_ms=1) and None,
+    }
+    try:
+        import orjson
+    except ImportError:
+        orjson = None
+    if orjson is not None:
+        writers["orjson"] = lambda path: path.write_bytes(orjson.dumps(spec.build_payload(epoch_ms=1)))
+    report: dict[str, Any] = {"source_bytes": len(source), "orjson_installed": orjson is not None}
+    with tempfile.TemporaryDirectory() as directory:
+        reference = Path(directory) / "reference.ptool"
+        writers["dumps"](reference)
+        expected = reference.read_bytes()
+        for name, writer in writers.items():
+            target = Path(directory) / f"{name}.ptool"
+            report[name] = _measure(lambda: writer(target), args.iterations)
+            report[name]["identical"] = target.read_bytes() == expected
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,75 @@
+"""Compare client-side allocations of raw uploads with and without ``tobytes()``.
+
+The session stand-in accepts the body without sending it, so the numbers isolate
+what ``analyze_raw`` itself allocates per 2448x2048 frame.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tracemalloc
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / ".github" / "skills" / "pekat-vision" / "scripts"))
+
+from rest_api_client_demo import analyze_raw  # noqa: E402
+
+
+class _Response:
+    headers: dict[str, str] = {}
+    content = b"{}"
+
+    def raise_for_status(self) -> None:
+        return None
+
+    def json(self) -> dict[str, Any]:
+        return {"result": True}
+
+
+class _DiscardSession:
+    sent_bytes = 0
+
+    def post(self, url: str, *, data: Any, **_kwargs: Any) -> _Response:
+        self.sent_bytes = memoryview(data).nbytes
+        return _Response()
+
+
+def _measure(call: Any, iterations: int) -> dict[str, float]:
+    tracemalloc.start()
+    try:
+        call()
+        tracemalloc.reset_peak()
+        start_current, _ = tracemalloc.get_traced_memory()
+        peaks = []
+        for _ in range(iterations):
+            tracemalloc.reset_peak()
+            call()
+            peaks.append(tracemalloc.get_traced_memory()[1] - start_current)
+    finally:
+        tracemalloc.stop()
+    return {"peak_bytes_per_call": max(peaks), "mean_peak_bytes_per_call": sum(peaks) / len(peaks)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--height", type=int, default=2048)
+    parser.add_argument("--width", type=int, default=2448)
+    parser.add_argument("--channels", type=int, default=3)
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args()
+    frame = np.zeros((args.height, args.width, args.channels), dtype=np.uint8)
+    session = _DiscardSession()
+    before = _measure(
+        lambda: analyze_raw(frame.tobytes(), height=args.height, width=args.width, session=session), args.iterations
+    )
+    after = _measure(lambda: analyze_raw(frame, session=session), args.iterations)
+    print(json.dumps({"frame_bytes": frame.nbytes, "tobytes": before, "buffer": after}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,3 +1,6 @@
+import numpy as np
+import pytest
+
 from code_module_template import main
 
 
@@ -27,3 +30,47 @@ def test_missing_inputs_are_diagnostic_only():
     context = {"result": False}
     main(context)
     assert context == {"result": False, "code_template_status": "rectangle_not_found"}
+
+
+def test_view_and_reuse_need_read_only_confirmation():
+    frame = np.arange(100 * 120 * 3, dtype=np.uint8).reshape(100, 120, 3)
+    context = {"image": frame, "detectedRectangles": [rectangle()], "result": True}
+    main(context, {"crop_enabled": True, "crop_mode": "view"})
+    assert not np.shares_memory(context["image"], frame)
+    assert context["code_template_crop"]["mode"] == "copy"
+    assert context["code_template_crop"]["fallback"] == "downstream_not_confirmed_read_only"
+
+    form = {"crop_enabled": True, "crop_mode": "view", "image_read_only_downstream": True}
+    context = {"image": frame, "detectedRectangles": [rectangle()], "result": True}
+    main(context, form)
+    view = context["image"]
+    assert np.shares_memory(view, frame) and view.shape == (40, 30, 3)
+    assert context["code_template_crop"] == {
+        "requested_mode": "view",
+        "mode": "view",
+        "fallback": None,
+        "dtype": "uint8",
+        "shape": [40, 30, 3],
+        "c_contiguous": False,
+        "writeable": False,
+    }
+    with pytest.raises(ValueError):
+        view[0, 0] = 0
+    assert frame.flags.writeable and context["result"] is True
+
+
+def test_reuse_mode_copies_into_one_buffer_per_shape():
+    form = {"crop_enabled": True, "crop_mode": "reuse", "image_read_only_downstream": True}
+    crops = []
+    for offset in (0, 1):
+        frame = np.full((100, 120), offset, dtype=np.uint16)
+        context = {"image": frame, "detectedRectangles": [rectangle()]}
+        main(context, form)
+        assert not np.shares_memory(context["image"], frame)
+        assert context["code_template_crop"]["c_contiguous"] and context["code_template_crop"]["mode"] == "reuse"
+        crops.append(context["image"])
+    assert crops[0] is crops[1] and int(crops[1][0, 0]) == 1
+
+    context = {"image": FakeImage(), "detectedRectangles": [rectangle()]}
+    main(context, form)
+    assert context["code_template_crop"]["fallback"] == "reuse_needs_numpy_array"
@@ -0,0 +1,75 @@
+import ast
+import json
+
+from context_dataflow import analyze_flow, analyze_source, main
+
+DETECT = """import numpy as np
+
+
+def main(context):
+    context["mask"] = np.zeros(3)
+    context["count"] = len(context.get("detectedRectangles", []))
+"""
+DRAW = """def main(ctx, form=None):
+    import cv2
+    if "count" in ctx and ctx["count"]:
+        ctx["overlay"] = cv2.UMat(ctx["image"])
+    ctx["detectedRectangles"].append({"x": 0})
+    ctx["result"] = ctx["score"] > 0.5
+    ctx.update({"mask": None}, reason="draw")
+"""
+SAVE = """def main(context):
+    label = context[key_name()]
+    context["overlay"] = context.get("overlay")
+    context.setdefault("notes", []).append(label)
+"""
+
+
+def test_module_reads_writes_mutations_and_imports():
+    detect = analyze_source(DETECT, "detect")
+    assert (detect.reads, detect.writes) == ({"detectedRectangles"}, {"mask", "count"})
+    assert detect.imports == {"numpy"} and detect.per_frame_imports == set()
+    draw = analyze_source(DRAW, "draw")
+    assert draw.reads == {"count", "image", "score", "detectedRectangles"}
+    assert draw.writes == {"overlay", "result", "mask", "reason"} and draw.mutates == {"detectedRectangles"}
+    assert draw.mutates_result and draw.heavy_per_frame_imports == ["cv2"] and not draw.dynamic_access
+    save = analyze_source(SAVE, "save")
+    assert save.reads == save.optional_reads == {"overlay", "notes"} and save.writes == {"overlay", "notes"}
+    assert save.dynamic_access and detect.optional_reads == {"detectedRectangles"}
+    assert analyze_source("def main(:\n", "broken").error.startswith("syntax error at line 1")
+    assert analyze_source("def main(context):\n    pass\x00\n", "nul").error
+
+
+def test_parser_value_error_becomes_module_error(monkeypatch):
+    source = "def main(context):\n    pass  # nul\n"
+    real_parse = ast.parse
+
+    def parse(text, *args, **kwargs):
+        if text == source:
+            raise ValueError("source code string cannot contain null bytes")
+        return real_parse(text, *args, **kwargs)
+
+    monkeypatch.setattr(ast, "parse", parse)
+    assert analyze_source(source, "nul").error == "invalid source: source code string cannot contain null bytes"
+
+
+def test_flow_reports_unsatisfied_reads_redundant_writes_and_heavy_imports(tmp_path, capsys):
+    modules = [analyze_source(source, name) for name, source in (("detect", DETECT), ("draw", DRAW), ("save", SAVE))]
+    flow = analyze_flow(modules)
+    assert flow["unsatisfied_reads"] == [{"index": 1, "module": "draw", "key": "score"}]
+    assert flow["redundant_writes"] == [
+        {"key": "mask", "index": 0, "module": "detect", "overwritten_at": 1, "overwritten_by": "draw"}
+    ]
+    assert flow["in_place_mutations"] == [{"index": 1, "module": "draw", "key": "detectedRectangles"}]
+    assert flow["heavy_per_frame_imports"] == [{"index": 1, "module": "draw", "import": "cv2"}]
+    assert flow["dynamic_modules"] == ["save"]
+
+    paths = []
+    for name, source in (("detect", DETECT), ("draw", DRAW)):
+        path = tmp_path / f"{name}.json"
+        path.write_text(json.dumps({"label": name, "source_code": source}), encoding="utf-8")
+        paths.append(str(path))
+    assert main([*paths, "--flow", "--provided", "image", "detectedRectangles", "score"]) == 1
+    report = json.loads(capsys.readouterr().out)
+    assert [module["name"] for module in report["modules"]] == ["detect", "draw"]
+    assert report["flow"]["unsatisfied_reads"] == [] and len(report["flow"]["redundant_writes"]) == 1
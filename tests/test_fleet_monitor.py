@@ -0,0 +1,96 @@
+import asyncio
+import json
+import socket
+
+from fleet_monitor import FleetMonitor, Station, StatusHistory, load_fleet, main
+
+
+class FakeStation:
+    """Localhost Projects Manager stand-in answering ``status:<path>`` with a configurable state."""
+
+    def __init__(self, statuses):
+        self.statuses = statuses
+        self.commands = []
+
+    async def _handle(self, reader, writer):
+        command = (await reader.read(1024)).decode("utf-8")
+        self.commands.append(command)
+        writer.write(self.statuses[command.partition(":")[2]].encode("utf-8"))
+        await writer.drain()
+        writer.close()
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *_exc):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+def closed_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_polls_fleet_emits_changes_metrics_and_history():
+    paths = ["C:\\PEKAT\\Line1", "C:\\PEKAT\\Line2"]
+
+    async def run():
+        async with FakeStation({paths[0]: "running", paths[1]: "stopped"}) as fake:
+            stations = [
+                Station("st-1", "127.0.0.1", fake.port, tuple(paths)),
+                Station("st-2", "127.0.0.1", closed_port(), ("C:\\PEKAT\\Spare",)),
+            ]
+            async with FleetMonitor(stations, concurrency=2, timeout_s=0.5, history=4) as monitor:
+                first = await monitor.poll_once()
+                unchanged = await monitor.poll_once()
+                fake.statuses[paths[1]] = "running"
+                changed = await monitor.poll_once()
+                return fake.commands, monitor, first, unchanged, changed, stations
+
+    commands, monitor, first, unchanged, changed, stations = asyncio.run(run())
+    assert all(command.startswith("status:") for command in commands) and len(commands) == 6
+    assert [(event.project, event.previous, event.current, event.up) for event in first] == [
+        (paths[0], None, "running", True),
+        (paths[1], None, "stopped", True),
+        ("C:\\PEKAT\\Spare", None, None, False),
+    ]
+    assert first[2].error and unchanged == []
+    assert [(event.previous, event.current) for event in changed] == [("stopped", "running")]
+
+    metrics = monitor.metrics()
+    assert 'pekat_project_up{station="st-1",project="C:\\\\PEKAT\\\\Line1"} 1' in metrics
+    assert 'pekat_project_up{station="st-2",project="C:\\\\PEKAT\\\\Spare"} 0' in metrics
+    assert 'pekat_project_status{station="st-1",project="C:\\\\PEKAT\\\\Line2",status="running"} 1' in metrics
+    assert 'pekat_status_changes_total{station="st-1",project="C:\\\\PEKAT\\\\Line2"} 1' in metrics
+    assert "# TYPE pekat_status_changes_total counter" in metrics and "pekat_fleet_cycles_total 3" in metrics
+
+    rows = monitor.history_rows()
+    assert len(rows) == 4 and monitor.history.nbytes == 4 * 17
+    assert sorted(row["status"] or "" for row in rows[-3:]) == ["", "running", "running"]
+    assert [row["up"] for row in rows[-3:]].count(False) == 1 and rows[0]["time"] <= rows[-1]["time"]
+    keep_alive = FleetMonitor(stations, terminator=b"\n")._client(stations[0])
+    assert keep_alive.terminator == b"\n" and monitor._client(stations[0]).terminator is None
+
+
+def test_ring_buffer_and_cli(tmp_path, capsys):
+    history = StatusHistory(3)
+    for index in range(5):
+        history.append(float(index), 0, index, True, 1.0)
+    assert history.rows()["status"].tolist() == [2, 3, 4] and len(history) == 3
+
+    async def serve(fleet, metrics):
+        async with FakeStation({"P1": "running"}) as fake:
+            fleet.write_text(json.dumps({"stations": [{"name": "a", "host": "127.0.0.1", "port": fake.port, "projects": ["P1"]}]}))
+            await asyncio.to_thread(main, [str(fleet), "--cycles", "2", "--interval", "0.01", "--metrics-file", str(metrics)])
+            return fake.commands
+
+    fleet, metrics = tmp_path / "fleet.json", tmp_path / "pekat.prom"
+    assert asyncio.run(serve(fleet, metrics)) == ["status:P1", "status:P1"]
+    events = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [(event["current"], event["up"]) for event in events] == [("running", True)]
+    assert 'pekat_project_up{station="a",project="P1"} 1' in metrics.read_text(encoding="utf-8")
+    assert load_fleet(fleet)[0] == Station("a", "127.0.0.1", load_fleet(fleet)[0].port, ("P1",))
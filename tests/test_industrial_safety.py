@@ -1,8 +1,10 @@
+import json
 from pathlib import Path
 
+import numpy as np
 import pytest
 
-from industrial_io_guard import decode_u16_be, extract_bits, guarded_write
+from industrial_io_guard import AuditLog, BitField, FieldMap, WriteBatch, decode_u16_be, extract_bits, guarded_write
 from projects_manager_tcp_demo import build_command, send_command
 from runtime_fingerprint import fingerprint_installation
 
@@ -25,6 +27,84 @@ def test_decode_guards():
         decode_u16_be(b"\x01", 0)
 
 
+def test_field_map_bulk_decode_matches_single_buffer_decode():
+    # O1D110 PDIn layout from the hardware reference; names here are placeholders.
+    pdin = FieldMap(
+        [
+            BitField("item_48", 48, 16, "int"),
+            BitField("item_16", 16, 16, "int"),
+            BitField("status", 4, 4),
+            BitField("bit_1", 1, kind="bool"),
+            BitField("bit_0", 0, kind="bool"),
+            BitField("odd", 7, 11, "int"),
+        ],
+        length=8,
+    )
+    sample = bytes([0xFF, 0xFE, 0, 0, 0x01, 0x2C, 0, 0b1010_0010])
+    assert pdin.decode_one(sample) == {"item_48": -2, "item_16": 300, "status": 10, "bit_1": True, "bit_0": False, "odd": 1}
+    buffers = np.random.default_rng(1).integers(0, 256, size=(500, 8), dtype=np.uint8)
+    decoded = pdin.decode(buffers)
+    assert decoded.dtype["item_48"] == np.int16 and decoded.dtype["bit_0"] == np.bool_
+    for index in (0, 17, 499):
+        assert {name: decoded[name][index].item() for name in decoded.dtype.names} == pdin.decode_one(buffers[index].tobytes())
+    assert np.array_equal(pdin.decode(buffers.tobytes()), decoded)
+    assert pdin.decode([sample, sample])["item_48"].tolist() == [-2, -2]
+    with pytest.raises(ValueError):
+        pdin.decode([sample, sample[:7]])
+    with pytest.raises(ValueError):
+        pdin.decode(sample + b"\x00")
+    with pytest.raises(ValueError):
+        pdin.decode_one(sample[:7])
+    with pytest.raises(ValueError):
+        FieldMap([BitField("late", 60, 8)], length=8)
+    with pytest.raises(ValueError):
+        FieldMap([BitField("flag", 0, 2, "bool")], length=1)
+
+
+def test_write_batch_merges_blocks_and_gates_whole_batch(tmp_path):
+    memory = bytearray(b"\x0f" * 16)
+    writes, reads = [], []
+
+    def writer(offset, data):
+        writes.append((offset, data))
+        memory[offset : offset + len(data)] = data
+
+    def reader(offset, length):
+        reads.append((offset, length))
+        return bytes(memory[offset : offset + length])
+
+    audit = AuditLog(tmp_path / "audit.jsonl")
+    batch = WriteBatch(writer, reader=reader, audit=audit)
+    batch.write_u16_be(0, 0x1234).write_bytes(2, b"\xaa").write_bit(3, 7, True).write_bit(3, 0, False)
+    batch.write_u16_be(10, 7).write_bit(0, 0, True)
+    dry = batch.commit()
+    assert dry["executed"] is False and dry["reason"] == "dry_run" and writes == reads == []
+    assert [(block["offset"], block["data"], block["mask"]) for block in dry["plan"]] == [
+        (0, "1334aa80", "ffffff81"),
+        (10, "0007", "ffff"),
+    ]
+    with pytest.raises(PermissionError):
+        batch.commit(dry_run=False)
+    assert writes == [] and len(batch) == 6
+    done = batch.commit(dry_run=False, approved=True)
+    assert done["executed"] is True and len(batch) == 0
+    assert writes == [(0, b"\x13\x34\xaa\x8e"), (10, b"\x00\x07")] and reads == [(0, 4)]
+    events = [record["event"] for record in audit.records]
+    assert events == ["planned", "dry_run", "planned", "rejected", "planned", "executed"]
+    assert audit.records[-1]["executed"][0]["seconds"] >= 0
+    lines = [json.loads(line) for line in (tmp_path / "audit.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert [line["event"] for line in lines] == events
+
+    with pytest.raises(ValueError):
+        WriteBatch(writer).write_bit(1, 2, True).commit()
+    with pytest.raises(ValueError):
+        WriteBatch(writer).write_u16_be(0, 70000)
+    failing = WriteBatch(lambda offset, data: 1 / 0, audit=audit).write_bytes(4, b"\x01")
+    with pytest.raises(ZeroDivisionError):
+        failing.commit(dry_run=False, approved=True)
+    assert audit.records[-1]["event"] == "failed" and audit.records[-1]["executed"] == []
+
+
 def test_projects_manager_mutation_requires_approval():
     assert build_command("status", r"C:\TEST\Project") == r"status:C:\TEST\Project"
     with pytest.raises(PermissionError):
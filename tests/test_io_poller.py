@@ -0,0 +1,98 @@
+import asyncio
+import time
+
+import pytest
+
+from industrial_io_guard import BitField, FieldMap
+from io_poller import IoPoller, Region, coalesce
+
+
+class FakeDevice:
+    def __init__(self, memory: bytes, delay_s: float = 0.0) -> None:
+        self.memory = memory
+        self.delay_s = delay_s
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+
+    def read(self, offset, length):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        self.calls.append((offset, length))
+        time.sleep(self.delay_s)
+        self.active -= 1
+        return self.memory[offset : offset + length]
+
+
+def test_coalesce_merges_adjacent_and_overlapping_regions():
+    regions = [Region("c", 20, 4, 1.0), Region("a", 0, 8, 1.0), Region("b", 8, 4, 1.0), Region("d", 22, 8, 1.0)]
+    blocks = coalesce(regions, max_gap=0, max_block=16)
+    assert [(offset, length, [region.name for region in members]) for offset, length, members in blocks] == [
+        (0, 12, ["a", "b"]),
+        (20, 10, ["c", "d"]),
+    ]
+    assert len(coalesce(regions, max_gap=8, max_block=64)) == 1
+    assert len(coalesce(regions, max_gap=0, max_block=8)) == 4
+
+
+def test_poller_coalesces_decodes_publishes_and_gates_writes():
+    pdin = FieldMap([BitField("level", 16, 16, "int"), BitField("ready", 0, kind="bool")], length=4)
+    fast = FakeDevice(bytes([0, 0, 0, 0, 0xFF, 0xF6, 0, 1, 9, 9]))
+    slow = FakeDevice(bytes(8), delay_s=0.06)
+    written = []
+
+    async def run():
+        poller = IoPoller()
+        poller.add_device("master", fast.read)
+        poller.add_region("master", "port1", 0, 4, 0.02)
+        poller.add_region("master", "port2", 4, 4, 0.02, field_map=pdin)
+        poller.add_region("master", "tail", 8, 2, 0.05)
+        poller.add_device("plc", slow.read, timeout_s=1.0)
+        poller.add_region("plc", "db1", 0, 8, 0.01)
+        samples = poller.subscribe()
+        lagging = poller.subscribe(maxsize=2)
+        async with poller:
+            await asyncio.sleep(0.2)
+            dry = await poller.write("plc", written.append, 1)
+            with pytest.raises(PermissionError):
+                await poller.write("plc", written.append, 1, dry_run=False)
+        received = [samples.get_nowait() for _ in range(samples.qsize())]
+        return poller, received, lagging.qsize(), dry
+
+    poller, received, lagging, dry = asyncio.run(run())
+    stats = poller.stats()
+    master = stats["devices"]["master"]
+    assert fast.calls[0] == (0, 10) and master["region_reads"] > master["reads"]
+    port2 = [sample for sample in received if sample.region == "port2"]
+    assert port2 and port2[0].values == {"level": -10, "ready": True} and port2[0].data == bytes([0xFF, 0xF6, 0, 1])
+    plc = stats["devices"]["plc"]
+    assert slow.peak == 1 and plc["overruns"] >= plc["reads"] and plc["reads"] <= 5
+    assert lagging == 2 and stats["dropped"] > 0
+    assert dry == {"executed": False, "reason": "dry_run"} and written == []
+
+
+def test_short_reads_and_timeouts_become_error_samples():
+    async def broken(offset, length):
+        return b"\x00"
+
+    async def hung(offset, length):
+        await asyncio.sleep(1.0)
+
+    async def run():
+        poller = IoPoller()
+        poller.add_device("short", broken)
+        poller.add_region("short", "r", 0, 4, 0.5)
+        poller.add_device("hung", hung, timeout_s=0.02)
+        poller.add_region("hung", "r", 0, 4, 0.5)
+        queue = poller.subscribe()
+        async with poller:
+            await asyncio.sleep(0.1)
+        return poller.stats(), [queue.get_nowait() for _ in range(queue.qsize())]
+
+    stats, samples = asyncio.run(run())
+    errors = {sample.device: sample.error for sample in samples}
+    assert errors["short"] == "ValueError: device buffer has 1 bytes, expected 4"
+    assert errors["hung"].startswith("TimeoutError") and stats["devices"]["hung"]["timeouts"] == 1
+    assert all(sample.data is None for sample in samples)
+    with pytest.raises(ValueError):
+        IoPoller().add_device("x", broken, max_block=0)
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+import requests
+
+from mock_pekat_server import MockPekatServer
+from rest_api_client_demo import AsyncPekatClient, PekatClient, PekatRestError
+
+PNG = b"\x89PNG\r\n\x1a\nmock"
+
+
+@pytest.mark.parametrize("chunked", [False, True])
+@pytest.mark.parametrize("response_type", ["image", "annotated_image", "heatmap"])
+@pytest.mark.parametrize("context_in_body", [False, True])
+def test_image_response_types_over_socket(response_type, context_in_body, chunked):
+    with MockPekatServer(image_size=50_000, chunked=chunked, chunk_size=4096) as server:
+        with PekatClient(server.host, server.port) as client:
+            buffered = client.analyze_png(PNG, response_type=response_type, context_in_body=context_in_body)
+            streamed = client.analyze_png(PNG, response_type=response_type, context_in_body=context_in_body, stream=True)
+    for result in (buffered, streamed):
+        assert len(result.image_bytes) == 50_000 and result.image_bytes.startswith(b"\x89PNG")
+        assert result.context["query"]["response_type"] == response_type
+
+
+def test_async_client_reads_chunked_context_and_ping():
+    async def run(server):
+        async with AsyncPekatClient(server.host, server.port) as client:
+            return await client.analyze_raw(b"\x00" * 6, height=2, width=3, response_type="heatmap")
+
+    with MockPekatServer(chunked=True, chunk_size=7, context_padding=100) as server:
+        result = asyncio.run(run(server))
+        assert requests.get(f"http://{server.host}:{server.port}/ping", timeout=(1.0, 1.0)).status_code == 200
+        stats = server.stats()
+    assert result.context["body_bytes"] == 6 and len(result.context["padding"]) == 100
+    assert stats["pings"] == 1 and stats["requests"] == 1
+
+
+def test_injected_errors_and_latency_are_reproducible():
+    with MockPekatServer(seed=7, error_rate=0.5, error_status=503, latency_s=0.001, jitter_s=0.001) as server:
+        with PekatClient(server.host, server.port) as client:
+            outcomes = []
+            for _ in range(20):
+                try:
+                    client.analyze_png(PNG)
+                    outcomes.append("ok")
+                except PekatRestError as exc:
+                    outcomes.append(exc.status)
+        injected = server.stats()["injected_errors"]
+    assert outcomes.count(503) == injected and 0 < injected < 20
+    with MockPekatServer(seed=7, error_rate=0.5, error_status=503) as server:
+        with PekatClient(server.host, server.port) as client:
+            replay = []
+            for _ in range(20):
+                try:
+                    client.analyze_png(PNG)
+                    replay.append("ok")
+                except PekatRestError as exc:
+                    replay.append(exc.status)
+    assert replay == outcomes
+    with pytest.raises(ValueError):
+        MockPekatServer(error_rate=2.0)
@@ -1,11 +1,28 @@
 import ast
+import errno
 import json
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 import pytest
 from jsonschema import validate as validate_schema
 
-from generate_code_module import ModuleSpec, ModuleSpecError
+import id_allocator
+from generate_code_module import (
+    ENTRYPOINT_CACHE,
+    STREAM_STRING_CHUNK,
+    EntrypointCache,
+    ModuleSpec,
+    ModuleSpecError,
+    build_batch,
+    entrypoint_cache_for,
+    expand_spec_paths,
+    iter_compact_json,
+    write_json_atomic,
+)
+from id_allocator import FileIdAllocator, SeededIdAllocator
 
 SOURCE = "def main(context, form=None):\n    values = form or {}\n    context['fixture_values'] = values\n"
 
@@ -63,3 +80,151 @@ def test_distributed_fixtures_match_contract():
 def test_modulespec_json_schema_accepts_all_form_types():
     schema_path = Path(__file__).resolve().parents[1] / ".github" / "skills" / "pekat-vision" / "references" / "module_spec.schema.json"
     validate_schema(mapping("4.0.1"), json.loads(schema_path.read_text(encoding="utf-8")))
+
+
+def test_batch_build_is_parallel_incremental_and_reports_failures(tmp_path):
+    specs = tmp_path / "specs"
+    specs.mkdir()
+    for index in range(3):
+        (specs / f"module_{index}.json").write_text(json.dumps({**mapping("3.19.3"), "label": f"M{index}"}), encoding="utf-8")
+    (specs / "broken.json").write_text(json.dumps({**mapping("3.19.3"), "source_code": "def main(:"}), encoding="utf-8")
+    out = tmp_path / "out"
+    paths = expand_spec_paths([str(specs)])
+    report = build_batch(paths, out, versions=["3.19.3", "4.0.1"], workers=2)
+    assert (report["built"], report["skipped"], report["failed"]) == (6, 0, 2)
+    assert {item["spec"] for item in report["failures"]} == {str(specs / "broken.json")}
+    assert "syntax error" in report["failures"][0]["error"]
+    ids = []
+    for path in sorted(out.glob("module_*")):
+        module = json.loads(path.read_text(encoding="utf-8"))["module"]
+        ids += [module["id"], *[item["id"] for item in module["form"]]]
+    assert len(ids) == 6 * 5 and len(set(ids)) == len(ids)
+
+    (specs / "module_1.json").write_text(json.dumps({**mapping("3.19.3"), "label": "changed"}), encoding="utf-8")
+    report = build_batch(paths, out, versions=["3.19.3", "4.0.1"], workers=2)
+    assert (report["built"], report["skipped"], report["failed"]) == (2, 4, 2)
+    assert json.loads((out / "module_1.ptool").read_text(encoding="utf-8"))["module"]["label"] == "changed"
+    assert build_batch(paths, out, versions=["4.0.1"], force=True)["built"] == 3
+    report = build_batch(paths, out, versions=["3.19.3", "4.0.1"])
+    assert (report["built"], report["skipped"], report["failed"]) == (0, 6, 2)
+
+    (out / "module_2.ptool").unlink()
+    other = tmp_path / "other"
+    other.mkdir()
+    (other / "module_0.json").write_text(json.dumps(mapping("3.19.3")), encoding="utf-8")
+    report = build_batch([specs / "module_0.json", other / "module_0.json"], out, versions=["3.19.3"])
+    assert (report["built"], report["skipped"], report["failed"]) == (0, 1, 1)
+    assert "same output name" in report["failures"][0]["error"]
+    manifest = json.loads((out / ".pekat-build-manifest.json").read_text(encoding="utf-8"))["entries"]
+    assert len(manifest) == 5 and not any(entry["output"].endswith("module_2.ptool") for entry in manifest.values())
+
+
+def test_entrypoint_cache_parses_identical_sources_once(tmp_path):
+    cache = EntrypointCache(max_entries=2, directory=tmp_path / "ast")
+    first = cache.analyze(SOURCE)
+    assert cache.analyze(SOURCE) is first and first.args == ("context", "form")
+    assert cache.analyze("def main(:\n").error_line == 1
+    cache.analyze("def main(context):\n    pass\n")
+    assert cache.stats() == {"hits": 1, "disk_hits": 0, "misses": 3, "evictions": 1, "entries": 2}
+    fresh = EntrypointCache(directory=tmp_path / "ast")
+    assert fresh.analyze(SOURCE) == first and fresh.stats()["disk_hits"] == 1
+
+    specs = tmp_path / "specs"
+    specs.mkdir()
+    for index in range(4):
+        (specs / f"m{index}.json").write_text(json.dumps({**mapping("4.0.1"), "label": f"M{index}"}), encoding="utf-8")
+    deep = {**mapping("4.0.1"), "source_code": "def main(context, form=None):\n    x = 1" + "+1" * 200000 + "\n"}
+    (specs / "deep.json").write_text(json.dumps(deep), encoding="utf-8")
+    report = build_batch(expand_spec_paths([str(specs)]), tmp_path / "out", ast_cache_dir=tmp_path / "shared")
+    assert report["built"] == 4 and report["ast_cache"]["misses"] <= 2
+    assert [item["error"].split(":")[0] for item in report["failures"]] == ["RecursionError"]
+    assert ENTRYPOINT_CACHE.directory is None and entrypoint_cache_for(tmp_path / "shared").directory is not None
+
+
+def _reserve_blocks(path):
+    allocator = FileIdAllocator(path)
+    return [allocator.reserve(3) for _ in range(50)]
+
+
+def test_id_blocks_never_collide_across_payloads_or_processes(tmp_path):
+    spec = ModuleSpec.from_mapping(mapping("4.0.1"))
+    ids = []
+    for _ in range(3):
+        module = spec.build_payload()["module"]
+        ids += [module["id"], *[item["id"] for item in module["form"]]]
+    assert len(ids) == len(set(ids)) == 15
+
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        blocks = [first for chunk in pool.map(_reserve_blocks, [tmp_path / "ids"] * 4) for first in chunk]
+    issued = [first + offset for first in blocks for offset in range(3)]
+    assert len(issued) == len(set(issued)) == 600
+
+
+def test_file_allocator_waits_for_the_lock_until_its_timeout(tmp_path, monkeypatch):
+    fcntl = pytest.importorskip("fcntl")
+    path = tmp_path / "ids"
+    with open(path, "a+b") as holder:
+        fcntl.flock(holder.fileno(), fcntl.LOCK_EX)
+        with pytest.raises(TimeoutError, match="ID allocator lock"):
+            FileIdAllocator(path, lock_timeout_s=0.1).reserve(3)
+        release = threading.Timer(0.2, fcntl.flock, (holder.fileno(), fcntl.LOCK_UN))
+        release.start()
+        assert FileIdAllocator(path, lock_timeout_s=5.0).reserve(3) > 0
+        release.join()
+
+    class FakeMsvcrt:
+        LK_NBLCK, LK_UNLCK = 2, 0
+
+        def __init__(self):
+            self.busy, self.calls = 3, []
+
+        def locking(self, _fd, mode, _length):
+            self.calls.append(mode)
+            if mode == self.LK_NBLCK and self.busy:
+                self.busy -= 1
+                raise OSError(errno.EACCES, "busy")
+
+    fake = FakeMsvcrt()
+    monkeypatch.setitem(sys.modules, "msvcrt", fake)
+    monkeypatch.setattr(id_allocator, "_WINDOWS", True)
+    monkeypatch.setattr(id_allocator, "LOCK_POLL_S", 0.001)
+    assert FileIdAllocator(path).reserve(1) > 0
+    assert fake.calls == [fake.LK_NBLCK] * 4 + [fake.LK_UNLCK]
+    fake.busy = 10**6
+    with pytest.raises(TimeoutError):
+        FileIdAllocator(path, lock_timeout_s=0.05).reserve(1)
+
+
+def test_seeded_batch_is_reproducible_and_incrementally_consistent(tmp_path):
+    specs = tmp_path / "specs"
+    specs.mkdir()
+    for index in range(3):
+        (specs / f"m{index}.json").write_text(json.dumps({**mapping("3.19.3"), "label": f"M{index}"}), encoding="utf-8")
+    paths = expand_spec_paths([str(specs)])
+
+    def build(out):
+        build_batch(paths, out, versions=["3.19.3", "4.0.1"], workers=2, allocator=SeededIdAllocator(1000))
+        return {path.name: path.read_bytes() for path in out.iterdir() if path.suffix in {".pmodule", ".ptool"}}
+
+    first = build(tmp_path / "a")
+    assert first == build(tmp_path / "b")
+    grown = mapping("3.19.3")
+    grown["form"] = grown["form"] + [{"type": "text", "formKey": "extra", "label": "Extra", "defaultValue": ""}]
+    (specs / "m0.json").write_text(json.dumps(grown), encoding="utf-8")
+    assert build(tmp_path / "a") == build(tmp_path / "clean")
+
+
+def test_streaming_writer_is_byte_identical_and_atomic(tmp_path):
+    tail = "x" * (STREAM_STRING_CHUNK - 1) + '\\"\u0001ž😀\n'
+    source = SOURCE + f"TABLE = {tail * 3!r}\n"
+    spec = ModuleSpec.from_mapping({**mapping("4.0.1"), "source_code": source})
+    payload = spec.build_payload(epoch_ms=1700000000000)
+    path = spec.write(tmp_path / "big", epoch_ms=1700000000000)
+    assert path.read_bytes() == json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    odd = {"nan": float("nan"), "nested": [1e16, -0.0, None, True, (1, "a")], 3: "int key", "s": "é\t"}
+    assert "".join(iter_compact_json(odd)) == json.dumps(odd, ensure_ascii=False, separators=(",", ":"))
+
+    before = path.read_bytes()
+    with pytest.raises(TypeError):
+        write_json_atomic(path, {"module": {"sourceCode": source, "bad": object()}})
+    assert path.read_bytes() == before and sorted(tmp_path.iterdir()) == [path]
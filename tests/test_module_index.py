@@ -0,0 +1,87 @@
+import json
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from generate_code_module import ModuleSpec, ModuleSpecError, load_export
+from module_index import ModuleIndex
+
+FIXTURES = Path(__file__).resolve().parents[1] / ".github" / "skills" / "pekat-vision" / "assets" / "fixtures"
+READER = """import numpy.linalg as la
+from collections import deque
+
+
+def main(context, form=None):
+    values = form or {}
+    rects = context.get("detectedRectangles", [])
+    context["count"] = len(rects)
+    if context["result"]:
+        context.setdefault("notes", [])
+"""
+
+
+def write(directory, name, source, *, version="4.0.1", form_key="threshold"):
+    spec = ModuleSpec.from_mapping(
+        {
+            "target_version": version,
+            "label": name.title(),
+            "source_code": source,
+            "form": [{"type": "number", "formKey": form_key, "label": "T", "defaultValue": 1}],
+        }
+    )
+    return spec.write(directory / name, epoch_ms=1700000000000)
+
+
+def test_index_queries_and_incremental_refresh(tmp_path):
+    archive = tmp_path / "archive"
+    shutil.copytree(FIXTURES, archive / "fixtures")
+    reader = write(archive, "reader", READER)
+    write(archive, "legacy", "def main(context, form=None):\n    context['count'] = 0\n", version="3.19.3", form_key="mode")
+    (archive / "broken.ptool").write_text("{not json", encoding="utf-8")
+    nul = json.loads(write(archive, "nul", READER).read_text(encoding="utf-8"))
+    nul["module"]["sourceCode"] += "\x00"
+    (archive / "nul.ptool").write_text(json.dumps(nul), encoding="utf-8")
+
+    with ModuleIndex(tmp_path / "index.sqlite") as index:
+        first = index.update([archive], workers=2)
+        assert (first["indexed"], first["invalid"], first["unchanged"]) == (6, 2, 0)
+        assert [row["label"] for row in index.query(reads="detectedRectangles")] == ["Reader"]
+        assert [Path(row["path"]).name for row in index.query(writes="count")] == ["legacy.pmodule", "reader.ptool"]
+        assert [row["label"] for row in index.query(imports="numpy", reads="detectedRectangles")] == ["Reader"]
+        assert index.query(imports="num") == []
+        assert {row["label"] for row in index.query(reads="result")} == {"Reader"}
+        assert {Path(row["path"]).name for row in index.query(writes="fixture_values")} == {
+            "form_types_3_19_3.pmodule",
+            "form_types_4_0_1.ptool",
+        }
+        assert len(index.query(form_key="mode")) == 3
+        assert len(index.query(form_key="mode", version="3.19.3")) == 2
+
+        second = index.update([archive])
+        assert (second["indexed"], second["unchanged"], second["removed"]) == (0, 6, 0)
+
+        write(archive, "reader", READER.replace("count", "total"))
+        os.utime(reader, ns=(reader.stat().st_atime_ns, reader.stat().st_mtime_ns + 10**9))
+        (archive / "broken.ptool").unlink()
+        third = index.update([archive])
+        assert (third["indexed"], third["unchanged"], third["removed"]) == (1, 4, 1)
+        assert [row["label"] for row in index.query(writes="total")] == ["Reader"]
+        assert [Path(row["path"]).name for row in index.query(writes="count")] == ["legacy.pmodule"]
+
+
+def test_exports_round_trip_to_module_spec():
+    for path in sorted(FIXTURES.iterdir()):
+        payload = json.loads(path.read_text(encoding="utf-8"))
+        spec = ModuleSpec.from_export(payload)
+        assert spec.module_id == payload["module"]["id"]
+        assert spec.build_payload(epoch_ms=payload["module"]["editDate"]) == payload
+        assert load_export(path) == spec
+
+
+def test_load_export_rejects_mismatched_extension(tmp_path):
+    renamed = tmp_path / "module.pmodule"
+    shutil.copy(FIXTURES / "form_types_4_0_1.ptool", renamed)
+    with pytest.raises(ModuleSpecError, match=r"4\.0\.1 exports use \.ptool"):
+        load_export(renamed)
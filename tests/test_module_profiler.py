@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from module_profiler import FrameProfile, check_budget, compile_entrypoint, load_module, main, profile_module, synthetic_frames
+
+LEAKY = """import numpy as np
+
+HISTORY = []
+
+
+def main(context, form=None):
+    values = form or {}
+    HISTORY.append(np.zeros(int(values.get("keep", 256)), dtype=np.uint8))
+    scratch = context["image"].astype(np.float32)
+    context["count"] = len(context["detectedRectangles"])
+    context["mean"] = float(scratch.mean())
+"""
+
+
+def test_profile_reports_latency_allocations_and_hotspots(tmp_path):
+    spec = {
+        "target_version": "4.0.1",
+        "label": "Leaky",
+        "source_code": LEAKY,
+        "form": [{"type": "number", "formKey": "keep", "label": "Keep", "defaultValue": 128}],
+        "form_values": {"keep": 1024},
+    }
+    path = tmp_path / "leaky.json"
+    path.write_text(json.dumps(spec), encoding="utf-8")
+    name, source, form = load_module(path)
+    assert (name, form) == ("Leaky", {"keep": 1024})
+    frames = synthetic_frames(FrameProfile(48, 64, 3, "uint8", 2, 2), 2)
+    assert frames[0]["image"].shape == (48, 64, 3) and len(frames[1]["detectedRectangles"]) == 2
+
+    report = profile_module(compile_entrypoint(source, name), frames, form=form, iterations=10, warmup=1, alloc_iterations=5)
+    latency = report["latency_ms"]
+    assert report["errors"] == {} and 0 < latency["p50"] <= latency["p95"] <= latency["max"]
+    allocations = report["allocations"]
+    assert allocations["peak_bytes_per_call"] >= 48 * 64 * 3 * 4
+    assert allocations["retained_bytes"] >= 5 * 1024
+    assert allocations["retained_sites"][0]["location"] == "<pekat-module Leaky>:8"
+    assert any(row["location"] == "<pekat-module Leaky>:6" and row["calls_per_frame"] == 1 for row in report["hotspots"])
+    assert check_budget(report, p95_ms=10_000, peak_mb=1) == []
+    assert check_budget(report, retained_kb=1) == [f"retained {allocations['retained_bytes'] / 1024:.1f} KB > 1 KB"]
+
+
+def test_cli_counts_errors_and_single_argument_main(tmp_path, capsys):
+    path = tmp_path / "flaky.py"
+    path.write_text("def main(context):\n    if context['detectedRectangles']:\n        raise KeyError('x')\n", encoding="utf-8")
+    argv = [str(path), "--height", "16", "--width", "16", "--channels", "0", "--dtype", "uint16", "--iterations", "4"]
+    assert main([*argv, "--rectangles", "0", "0", "--budget-p95-ms", "1000"]) == 0
+    report = json.loads(capsys.readouterr().out)
+    assert report["frame"]["shape"] == [16, 16] and report["budget_violations"] == []
+    assert main([*argv, "--rectangles", "1", "1"]) == 1
+    report = json.loads(capsys.readouterr().out)
+    assert report["errors"] == {"KeyError": 4} and report["budget_violations"] == ["main raised 4 time(s): KeyError: 'x'"]
+    with pytest.raises(ValueError):
+        synthetic_frames(FrameProfile(min_rectangles=3, max_rectangles=1), 1)
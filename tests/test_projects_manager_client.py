@@ -0,0 +1,185 @@
+import asyncio
+
+import pytest
+
+from projects_manager_tcp_demo import AsyncProjectsManagerClient
+
+
+class FakeProjectsManager:
+    """Localhost stand-in; replies ``running:<path>`` (or a long body) in several chunks."""
+
+    def __init__(self, *, keep_open: bool, terminator: bytes = b"", long_reply: int = 0) -> None:
+        self.keep_open = keep_open
+        self.terminator = terminator
+        self.long_reply = long_reply
+        self.commands: list[str] = []
+        self.connections = 0
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                data = await reader.read(1024)
+                if not data:
+                    break
+                command = data.decode("utf-8")
+                self.commands.append(command)
+                reply = ("x" * self.long_reply if self.long_reply else f"running:{command.partition(':')[2]}").encode()
+                reply += self.terminator
+                step = 7 if len(reply) < 100 else 300
+                for start in range(0, len(reply), step):
+                    writer.write(reply[start : start + step])
+                    await writer.drain()
+                    await asyncio.sleep(0.002)
+                if not self.keep_open:
+                    break
+        finally:
+            writer.close()
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *_exc):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+def test_pooled_status_queries_are_framed_and_cached():
+    now = [0.0]
+    paths = [f"C:\\PEKAT\\Project{index}" for index in range(20)]
+
+    async def run():
+        async with FakeProjectsManager(keep_open=True, terminator=b"\n") as server:
+            client = AsyncProjectsManagerClient(
+                "127.0.0.1", server.port, max_connections=4, terminator=b"\n", clock=lambda: now[0]
+            )
+            async with client:
+                first = await client.status_many(paths + paths[:3])
+                cached = await client.status_many(paths)
+                now[0] += 5.0
+                fresh = await client.status(paths[0])
+                stats = client.stats()
+            return server, first, cached, fresh, stats
+
+    server, first, cached, fresh, stats = asyncio.run(run())
+    assert list(first) == paths and first[paths[7]] == f"running:{paths[7]}"
+    assert cached == first and fresh == f"running:{paths[0]}"
+    assert len(server.commands) == 21 and server.connections <= 4
+    assert stats["cache_hits"] == 20 and stats["reused"] >= 17 and stats["connections_opened"] == server.connections
+
+
+def test_close_and_idle_framing_mutation_gate_and_oversize():
+    async def run():
+        async with FakeProjectsManager(keep_open=False) as closing:
+            async with AsyncProjectsManagerClient("127.0.0.1", closing.port) as client:
+                assert await client.status("P1") == "running:P1"
+                with pytest.raises(PermissionError):
+                    await client.command("stop", "P1")
+                assert closing.commands == ["status:P1"]
+                assert await client.command("stop", "P1", allow_mutation=True) == "running:P1"
+                assert await client.status("P1") == "running:P1"
+                assert closing.connections == 3 and client.stats()["reused"] == 0
+        async with FakeProjectsManager(keep_open=True, long_reply=1000) as idle:
+            async with AsyncProjectsManagerClient("127.0.0.1", idle.port, idle_s=0.05) as client:
+                assert await client.status("P2") == "x" * 1000
+                assert await client.status("P3") == "x" * 1000
+                assert idle.connections == 2 and client.stats()["idle_connections"] == 0
+            async with AsyncProjectsManagerClient("127.0.0.1", idle.port, max_response=256) as client:
+                results = await client.status_many(["P4"])
+                assert isinstance(results["P4"], RuntimeError)
+
+    asyncio.run(run())
+
+
+class ScriptedServer:
+    """Serves ``replies[n]`` for the n-th command on each connection; ``None`` closes without replying."""
+
+    def __init__(self, replies, *, tail_delay_s: float = 0.0) -> None:
+        self.replies = replies
+        self.tail_delay_s = tail_delay_s
+        self.commands: list[str] = []
+        self.connections = 0
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            for reply in self.replies:
+                data = await reader.read(1024)
+                if not data:
+                    break
+                command = data.decode("utf-8")
+                self.commands.append(command)
+                if reply is None:
+                    break
+                head, _, tail = reply.format(path=command.partition(":")[2]).partition("|")
+                writer.write(head.encode())
+                await writer.drain()
+                if tail:
+                    await asyncio.sleep(self.tail_delay_s)
+                    writer.write(tail.encode())
+                    await writer.drain()
+        finally:
+            writer.close()
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *_exc):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+def test_stale_keepalive_retries_status_but_never_mutations():
+    async def run():
+        async with ScriptedServer(["running:{path}\n", None]) as server:
+            async with AsyncProjectsManagerClient("127.0.0.1", server.port, terminator=b"\n") as client:
+                assert await client.status("P1") == "running:P1"
+                assert await client.status("P2") == "running:P2"
+                assert server.commands == ["status:P1", "status:P2", "status:P2"]
+                assert client.stats()["idle_connections"] == 1
+                assert await client.command("stop", "P2", allow_mutation=True) == "running:P2"
+                assert server.commands.count("stop:P2") == 1 and server.connections == 3
+                assert client.stats()["idle_connections"] == 1
+        async with ScriptedServer([None]) as server:
+            async with AsyncProjectsManagerClient("127.0.0.1", server.port, terminator=b"\n") as client:
+                with pytest.raises(RuntimeError):
+                    await client.command("stop", "P1", allow_mutation=True)
+                assert server.commands == ["stop:P1"]
+
+    asyncio.run(run())
+
+
+def test_idle_framed_tail_never_leaks_into_next_reply_and_deadline_ignores_clock():
+    async def run():
+        async with ScriptedServer(["running:{path}|:late-tail", "running:{path}"], tail_delay_s=0.15) as server:
+            async with AsyncProjectsManagerClient("127.0.0.1", server.port, idle_s=0.05) as client:
+                assert await client.status("P1") == "running:P1"
+                assert await client.status("P2") == "running:P2"
+                assert server.connections == 2
+        async with ScriptedServer(["", "", ""]) as silent:
+            client = AsyncProjectsManagerClient("127.0.0.1", silent.port, timeout_s=0.2, clock=lambda: 0.0)
+            async with client:
+                started = asyncio.get_running_loop().time()
+                with pytest.raises(TimeoutError, match="reply timed out"):
+                    await asyncio.wait_for(client.status("P1"), 2.0)
+                assert asyncio.get_running_loop().time() - started < 1.0
+                results = await asyncio.wait_for(client.status_many(["P1"]), 2.0)
+                assert isinstance(results["P1"], TimeoutError)
+
+    asyncio.run(run())
+
+
+def test_concurrent_cold_status_calls_share_one_query():
+    async def run():
+        async with FakeProjectsManager(keep_open=True, terminator=b"\n") as server:
+            async with AsyncProjectsManagerClient("127.0.0.1", server.port, terminator=b"\n") as client:
+                results = await asyncio.gather(*(client.status("P1") for _ in range(5)))
+                return server.commands, results, client.stats()
+
+    commands, results, stats = asyncio.run(run())
+    assert commands == ["status:P1"] and results == ["running:P1"] * 5
+    assert stats["cache_misses"] == 1 and stats["coalesced"] == 4
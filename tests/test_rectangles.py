@@ -0,0 +1,64 @@
+import numpy as np
+
+from rectangles import clip, crop_stack, crop_views, label_ids, select, to_array
+
+
+def detections():
+    return [
+        {"x": 10, "y": 5, "width": 20, "height": 10, "classNames": [{"label": "scratch", "confidence": 0.9}]},
+        {"x": -5, "y": 50, "width": 15, "height": 30, "label": "dent", "confidence": 0.4},
+        "not a rectangle",
+        {"x": 90, "y": 90, "width": 50, "height": 50, "className": "scratch"},
+        {"x": "bad", "y": 0, "width": 1, "height": 1},
+        {"x": 200, "y": 0, "width": 5, "height": 5, "classNames": [{"label": "dent", "confidence": 0.99}]},
+    ]
+
+
+def test_structured_array_filters_and_clips():
+    context = {"detectedRectangles": detections(), "result": True}
+    rects, labels = to_array(context["detectedRectangles"])
+    assert labels == ["scratch", "dent"]
+    assert rects["index"].tolist() == [0, 1, 3, 5] and rects["label"].tolist() == [0, 1, 0, 1]
+    assert np.isnan(rects["confidence"][2])
+    scratches = select(rects, labels=label_ids(labels, ["scratch"]))
+    assert scratches["index"].tolist() == [0, 3]
+    assert select(rects, min_confidence=0.5)["index"].tolist() == [0, 5]
+    assert select(rects, min_area=300, max_area=500)["index"].tolist() == [1]
+    clipped = clip(rects, 100, 120)
+    assert clipped["index"].tolist() == [0, 1, 3]
+    assert clipped[["x", "width"]].tolist() == [(10, 20), (0, 10), (90, 30)]
+    assert clipped["height"].tolist() == [10, 30, 10]
+    assert context["result"] is True and len(context["detectedRectangles"]) == 6
+    stable, labels = to_array([{"label": "dent"}], labels=["scratch", "dent"])
+    assert stable["label"].tolist() == [1] and labels == ["scratch", "dent"]
+    assert len(to_array(None)[0]) == 0
+
+
+def test_to_array_skips_non_finite_and_out_of_range_geometry():
+    rects, labels = to_array(
+        [
+            {"x": float("nan"), "y": 0, "width": 1, "height": 1, "label": "nan"},
+            {"x": 0, "y": float("inf"), "width": 1, "height": 1},
+            {"x": 0, "y": 0, "width": -float("inf"), "height": 1},
+            {"x": 0, "y": 0, "width": 2**31, "height": 1},
+            {"x": -(2**31) - 1, "y": 0, "width": 1, "height": 1},
+            {"x": 3.7, "y": 0, "width": 2**31 - 1, "height": 1, "label": "ok"},
+        ]
+    )
+    assert rects["index"].tolist() == [5] and rects["label"].tolist() == [1]
+    assert rects[["x", "width"]].tolist() == [(3, 2**31 - 1)] and labels == ["nan", "ok"]
+
+
+def test_crop_views_share_memory_and_stack_reuses_buffer():
+    image = np.arange(100 * 120 * 3, dtype=np.uint8).reshape(100, 120, 3)
+    rects, _ = to_array(detections())
+    views = crop_views(image, rects)
+    assert [view.shape for view in views] == [(10, 20, 3), (30, 10, 3), (10, 30, 3)]
+    assert all(np.shares_memory(view, image) for view in views)
+    stack = crop_stack(image, rects)
+    assert stack.shape == (3, 30, 30, 3) and not np.shares_memory(stack, image)
+    assert np.array_equal(stack[1, :30, :10], image[50:80, 0:10]) and not stack[1, :, 10:].any()
+    again = crop_stack(image, rects[:2], (30, 30), out=stack)
+    assert again.shape == (2, 30, 30, 3) and np.shares_memory(again, stack)
+    assert np.array_equal(again[0, :10, :20], image[5:15, 10:30])
+    assert crop_stack(image, rects, (8, 8)).shape == (3, 8, 8, 3)
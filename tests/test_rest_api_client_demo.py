@@ -1,18 +1,38 @@
+import asyncio
 import base64
+import io
 import json
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import Mock
 
+import numpy as np
 import pytest
 import requests
 
-from rest_api_client_demo import PekatRestError, _build_url, analyze_png, parse_response
+from mock_pekat_server import MockPekatServer
+from rest_api_client_demo import (
+    AsyncPekatClient,
+    PekatClient,
+    PekatRestError,
+    Result,
+    ResultCache,
+    _build_url,
+    analyze_png,
+    analyze_raw,
+    encode_png,
+    parse_response,
+    parse_response_stream,
+)
 
 PNG = b"\x89PNG\r\n\x1a\nmock"
 
 
-def response(*, payload=None, content=b"", headers=None):
+def response(*, payload=None, content=b"", headers=None, chunk=4):
     item = Mock()
     item.content = content
+    item.iter_content.side_effect = lambda size: (content[index : index + chunk] for index in range(0, len(content), chunk))
     item.headers = headers or {}
     item.json.return_value = payload
     item.raise_for_status.return_value = None
@@ -36,8 +56,9 @@ def test_png_binary_contract_and_success():
 def test_transport_failures(error, message):
     session = Mock()
     session.post.side_effect = error
-    with pytest.raises(PekatRestError, match=message):
+    with pytest.raises(PekatRestError, match=message) as caught:
         analyze_png(PNG, session=session)
+    assert caught.value.cause == ("timeout" if message == "timed out" else "unavailable")
 
 
 def test_http_error():
@@ -45,8 +66,9 @@ def test_http_error():
     item.status_code = 503
     item.raise_for_status.side_effect = requests.HTTPError(response=item)
     session = Mock(post=Mock(return_value=item))
-    with pytest.raises(PekatRestError, match="503"):
+    with pytest.raises(PekatRestError, match="503") as caught:
         analyze_png(PNG, session=session)
+    assert (caught.value.cause, caught.value.status) == ("http", 503)
 
 
 def test_invalid_json():
@@ -65,3 +87,210 @@ def test_response_modes_and_url_encoding():
     assert parsed.context == context
     url = _build_url("localhost", 8080, "analyze_raw_image", data="line A", extra_query={"height": 10, "width": 20})
     assert "data=line+A" in url and "height=10" in url and "width=20" in url
+
+
+def test_client_reuses_one_keep_alive_connection():
+    with MockPekatServer() as server, PekatClient(server.host, server.port, pool_maxsize=2) as client:
+        for _ in range(5):
+            assert client.analyze_png(PNG, data="line A").context["query"]["data"] == "line A"
+        raw = client.analyze_raw(b"\x00" * 12, height=2, width=2)
+        assert raw.context["endpoint"] == "analyze_raw_image" and raw.context["body_bytes"] == 12
+        stats = client.stats()
+    assert server.connections == 1
+    assert stats["connections_opened"] == 1
+    assert stats["latency"]["count"] == 6 and stats["latency"]["errors"] == 0
+
+
+def test_client_counts_connections_opened_by_its_pool():
+    with MockPekatServer(latency_s=0.05) as server, PekatClient(server.host, server.port, pool_maxsize=3) as client:
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            list(pool.map(lambda _: client.analyze_png(PNG), range(6)))
+        opened = client.connections_opened()
+    assert 1 < opened <= 3 and opened == server.connections
+    assert PekatClient(session=Mock()).connections_opened() == 0
+
+
+def test_client_counts_failed_requests():
+    with MockPekatServer() as server:
+        port = server.port
+    with PekatClient("127.0.0.1", port, timeout=(0.5, 0.5)) as client:
+        with pytest.raises(PekatRestError, match="unavailable"):
+            client.analyze_png(PNG)
+        assert client.stats()["latency"]["errors"] == 1
+
+
+def test_async_client_bounds_in_flight_requests():
+    async def run(server):
+        async with AsyncPekatClient(server.host, server.port, max_in_flight=3) as client:
+            frames = [client.analyze_png(PNG, data=f"camera {index}") for index in range(8)]
+            frames += [client.analyze_raw(b"\x00" * 4, height=2, width=2)]
+            results = await asyncio.gather(*frames)
+            return results, client.stats()
+
+    with MockPekatServer(latency_s=0.02) as server:
+        results, stats = asyncio.run(run(server))
+    assert [item.context["query"].get("data") for item in results[:8]] == [f"camera {index}" for index in range(8)]
+    assert results[8].context["query"]["height"] == "2"
+    assert stats["peak_in_flight"] == 3
+    assert stats["connections_opened"] <= 3 and server.connections == stats["connections_opened"]
+    assert stats["latency"]["count"] == 9 and stats["latency"]["errors"] == 0
+
+
+def test_async_client_normalizes_timeouts():
+    async def run(server):
+        async with AsyncPekatClient(server.host, server.port, timeout=(0.5, 0.05)) as client:
+            with pytest.raises(PekatRestError, match="timed out"):
+                await client.analyze_png(PNG)
+            return client.stats()
+
+    with MockPekatServer(latency_s=1.0) as server:
+        stats = asyncio.run(run(server))
+    assert stats["latency"]["errors"] == 1 and stats["in_flight"] == 0
+
+
+def test_raw_numpy_frames_are_posted_without_copy():
+    frame = np.zeros((4, 6, 3), dtype=np.uint8)
+    session = Mock()
+    session.post.return_value = response(payload={"result": True})
+    analyze_raw(frame, session=session)
+    args, kwargs = session.post.call_args
+    assert kwargs["data"].obj is frame and kwargs["data"].nbytes == frame.nbytes
+    assert "height=4" in args[0] and "width=6" in args[0]
+    with pytest.raises(ValueError, match="C-contiguous"):
+        analyze_raw(frame[:, ::2], session=session)
+    with pytest.raises(ValueError, match="uint8"):
+        analyze_raw(frame.astype(np.uint16), session=session)
+    with pytest.raises(ValueError, match="do not match"):
+        analyze_raw(frame, height=5, session=session)
+    with pytest.raises(ValueError, match="non-empty"):
+        analyze_raw(memoryview(frame.tobytes()), session=session)
+
+
+def test_raw_buffer_upload_over_socket():
+    frame = np.arange(2 * 3 * 3, dtype=np.uint8).reshape(2, 3, 3)
+    with MockPekatServer() as server, PekatClient(server.host, server.port) as client:
+        result = client.analyze_raw(frame)
+        flat = client.analyze_raw(memoryview(frame).cast("B"), height=2, width=3)
+    assert result.context["body_bytes"] == flat.context["body_bytes"] == frame.nbytes
+    assert result.context["query"] == {"response_type": "context", "height": "2", "width": "3"}
+
+
+def test_streamed_context_in_body_is_split_without_buffering_the_body():
+    context = json.dumps({"result": True, "label": "žluťoučký"}).encode("utf-8")
+    item = response(content=b"IMAGEDATA" + context, headers={"ImageLen": "9"}, chunk=5)
+    parsed = parse_response_stream(item, "annotated_image", True)
+    assert isinstance(parsed.image_bytes, bytearray) and parsed.image_bytes == b"IMAGEDATA"
+    assert parsed.context == {"result": True, "label": "žluťoučký"}
+    assert parse_response(item, "annotated_image", True) == parsed
+
+    sink = io.BytesIO()
+    assert parse_response_stream(item, "annotated_image", True, image_sink=sink).image_bytes is None
+    assert sink.getvalue() == b"IMAGEDATA"
+    with pytest.raises(PekatRestError, match="max_context_bytes"):
+        parse_response_stream(item, "annotated_image", True, max_context_bytes=8)
+    with pytest.raises(PekatRestError, match="ImageLen exceeds"):
+        parse_response_stream(response(content=b"IMG", headers={"ImageLen": "9"}), "image", True)
+
+
+def test_streaming_mode_closes_response_and_writes_sink():
+    encoded = base64.b64encode(b'{"result": false}').decode()
+    item = response(content=b"heatmap-bytes", headers={"ContextBase64utf": encoded, "Content-Length": "13"})
+    session = Mock(post=Mock(return_value=item))
+    sink = io.BytesIO()
+    result = analyze_png(PNG, response_type="heatmap", session=session, image_sink=sink)
+    assert result.context == {"result": False} and sink.getvalue() == b"heatmap-bytes"
+    assert session.post.call_args.kwargs["stream"] is True
+    item.close.assert_called_once()
+
+
+def decode_png(png):
+    assert png.startswith(b"\x89PNG\r\n\x1a\n")
+    offset, chunks = 8, {}
+    while offset < len(png):
+        length, tag = struct.unpack(">I4s", png[offset : offset + 8])
+        chunks[tag] = png[offset + 8 : offset + 8 + length]
+        offset += 12 + length
+    width, height, depth, color = struct.unpack(">IIBB", chunks[b"IHDR"][:10])
+    channels = {0: 1, 4: 2, 2: 3, 6: 4}[color]
+    stride = width * channels * depth // 8
+    raw = np.frombuffer(zlib.decompress(chunks[b"IDAT"]), dtype=np.uint8).reshape(height, stride + 1)
+    rows = raw[:, 1:].astype(np.int64)
+    step = channels * depth // 8
+    for index in range(height):
+        if raw[index, 0] == 1:
+            for column in range(step, stride):
+                rows[index, column] = (rows[index, column] + rows[index, column - step]) % 256
+        elif raw[index, 0] == 2 and index:
+            rows[index] = (rows[index] + rows[index - 1]) % 256
+    pixels = rows.astype(np.uint8)
+    if depth == 16:
+        pixels = pixels.view(">u2")
+    return pixels.reshape(height, width, channels)
+
+
+@pytest.mark.parametrize("png_filter", ["none", "sub", "up"])
+@pytest.mark.parametrize("shape", [(5, 7), (5, 7, 3), (4, 3, 4)])
+def test_encode_png_round_trips_pixels(png_filter, shape):
+    frame = np.random.default_rng(3).integers(0, 256, size=shape, dtype=np.uint8)
+    decoded = decode_png(encode_png(frame, level=1, png_filter=png_filter))
+    assert np.array_equal(decoded.reshape(frame.shape), frame)
+    wide = (frame.astype(np.uint16) * 257)[..., :1] if frame.ndim == 3 else frame.astype(np.uint16) * 257
+    assert np.array_equal(decode_png(encode_png(wide, png_filter=png_filter)).reshape(wide.shape), wide)
+    with pytest.raises(ValueError):
+        encode_png(frame.astype(np.float32))
+
+
+def test_array_pipeline_reports_timing_and_switches_to_raw():
+    frames = [np.full((64, 64, 3), index, dtype=np.uint8) for index in range(6)]
+    with MockPekatServer() as server, PekatClient(server.host, server.port) as client:
+        result, timing = client.analyze_array(frames[0], data="line A")
+        assert result.context["endpoint"] == "analyze_image" and result.context["query"]["data"] == "line A"
+        assert timing.mode == "png" and timing.payload_bytes < timing.raw_bytes and timing.encode_s > 0
+        assert timing.server_s is None and timing.transfer_s is None
+        ordered = list(client.iter_analyze_arrays(frames, mode="raw", encode_workers=2))
+        assert [item[0].context["body_bytes"] for item in ordered] == [frames[0].nbytes] * 6
+        assert [item[1].mode for item in ordered] == ["raw"] * 6
+        client._link.bytes_per_s, client._link.encode_s_per_byte, client._link.png_ratio = 1e12, 1.0, 0.5
+        assert client.analyze_array(frames[1], mode="auto")[1].mode == "raw"
+        client._link.bytes_per_s, client._link.encode_s_per_byte = 1.0, 1e-12
+        assert client.analyze_array(frames[1], mode="auto")[1].mode == "png"
+
+
+def test_auto_mode_measures_the_link_only_when_server_time_is_known():
+    frame = np.zeros((64, 64, 3), dtype=np.uint8)
+    with MockPekatServer(latency_s=0.05) as server, PekatClient(server.host, server.port) as client:
+        for _ in range(3):
+            assert client.analyze_array(frame, mode="auto")[1].mode == "png"
+        assert client._link.bytes_per_s is None and client._link.encode_s_per_byte is not None
+    with MockPekatServer(latency_s=0.05, complete_time=True) as server, PekatClient(server.host, server.port) as client:
+        _, timing = client.analyze_array(frame, mode="auto")
+        assert timing.server_s == pytest.approx(0.05) and timing.transfer_s < timing.round_trip_s - 0.04
+        assert client._link.bytes_per_s == pytest.approx(timing.payload_bytes / timing.transfer_s)
+
+
+def test_result_cache_answers_identical_frames_locally():
+    cache = ResultCache(max_entries=8)
+    with MockPekatServer() as server, PekatClient(server.host, server.port, cache=cache) as client:
+        first = client.analyze_png(PNG, response_type="image", data="line A")
+        first.context["result"] = False
+        again = client.analyze_png(PNG, response_type="image", data="line A")
+        client.analyze_png(PNG, response_type="image", data="line B")
+        client.analyze_raw(np.zeros((2, 3), dtype=np.uint8))
+        client.analyze_raw(np.zeros((3, 2), dtype=np.uint8))
+        client.analyze_raw(np.zeros((2, 3), dtype=np.uint8))
+        client.analyze_png(PNG, response_type="image", data="line A", use_cache=False)
+        stats = client.stats()["cache"]
+    assert again.context["result"] is True and again.image_bytes == first.image_bytes
+    assert server.requests == 5
+    assert (stats["hits"], stats["misses"], stats["bypassed"], stats["entries"]) == (2, 4, 1, 4)
+
+
+def test_result_cache_evicts_by_bytes_and_expires():
+    now = [0.0]
+    cache = ResultCache(max_entries=8, max_bytes=10, ttl_s=1.0, clock=lambda: now[0])
+    cache.put(b"a", Result(b"123456", {}))
+    cache.put(b"b", Result(b"123456", {}))
+    assert cache.get(b"a") is None and cache.get(b"b") is not None
+    now[0] = 1.0
+    assert cache.get(b"b") is None
+    assert cache.stats() == {"hits": 1, "misses": 2, "evictions": 1, "expired": 1, "bypassed": 0, "entries": 0, "bytes": 0}
@@ -0,0 +1,128 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from mock_pekat_server import MockPekatServer
+from rest_api_client_demo import PekatClient, PekatRestError, Result
+from rest_balancer import PekatBalancer
+
+PNG = b"\x89PNG\r\n\x1a\nmock"
+
+
+def clients(*servers):
+    return [PekatClient(server.host, server.port, timeout=(0.5, 2.0)) for server in servers]
+
+
+def test_least_outstanding_spreads_and_ewma_prefers_fast_instance():
+    servers = [MockPekatServer(latency_s=0.05).start() for _ in range(3)]
+    try:
+        with PekatBalancer(clients(*servers)) as balancer, ThreadPoolExecutor(6) as pool:
+            list(pool.map(lambda _: balancer.analyze_png(PNG), range(12)))
+        assert sum(server.requests for server in servers) == 12 and min(server.requests for server in servers) >= 3
+    finally:
+        for server in servers:
+            server.stop()
+    with MockPekatServer(latency_s=0.03) as slow, MockPekatServer() as fast:
+        with PekatBalancer(clients(slow, fast), policy="ewma") as balancer:
+            for _ in range(20):
+                balancer.analyze_png(PNG)
+        assert fast.requests >= 17 and slow.requests <= 3
+
+
+def closed_port():
+    server = MockPekatServer().start()
+    server.stop()
+    return server.port
+
+
+def test_unhealthy_instance_is_ejected_and_readmitted():
+    now = [0.0]
+    port = closed_port()
+    with MockPekatServer() as healthy:
+        down = PekatClient("127.0.0.1", port, timeout=(0.5, 0.5))
+        balancer = PekatBalancer(clients(healthy) + [down], eject_after=2, readmit_after_s=10.0, clock=lambda: now[0])
+        with balancer:
+            failures = 0
+            for _ in range(6):
+                try:
+                    balancer.analyze_png(PNG)
+                except PekatRestError as exc:
+                    failures += 1
+                    assert exc.cause == "unavailable"
+            assert failures == 2
+            assert [item["healthy"] for item in balancer.snapshot()] == [True, False]
+            with MockPekatServer(port) as restarted:
+                assert list(balancer.check_health().values()) == [True, False]
+                now[0] = 10.0
+                assert list(balancer.check_health().values()) == [True, True]
+                for _ in range(6):
+                    balancer.analyze_png(PNG)
+                assert restarted.requests > 0
+
+
+def test_failover_retries_transport_errors_on_another_instance():
+    with MockPekatServer() as healthy:
+        down = PekatClient("127.0.0.1", closed_port(), timeout=(0.5, 0.5))
+        with PekatBalancer(clients(healthy) + [down], failover=True) as balancer:
+            assert all(balancer.analyze_png(PNG).context["result"] for _ in range(4))
+        assert healthy.requests == 4
+
+
+class GatedClient:
+    """In-process stand-in whose calls block until the test opens that request's gate."""
+
+    def __init__(self, name, gates, entered, error=None):
+        self.host, self.port = name, 0
+        self.gates = gates
+        self.entered = entered
+        self.error = error
+
+    def analyze_png(self, png_bytes, *, data=None, **_kwargs):
+        if self.error is not None:
+            raise self.error
+        self.entered.append(int(data))
+        assert self.gates[int(data)].wait(5.0)
+        return Result(None, {"query": {"data": data}})
+
+    def close(self):
+        pass
+
+
+def test_camera_requests_complete_in_call_order():
+    gates = [threading.Event() for _ in range(10)]
+    entered, completed, lock = [], [], threading.Lock()
+    balancer = PekatBalancer([GatedClient("a", gates, entered), GatedClient("b", gates, entered)])
+
+    def send(index):
+        result = balancer.analyze_png(PNG, camera="cam-1", data=str(index))
+        with lock:
+            completed.append(int(result.context["query"]["data"]))
+
+    threads = []
+    for index in range(10):
+        threads.append(threading.Thread(target=send, args=(index,)))
+        threads[-1].start()
+        sequencer = balancer._sequencers.get("cam-1")
+        while sequencer is None or sequencer._next_ticket <= index:  # wait until this request holds its ticket
+            time.sleep(0.001)
+            sequencer = balancer._sequencers.get("cam-1")
+    for gate in reversed(gates):
+        gate.set()
+    for thread in threads:
+        thread.join(5.0)
+    assert entered == list(range(10)) and completed == list(range(10))
+
+
+def test_local_errors_release_outstanding_requests():
+    broken = GatedClient("a", [], [], error=ValueError("bad frame"))
+    with PekatBalancer([broken, GatedClient("b", [], [], error=KeyError("decode"))], failover=True) as balancer:
+        for _ in range(4):
+            with pytest.raises((ValueError, KeyError)):
+                balancer.analyze_png(PNG)
+        with pytest.raises(ValueError, match="binary PNG"):
+            balancer.analyze_png(b"not a png")
+        snapshot = balancer.snapshot()
+    assert [item["outstanding"] for item in snapshot] == [0, 0]
+    assert sum(item["requests"] for item in snapshot) == 4 and all(item["healthy"] for item in snapshot)
@@ -0,0 +1,40 @@
+import json
+
+import numpy as np
+
+from mock_pekat_server import MockPekatServer
+from rest_api_client_demo import PekatClient
+from rest_replay_bench import load_frames, main, percentile, replay
+
+PNG = b"\x89PNG\r\n\x1a\nmock"
+
+
+def frames_dir(tmp_path):
+    (tmp_path / "a.png").write_bytes(PNG)
+    np.save(tmp_path / "b.npy", np.zeros((4, 5, 3), dtype=np.uint8))
+    (tmp_path / "notes.txt").write_text("ignored", encoding="utf-8")
+    return tmp_path
+
+
+def test_cli_replays_against_bundled_mock(tmp_path, capsys):
+    assert main([str(frames_dir(tmp_path)), "--mock", "--workers", "2", "--warmup", "2", "--requests", "10"]) == 0
+    report = json.loads(capsys.readouterr().out)
+    assert report["mock"] is True and report["ok"] == 10 and report["errors"] == {}
+    assert report["payload_bytes"]["request"]["min"] == len(PNG)
+    assert report["payload_bytes"]["request"]["max"] == 60
+    assert 0 < report["latency_ms"]["p50"] <= report["latency_ms"]["p99"] <= report["latency_ms"]["max"]
+    assert report["connections_opened"] <= 2
+
+
+def test_rate_limit_and_error_breakdown(tmp_path):
+    frames = load_frames(frames_dir(tmp_path))
+    assert [frame.raw for frame in frames] == [False, True]
+    with MockPekatServer() as server, PekatClient(server.host, server.port) as client:
+        report = replay(client, frames, requests=5, rate=50.0)
+    assert report["duration_s"] >= 0.07 and report["target_rate"] == 50.0
+    with MockPekatServer() as server:
+        port = server.port
+    with PekatClient("127.0.0.1", port, timeout=(0.5, 0.5)) as client:
+        report = replay(client, frames, requests=3)
+    assert report["ok"] == 0 and report["errors"] == {"unavailable": 3}
+    assert percentile([1.0, 2.0, 3.0, 4.0], 0.5) == 2.0 and percentile([1.0, 2.0, 3.0, 4.0], 0.99) == 4.0
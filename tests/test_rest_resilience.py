@@ -0,0 +1,114 @@
+import io
+
+import pytest
+
+from mock_pekat_server import MockPekatServer
+from rest_api_client_demo import PekatClient, PekatRestError, Result
+from rest_resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, ResilientPekatClient, RetryPolicy
+
+PNG = b"\x89PNG\r\n\x1a\nmock"
+
+
+class ScriptedClient:
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def analyze_png(self, png_bytes, **_kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0) if self.outcomes else Result(None, {"result": True})
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def test_retry_uses_bounded_jittered_backoff_for_transport_errors_only():
+    delays = []
+    primary = ScriptedClient(PekatRestError("t", cause="timeout"), PekatRestError("503", cause="http", status=503))
+    client = ResilientPekatClient(primary, retry=RetryPolicy(attempts=3, base_delay_s=0.1), seed=1, sleep=delays.append)
+    assert client.analyze_png(PNG).context["result"] is True
+    assert primary.calls == 3 and len(delays) == 2
+    assert 0 <= delays[0] <= 0.1 and 0 <= delays[1] <= 0.2
+    payload = ScriptedClient(PekatRestError("bad json"))
+    client = ResilientPekatClient(payload, retry=RetryPolicy(attempts=3), sleep=delays.append)
+    with pytest.raises(PekatRestError, match="bad json"):
+        client.analyze_png(PNG)
+    assert payload.calls == 1 and client.snapshot()["counters"]["failures"] == 1
+
+
+def test_circuit_breaker_fails_fast_and_recovers_after_probe():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout_s=10.0, clock=lambda: now[0])
+    down = PekatRestError("down", cause="unavailable")
+    primary = ScriptedClient(down, down, down)
+    client = ResilientPekatClient(primary, breaker=breaker)
+    for _ in range(2):
+        with pytest.raises(PekatRestError, match="down"):
+            client.analyze_png(PNG)
+    assert breaker.state == OPEN
+    with pytest.raises(PekatRestError, match="circuit breaker") as caught:
+        client.analyze_png(PNG)
+    assert caught.value.cause == "circuit_open" and primary.calls == 2
+    now[0] = 10.0
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(PekatRestError, match="down"):
+        client.analyze_png(PNG)
+    assert breaker.state == OPEN
+    now[0] = 20.0
+    assert client.analyze_png(PNG).context["result"] is True and breaker.state == CLOSED
+    snapshot = client.snapshot()
+    assert snapshot["counters"]["short_circuited"] == 1 and snapshot["breaker"]["transitions"] == 5
+
+
+def test_local_errors_release_the_half_open_probe():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout_s=1.0, clock=lambda: now[0])
+    primary = ScriptedClient(PekatRestError("down", cause="unavailable"), ValueError("bad frame"))
+    client = ResilientPekatClient(primary, breaker=breaker)
+    with pytest.raises(PekatRestError):
+        client.analyze_png(PNG)
+    now[0] = 1.0
+    with pytest.raises(ValueError, match="binary PNG"):
+        client.analyze_png(b"not a png")
+    assert primary.calls == 1 and breaker.state == HALF_OPEN
+    with pytest.raises(ValueError, match="bad frame"):
+        client.analyze_png(PNG)
+    assert breaker.state == HALF_OPEN
+    assert client.analyze_png(PNG).context["result"] is True and breaker.state == CLOSED
+    assert client.snapshot()["counters"]["short_circuited"] == 0
+
+
+def test_retried_stream_writes_only_the_winning_image_to_the_sink():
+    class StreamingClient:
+        def __init__(self):
+            self.calls = 0
+
+        def analyze_png(self, png_bytes, *, image_sink=None, **_kwargs):
+            self.calls += 1
+            image_sink.write(b"\x89PNG-partial")
+            if self.calls == 1:
+                raise PekatRestError("connection reset mid-body", cause="unavailable")
+            image_sink.write(b"-complete")
+            return Result(None, {"result": True})
+
+    sink = io.BytesIO()
+    primary = StreamingClient()
+    client = ResilientPekatClient(primary, retry=RetryPolicy(attempts=2, base_delay_s=0.0), sleep=lambda _s: None)
+    assert client.analyze_png(PNG, response_type="image", image_sink=sink).context["result"] is True
+    assert primary.calls == 2 and sink.getvalue() == b"\x89PNG-partial-complete"
+    with pytest.raises(ValueError, match="hedge_workers"):
+        ResilientPekatClient(primary, hedge=primary, hedge_workers=1)
+
+
+def test_slow_primary_is_hedged_to_second_instance():
+    with MockPekatServer() as first, MockPekatServer() as secondary:
+        primary, hedge = PekatClient(first.host, first.port), PekatClient(secondary.host, secondary.port)
+        with primary, hedge, ResilientPekatClient(primary, hedge=hedge, hedge_min_samples=5) as client:
+            for _ in range(5):
+                client.analyze_png(PNG)
+            assert client.hedge_delay_s() is not None
+            first.behavior.latency_s = 0.5
+            assert client.analyze_png(PNG, data="hedged").context["query"]["data"] == "hedged"
+            counters = client.snapshot()["counters"]
+    assert counters["hedged"] == 1 and counters["hedge_wins"] == 1
+    assert secondary.requests == 1
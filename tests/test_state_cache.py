@@ -0,0 +1,70 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from state_cache import StateCache, form_fingerprint
+
+MODULE = """from state_cache import StateCache
+
+CACHE = StateCache()
+
+
+def main(context, form=None):
+    values = form or {}
+    lut = CACHE.get("auto-hdr", lambda: np.full(256, values.get("gain", 1), dtype=np.uint8), values, keys=("gain",))
+    context["image"] = lut[context["image"]]
+"""
+
+
+def test_builds_once_per_form_and_invalidates_on_change():
+    cache = StateCache(max_entries=4, max_bytes=1024)
+    built = []
+
+    def factory(gain):
+        return lambda: built.append(gain) or np.full(256, gain, dtype=np.uint8)
+
+    first = cache.get("hdr", factory(2), {"gain": 2, "note": "a"}, keys=("gain",))
+    assert cache.get("hdr", factory(2), {"note": "b", "gain": 2}, keys=("gain",)) is first
+    third = cache.get("hdr", factory(3), {"gain": 3}, keys=("gain",))
+    assert built == [2, 3] and int(third[0]) == 3
+    stats = cache.stats()
+    assert (stats["hits"], stats["builds"], stats["invalidations"], stats["entries"], stats["bytes"]) == (1, 2, 1, 1, 256)
+
+    cache.get("barcode", lambda: np.zeros(700, dtype=np.uint8))
+    cache.get("other", lambda: np.zeros(300, dtype=np.uint8))
+    assert cache.stats()["evictions"] == 1 and cache.stats()["bytes"] == 1000
+    huge = cache.get("huge", lambda: np.zeros(2048, dtype=np.uint8))
+    assert huge.nbytes == 2048 and cache.stats()["entries"] == 2
+    with pytest.raises(RuntimeError):
+        cache.get("broken", lambda: (_ for _ in ()).throw(RuntimeError("decoder missing")))
+    assert cache.stats()["failures"] == 1 and cache.invalidate("other") == 1
+    assert form_fingerprint({"b": 1, "a": [1]}) == '{"a":[1],"b":1}'
+
+
+def test_concurrent_callers_share_one_build_and_result_is_never_touched():
+    cache = StateCache()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.05)
+        return object()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("decoder", slow))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1 and len({id(value) for value in results}) == 1
+
+    namespace = {"np": np}
+    exec(MODULE, namespace)
+    for frame, (result, gain) in enumerate([(True, 2), (False, 2), (None, 5), ("NG", 5)]):
+        context = {"image": np.full((2, 2), frame, dtype=np.uint8), "result": result}
+        namespace["main"](context, {"gain": gain})
+        assert context["result"] == result and set(context) == {"image", "result"}
+        assert int(context["image"][0, 0]) == gain
+    assert namespace["CACHE"].stats()["builds"] == 2